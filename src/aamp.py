@@ -0,0 +1,185 @@
+"""
+Reader for AAMP (binary parameter archive) files, like .bxml and .bgparamlist
+
+The result has the same shape and values as loading the YAML conversion
+of the file with util.fyaml, so the same code can process both
+"""
+
+import struct
+from typing import Any, Iterable
+import numpy as np
+import util as u
+
+MAGIC = b"AAMP"
+FLAG_LITTLE_ENDIAN = 1 << 0
+FLAG_UTF8 = 1 << 1
+
+# parameter types, the high 8 bits of the second word of a parameter
+TYPE_BOOL = 0
+TYPE_F32 = 1
+TYPE_INT = 2
+TYPE_VEC2 = 3
+TYPE_VEC3 = 4
+TYPE_VEC4 = 5
+TYPE_COLOR = 6
+TYPE_STRING32 = 7
+TYPE_STRING64 = 8
+TYPE_CURVE1 = 9
+TYPE_CURVE2 = 10
+TYPE_CURVE3 = 11
+TYPE_CURVE4 = 12
+TYPE_BUFFER_INT = 13
+TYPE_BUFFER_F32 = 14
+TYPE_STRING256 = 15
+TYPE_QUAT = 16
+TYPE_U32 = 17
+TYPE_BUFFER_U32 = 18
+TYPE_BUFFER_BINARY = 19
+TYPE_STRING_REF = 20
+
+def name_table(names: Iterable[str]) -> dict[int, str]:
+    """Create a table to resolve names from their CRC32 hash"""
+    return { u.crc32(name): name for name in names }
+
+def fload(path: str, names: dict[int, str]) -> tuple[Any, str | None]:
+    """
+    Load an AAMP file
+
+    Keys not in names are kept as their hash in hex (see util.hex08)
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except Exception as e:
+        return None, str(e)
+    return load(data, names)
+
+def load(data: bytes, names: dict[int, str]) -> tuple[Any, str | None]:
+    try:
+        return _Reader(data, names).read_io(), None
+    except Exception as e:
+        return None, f"invalid AAMP: {e}"
+
+class _Reader:
+    def __init__(self, data: bytes, names: dict[int, str]):
+        self.data = data
+        self.names = names
+
+    def read_io(self) -> dict[str, Any]:
+        if self.data[0:4] != MAGIC:
+            raise ValueError(f"invalid magic: {self.data[0:4]}")
+        flags = self.u32(0x8)
+        if flags & FLAG_LITTLE_ENDIAN == 0:
+            raise ValueError("only little endian is supported")
+        if flags & FLAG_UTF8 == 0:
+            raise ValueError("only UTF-8 is supported")
+        version = self.u32(0x10)
+        type_size = self.u32(0x14)
+        name, root = self.read_list(0x30 + type_size)
+        return {
+            "version": version,
+            "type": self.string(0x30, -1),
+            name: root,
+        }
+
+    def read_list(self, offset: int) -> tuple[str, dict[str, Any]]:
+        name = self.name(self.u32(offset))
+        lists_offset = offset + 4 * self.u16(offset + 4)
+        lists_count = self.u16(offset + 6)
+        objects_offset = offset + 4 * self.u16(offset + 8)
+        objects_count = self.u16(offset + 0xa)
+        objects = {}
+        for i in range(objects_count):
+            obj_name, obj = self.read_object(objects_offset + 8 * i)
+            objects[obj_name] = obj
+        lists = {}
+        for i in range(lists_count):
+            list_name, plist = self.read_list(lists_offset + 0xc * i)
+            lists[list_name] = plist
+        return name, { "objects": objects, "lists": lists }
+
+    def read_object(self, offset: int) -> tuple[str, dict[str, Any]]:
+        name = self.name(self.u32(offset))
+        params_offset = offset + 4 * self.u16(offset + 4)
+        params_count = self.u16(offset + 6)
+        params = {}
+        for i in range(params_count):
+            param_name, value = self.read_param(params_offset + 8 * i)
+            params[param_name] = value
+        return name, params
+
+    def read_param(self, offset: int) -> tuple[str, Any]:
+        name = self.name(self.u32(offset))
+        info = self.u32(offset + 4)
+        data_offset = offset + 4 * (info & 0xffffff)
+        param_type = info >> 24
+        if param_type == TYPE_BOOL:
+            return name, self.u32(data_offset) != 0
+        if param_type == TYPE_F32:
+            return name, self.f32(data_offset)
+        if param_type == TYPE_INT:
+            return name, self.s32(data_offset)
+        if param_type == TYPE_U32:
+            return name, self.u32(data_offset)
+        if param_type == TYPE_VEC2:
+            return name, self.f32s(data_offset, 2)
+        if param_type == TYPE_VEC3:
+            return name, self.f32s(data_offset, 3)
+        if param_type in (TYPE_VEC4, TYPE_COLOR, TYPE_QUAT):
+            return name, self.f32s(data_offset, 4)
+        if param_type == TYPE_STRING32:
+            return name, self.string(data_offset, 32)
+        if param_type == TYPE_STRING64:
+            return name, self.string(data_offset, 64)
+        if param_type == TYPE_STRING256:
+            return name, self.string(data_offset, 256)
+        if param_type == TYPE_STRING_REF:
+            return name, self.string(data_offset, -1)
+        if TYPE_CURVE1 <= param_type <= TYPE_CURVE4:
+            curves = []
+            for i in range(param_type - TYPE_CURVE1 + 1):
+                curve_offset = data_offset + 0x80 * i
+                curves.extend(struct.unpack_from("<2I", self.data, curve_offset))
+                curves.extend(self.f32s(curve_offset + 8, 30))
+            return name, curves
+        if param_type in (TYPE_BUFFER_INT, TYPE_BUFFER_F32, TYPE_BUFFER_U32, TYPE_BUFFER_BINARY):
+            size = self.u32(data_offset - 4)
+            if param_type == TYPE_BUFFER_INT:
+                return name, list(struct.unpack_from(f"<{size}i", self.data, data_offset))
+            if param_type == TYPE_BUFFER_F32:
+                return name, self.f32s(data_offset, size)
+            if param_type == TYPE_BUFFER_U32:
+                return name, list(struct.unpack_from(f"<{size}I", self.data, data_offset))
+            return name, self.data[data_offset:data_offset + size]
+        raise ValueError(f"unknown parameter type {param_type} for {name}")
+
+    def name(self, crc32: int) -> str:
+        if crc32 in self.names:
+            return self.names[crc32]
+        return u.hex08(crc32)
+
+    def u16(self, offset: int) -> int:
+        return struct.unpack_from("<H", self.data, offset)[0]
+
+    def u32(self, offset: int) -> int:
+        return struct.unpack_from("<I", self.data, offset)[0]
+
+    def s32(self, offset: int) -> int:
+        return struct.unpack_from("<i", self.data, offset)[0]
+
+    def f32(self, offset: int) -> float:
+        return self.f32s(offset, 1)[0]
+
+    def f32s(self, offset: int, count: int) -> list[float]:
+        return [_f32(x) for x in np.frombuffer(self.data, dtype="<f4", count=count, offset=offset)]
+
+    def string(self, offset: int, max_size: int) -> str:
+        end = self.data.index(0, offset)
+        if max_size != -1:
+            end = min(end, offset + max_size)
+        return self.data[offset:end].decode("utf-8")
+
+def _f32(x: np.float32) -> float:
+    # the shortest decimal that is the same f32, like the YAML conversions,
+    # so the value is exact and the same as loading the YAML
+    return float(str(x))
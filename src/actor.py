@@ -0,0 +1,70 @@
+"""
+Load the actor files saved by link_actors
+"""
+import os
+from typing import Any
+import util as u
+
+# path -> GParams, cached per process since many actors share the same GParamList
+_gparamlists: dict[str, dict[str, Any]] = {}
+# path -> actor -> strings, cached per process
+_l10n_tables: dict[str, dict[str, Any]] = {}
+
+def load(actor_path: str) -> tuple[dict[str, Any], str | None]:
+    """
+    Load an actor file from output/Actor
+
+    If the GParamList is shared (link_actors --shared-gparams), it is
+    loaded from output/GParamList and put in the actor as if it was inline
+    """
+    actor, err = u.fyaml(actor_path)
+    if err: return {}, err
+    user = actor.get("gparamlist")
+    if isinstance(user, str):
+        gparamlist_dir = os.path.join(os.path.dirname(os.path.dirname(actor_path)), "GParamList")
+        gparamlist, err = load_gparamlist(os.path.join(gparamlist_dir, f"{user}.yaml"))
+        if err: return {}, f"failed to load GParamList for {actor.get('actor')}: {err}"
+        actor["gparamlist"] = gparamlist
+    return actor, None
+
+def load_gparamlist(path: str) -> tuple[dict[str, Any], str | None]:
+    """Load a shared GParamList file. The result is cached and must not be modified"""
+    if path in _gparamlists:
+        return _gparamlists[path], None
+    gparamlist, err = u.fyaml(path)
+    if err: return {}, err
+    err = u.ensure(isinstance(gparamlist, dict), f"GParamList must be a dict: {u.relpath(path)}")
+    if err: return {}, err
+    _gparamlists[path] = gparamlist
+    return gparamlist, None
+
+def load_strings(actor_path: str, actor: dict[str, Any], locale: str) -> tuple[dict[str, Any] | None, str | None]:
+    """
+    Get the localized strings of a loaded actor for one locale,
+    or None if the actor doesn't have localization
+
+    If localization is split (link_actors --split-l10n), only the table
+    of the locale is loaded from output/Localization
+    """
+    localization = actor.get("localization")
+    if not localization:
+        return None, None
+    if isinstance(localization, str):
+        l10n_dir = os.path.join(os.path.dirname(os.path.dirname(actor_path)), "Localization")
+        table, err = load_l10n_table(os.path.join(l10n_dir, f"{locale}.yaml"))
+        if err: return None, err
+        err = u.ensure(localization in table, f"{localization} not found in {locale} localization")
+        if err: return None, err
+        return table[localization], None
+    return localization[locale], None
+
+def load_l10n_table(path: str) -> tuple[dict[str, Any], str | None]:
+    """Load a localization table of one locale. The result is cached and must not be modified"""
+    if path in _l10n_tables:
+        return _l10n_tables[path], None
+    table, err = u.fyaml(path)
+    if err: return {}, err
+    err = u.ensure(isinstance(table, dict), f"Localization table must be a dict: {u.relpath(path)}")
+    if err: return {}, err
+    _l10n_tables[path] = table
+    return table, None
@@ -0,0 +1,153 @@
+"""
+Reader for BYML (binary YAML) v2/v3 files, like CookData.byml and GameData flags
+
+The result has the same shape and values as loading the YAML conversion
+of the file with util.fyaml, so the same code can process both
+"""
+
+import os
+import mmap
+import struct
+from typing import Any
+import util as u
+
+# Extensions of BYML files, checked in order when looking for the binary
+# file next to a YAML conversion
+EXTENSIONS = (".byml", ".bgdata")
+
+NODE_STRING = 0xA0
+NODE_ARRAY = 0xC0
+NODE_HASH = 0xC1
+NODE_STRING_TABLE = 0xC2
+NODE_BOOL = 0xD0
+NODE_INT = 0xD1
+NODE_FLOAT = 0xD2
+NODE_UINT = 0xD3
+NODE_INT64 = 0xD4
+NODE_UINT64 = 0xD5
+NODE_DOUBLE = 0xD6
+NODE_NULL = 0xFF
+
+def fload(path: str) -> tuple[Any, str | None]:
+    """Load a BYML file. The file is memory-mapped while parsing"""
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return load(data)
+    except Exception as e:
+        return None, str(e)
+
+def fload_prefer_binary(yaml_path: str) -> tuple[Any, str | None]:
+    """
+    Load the BYML file next to a YAML conversion (for example CookData.byml
+    for CookData.yml) if there is one, otherwise load the YAML file
+    """
+    base = yaml_path[:-4] if yaml_path.endswith(".yml") else yaml_path
+    for ext in EXTENSIONS:
+        if os.path.exists(base + ext):
+            return fload(base + ext)
+    return u.fyaml(yaml_path)
+
+def load(data) -> tuple[Any, str | None]:
+    """Load BYML from bytes (or anything supporting the buffer protocol and slicing)"""
+    try:
+        return _Reader(data).read(), None
+    except Exception as e:
+        return None, f"invalid BYML: {e}"
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        magic = bytes(data[0:2])
+        if magic == b"BY":
+            self.endian = ">"
+        elif magic == b"YB":
+            self.endian = "<"
+        else:
+            raise ValueError(f"invalid magic: {magic}")
+        version = self.u16(2)
+        if version not in (2, 3):
+            raise ValueError(f"unsupported version: {version}")
+        self.keys = self.read_string_table(self.u32(4))
+        self.strings = self.read_string_table(self.u32(8))
+        self.root = self.u32(12)
+
+    def read(self) -> Any:
+        if self.root == 0:
+            return None
+        return self.read_container(self.root)
+
+    def read_string_table(self, offset: int) -> list[str]:
+        if offset == 0:
+            return []
+        node_type, count = self.node_header(offset)
+        if node_type != NODE_STRING_TABLE:
+            raise ValueError(f"expected string table at 0x{offset:x}")
+        offsets = struct.unpack_from(f"{self.endian}{count}I", self.data, offset + 4)
+        strings = []
+        for string_offset in offsets:
+            start = offset + string_offset
+            end = self.data.find(b"\0", start)
+            strings.append(bytes(self.data[start:end]).decode("utf-8"))
+        return strings
+
+    def read_container(self, offset: int) -> Any:
+        node_type, count = self.node_header(offset)
+        if node_type == NODE_ARRAY:
+            types = self.data[offset + 4:offset + 4 + count]
+            values_offset = offset + 4 + _align4(count)
+            values = struct.unpack_from(f"{self.endian}{count}I", self.data, values_offset)
+            return [self.read_value(t, v) for t, v in zip(types, values)]
+        if node_type == NODE_HASH:
+            out = {}
+            for i in range(count):
+                entry = offset + 4 + 8 * i
+                key_and_type, value = struct.unpack_from(f"{self.endian}II", self.data, entry)
+                if self.endian == ">":
+                    key, t = key_and_type >> 8, key_and_type & 0xFF
+                else:
+                    key, t = key_and_type & 0xFFFFFF, key_and_type >> 24
+                out[self.keys[key]] = self.read_value(t, value)
+            return out
+        raise ValueError(f"expected array or hash at 0x{offset:x}, got 0x{node_type:02x}")
+
+    def read_value(self, node_type: int, value: int) -> Any:
+        if node_type == NODE_STRING:
+            return self.strings[value]
+        if node_type in (NODE_ARRAY, NODE_HASH):
+            return self.read_container(value)
+        if node_type == NODE_BOOL:
+            return value != 0
+        if node_type == NODE_INT:
+            return struct.unpack(f"{self.endian}i", struct.pack(f"{self.endian}I", value))[0]
+        if node_type == NODE_FLOAT:
+            return struct.unpack(f"{self.endian}f", struct.pack(f"{self.endian}I", value))[0]
+        if node_type == NODE_UINT:
+            return value
+        if node_type == NODE_INT64:
+            return struct.unpack_from(f"{self.endian}q", self.data, value)[0]
+        if node_type == NODE_UINT64:
+            return struct.unpack_from(f"{self.endian}Q", self.data, value)[0]
+        if node_type == NODE_DOUBLE:
+            return struct.unpack_from(f"{self.endian}d", self.data, value)[0]
+        if node_type == NODE_NULL:
+            return None
+        raise ValueError(f"unknown node type 0x{node_type:02x}")
+
+    def node_header(self, offset: int) -> tuple[int, int]:
+        """Return node type and the 24-bit count"""
+        node_type = self.data[offset]
+        if self.endian == ">":
+            count = int.from_bytes(self.data[offset + 1:offset + 4], "big")
+        else:
+            count = int.from_bytes(self.data[offset + 1:offset + 4], "little")
+        return node_type, count
+
+    def u16(self, offset: int) -> int:
+        return struct.unpack_from(f"{self.endian}H", self.data, offset)[0]
+
+    def u32(self, offset: int) -> int:
+        return struct.unpack_from(f"{self.endian}I", self.data, offset)[0]
+
+def _align4(x: int) -> int:
+    return (x + 3) & ~3
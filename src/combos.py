@@ -0,0 +1,61 @@
+"""
+Ingredient combinations (multisets of up to 5 actors), numbered by rank
+
+A combination is K slots, each either empty (0) or an actor (1 to N),
+sorted so the slots are non-decreasing (so empty slots come first).
+Adding i to slot i makes it a strictly increasing K-combination of
+N + K values, and its rank in the combinatorial number system is
+
+    rank = C(c[0], 1) + C(c[1], 2) + ... + C(c[K-1], K)
+
+Ranks go from 0 (all empty) to C(N + K, K) - 1, with no gaps,
+so a range of ranks is a range of combinations
+"""
+
+import numpy as np
+
+K = 5
+
+class Space:
+    """Combinations of up to K of n actors"""
+    n: int
+    k: int
+    # binomials[j][c] = C(c, j), for c in 0..n+k
+    binomials: np.ndarray
+
+    def __init__(self, n: int, k: int = K):
+        self.n = n
+        self.k = k
+        values = n + k
+        self.binomials = np.zeros((k + 1, values + 1), dtype=np.int64)
+        self.binomials[0, :] = 1
+        for c in range(1, values + 1):
+            for j in range(1, k + 1):
+                self.binomials[j, c] = self.binomials[j - 1, c - 1] + self.binomials[j, c - 1]
+
+    def size(self) -> int:
+        """Number of combinations, including the empty one (rank 0)"""
+        return int(self.binomials[self.k, self.n + self.k])
+
+    def unrank(self, ranks: np.ndarray) -> np.ndarray:
+        """
+        Return the combinations of the ranks as a (len(ranks), k) array of
+        actor indices (0 to n-1), with -1 for empty slots
+        """
+        ranks = np.array(ranks, dtype=np.int64)
+        out = np.empty((len(ranks), self.k), dtype=np.int64)
+        for j in range(self.k, 0, -1):
+            # largest c with C(c, j) <= rank
+            c = np.searchsorted(self.binomials[j], ranks, side="right") - 1
+            ranks -= self.binomials[j, c]
+            # the slot value is c - (j - 1), 0 for empty, so the actor index is c - j
+            out[:, j - 1] = c - j
+        return out
+
+    def rank(self, combos: np.ndarray) -> np.ndarray:
+        """Inverse of unrank. The slots of each row can be in any order"""
+        combos = np.sort(np.asarray(combos, dtype=np.int64), axis=1)
+        ranks = np.zeros(len(combos), dtype=np.int64)
+        for j in range(1, self.k + 1):
+            ranks += self.binomials[j, combos[:, j - 1] + j]
+        return ranks
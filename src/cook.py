@@ -0,0 +1,326 @@
+"""
+Cook simulator, using cook-system.yaml, the actor gparams and the recipes
+
+Usage: python src/cook.py [ACTOR...] to cook the ingredients,
+or python src/cook.py --bench [N] to measure the batch throughput
+
+cook_batch() evaluates many ingredient lists at once with numpy, from per-actor
+columns (precomputed from the gparams). cook() is the scalar reference it
+is checked against. The model (from cook-system.yaml, see decode_cook_system.py
+for the key names):
+  - recipe: the matched recipe (see recipe.py)
+  - hp (quarter hearts): floor(sum(cureItemHitPointRecover) * LRMR)
+    + sum(cookSpiceBoostHitPointRecover) + heart_bonus of the recipe,
+    capped at the max of LifeRecover in CEI.
+    For the failure actor: max(FALR, floor(sum(cureItemHitPointRecover) * FALRMR))
+  - effect: the cureItemEffectType of the ingredients that have one (as index into CEI),
+    or none if no ingredient has one, they are different, or the recipe is the failure actor
+  - level: floor(sum(cureItemEffectLevel) * MR of the effect), plus
+    cookSpiceBoostMaxHeartLevel for LifeMaxUp and cookSpiceBoostStaminaLevel for
+    StaminaRecover, clamped to [Mi, Ma] of the effect
+  - time (seconds): only for effects with BT > 0, BT + sum(cureItemEffectiveTime)
+    + sum(cookSpiceBoostEffectiveTime), capped at MAX_EFFECT_TIME
+  - crit_rate (%): NMSSR[number of ingredients - 1] + sum(cookSpiceBoostSuccessRate), capped at 100.
+    A critical cook (critical=True) adds SSA of the effect to the level (clamped to Ma),
+    or SSA of LifeRecover to hp if there is no effect, and SSAET to the time of timed effects
+  - price: floor(sum(itemSellingPrice) * NMMR[number of ingredients - 1]) rounded
+    down to a multiple of 10, at most sum(itemBuyingPrice) and at least MIN_PRICE
+
+Floats are f32 like the game, in both cook() and cook_batch()
+"""
+
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any
+import numpy as np
+import util as u
+import spp
+import recipe as r
+
+MAX_EFFECT_TIME = 1800
+MIN_PRICE = 2
+NO_EFFECT = -1
+
+# per-actor columns, from the gparams
+COLUMNS = {
+    "hp": "cureItemHitPointRecover",
+    "effect_level": "cureItemEffectLevel",
+    "effect_time": "cureItemEffectiveTime",
+    "sell": "itemSellingPrice",
+    "buy": "itemBuyingPrice",
+    "boost_hp": "cookSpiceBoostHitPointRecover",
+    "boost_time": "cookSpiceBoostEffectiveTime",
+    "boost_rate": "cookSpiceBoostSuccessRate",
+    "boost_max_heart": "cookSpiceBoostMaxHeartLevel",
+    "boost_stamina": "cookSpiceBoostStaminaLevel",
+}
+
+def f32(value: int | float) -> np.float32:
+    """Value in cook-system.yaml as f32. Integers are the bits of the f32"""
+    if isinstance(value, int):
+        return np.float32(u.f32_bits(value))
+    return np.float32(value)
+
+@dataclass(slots=True)
+class Effect:
+    type: str
+    base_time: int
+    multiplier: np.float32
+    min: int
+    max: int
+    super_success_amount: int
+
+# smallest dtype for each column of Result, for storing many results
+RESULT_DTYPES = {
+    "recipe": np.int16,
+    "hp": np.int16,
+    "effect": np.int8,
+    "level": np.int16,
+    "time": np.int16,
+    "crit_rate": np.int8,
+    "price": np.int32,
+}
+
+@dataclass(slots=True)
+class Result:
+    recipe: int
+    hp: int
+    effect: int
+    level: int
+    time: int
+    crit_rate: int
+    price: int
+
+class Simulator:
+    matcher: r.Matcher
+    effects: list[Effect]
+    # column -> values by actor id, the last row is for EMPTY (all 0)
+    columns: dict[str, np.ndarray]
+    # effect index by actor id, NO_EFFECT for none
+    effect_ids: np.ndarray
+
+    def __init__(self, matcher: r.Matcher, system: dict[str, Any], gparams: dict[str, dict[str, Any]]):
+        self.matcher = matcher
+        self.effects = [
+            Effect(e["type"], e["base_time"], f32(e["multiplier"]), e["min"], e["max"], e["super_success_amount"])
+            for e in system["cook_effect_index"]
+        ]
+        self.effect_index = { e.type: i for i, e in enumerate(self.effects) }
+        self.life_recover = self.effects[self.effect_index["LifeRecover"]]
+        self.failure_life_recover = system["failure_actor_life_recover"]
+        self.failure_multiplier = f32(system["failure_actor_life_recover_multiplier"])
+        self.life_recover_multiplier = f32(system["life_recover_multiplier"])
+        self.material_multiplier = np.array([f32(x) for x in system["num_material_multiplier"]], dtype=np.float32)
+        self.super_success_rate = np.array(system["num_material_super_success_rate"], dtype=np.int64)
+        self.super_success_time = system["super_success_additional_effect_time"]
+        self.heart_bonus = np.array([x["heart_bonus"] for x in matcher.recipes], dtype=np.int64)
+
+        n = len(matcher.actors)
+        self.columns = { c: np.zeros(n + 1, dtype=np.int64) for c in COLUMNS }
+        self.effect_ids = np.full(n + 1, NO_EFFECT, dtype=np.int64)
+        for actor_id, actor in enumerate(matcher.actors):
+            gparam = gparams[actor]
+            for column, key in COLUMNS.items():
+                self.columns[column][actor_id] = gparam.get(key, 0)
+            effect = gparam.get("cureItemEffectType", "None")
+            if effect != "None":
+                self.effect_ids[actor_id] = self.effect_index[effect]
+
+        # effect columns, by effect index
+        self.effect_multiplier = np.array([e.multiplier for e in self.effects], dtype=np.float32)
+        self.effect_min = np.array([e.min for e in self.effects], dtype=np.int64)
+        self.effect_max = np.array([e.max for e in self.effects], dtype=np.int64)
+        self.effect_base_time = np.array([e.base_time for e in self.effects], dtype=np.int64)
+        self.effect_ssa = np.array([e.super_success_amount for e in self.effects], dtype=np.int64)
+        # boost to effect level from spices
+        self.spice_level_column = {
+            self.effect_index[effect]: column
+            for effect, column in (("LifeMaxUp", "boost_max_heart"), ("StaminaRecover", "boost_stamina"))
+            if effect in self.effect_index
+        }
+
+    def cook(self, actors: list[str], critical: bool = False) -> tuple[Result, str | None]:
+        """Cook up to 5 ingredients (the reference for cook_batch)"""
+        recipe, err = self.matcher.match(actors)
+        if err: return None, err # type: ignore
+        ids = [self.matcher.actor_ids[a] for a in actors]
+        col = { c: [int(v[i]) for i in ids] for c, v in self.columns.items() }
+        count = len(ids)
+
+        if recipe == self.matcher.failure_index:
+            hp = max(self.failure_life_recover, int(np.floor(np.float32(sum(col["hp"])) * self.failure_multiplier)))
+            effect = NO_EFFECT
+        else:
+            hp = int(np.floor(np.float32(sum(col["hp"])) * self.life_recover_multiplier))
+            hp += sum(col["boost_hp"]) + int(self.heart_bonus[recipe])
+            effects = set(int(self.effect_ids[i]) for i in ids) - { NO_EFFECT }
+            effect = effects.pop() if len(effects) == 1 else NO_EFFECT
+
+        level = 0
+        effect_time = 0
+        if effect != NO_EFFECT:
+            e = self.effects[effect]
+            level = int(np.floor(np.float32(sum(col["effect_level"])) * e.multiplier))
+            if effect in self.spice_level_column:
+                level += sum(col[self.spice_level_column[effect]])
+            level = min(max(level, e.min), e.max)
+            if e.base_time > 0:
+                effect_time = e.base_time + sum(col["effect_time"]) + sum(col["boost_time"])
+
+        crit_rate = 0
+        price = 0
+        if count:
+            crit_rate = min(100, int(self.super_success_rate[count - 1]) + sum(col["boost_rate"]))
+            price = int(np.floor(np.float32(sum(col["sell"])) * self.material_multiplier[count - 1]))
+            price = max(MIN_PRICE, min(price // 10 * 10, sum(col["buy"])))
+
+        if critical:
+            if effect == NO_EFFECT:
+                hp += self.life_recover.super_success_amount
+            else:
+                level = min(level + self.effects[effect].super_success_amount, self.effects[effect].max)
+                if effect_time:
+                    effect_time += self.super_success_time
+        hp = min(hp, self.life_recover.max)
+        effect_time = min(effect_time, MAX_EFFECT_TIME)
+
+        return Result(recipe, hp, effect, level, effect_time, crit_rate, price), None
+
+    def cook_batch(self, ids: np.ndarray, critical: np.ndarray | None = None) -> tuple[dict[str, np.ndarray], str | None]:
+        """
+        Cook many ingredient lists at once. ids is an (N, up to 5) integer array
+        of actor ids (see recipe.Matcher.actor_id), with recipe.EMPTY for empty slots.
+        critical is a bool for each row (all False if not given).
+        Return the columns of Result, each an array with a value for each row
+        """
+        ids = np.asarray(ids)
+        n = len(self.matcher.actors)
+        recipe, err = self.matcher.match_batch(ids)
+        if err: return {}, err
+        rows = np.where(ids < 0, n, ids)
+        sums = { c: v[rows].sum(axis=1) for c, v in self.columns.items() }
+        count = (ids >= 0).sum(axis=1)
+        failure = recipe == self.matcher.failure_index
+
+        hp = np.floor(sums["hp"].astype(np.float32) * self.life_recover_multiplier).astype(np.int64)
+        hp += sums["boost_hp"] + self.heart_bonus[recipe]
+        failure_hp = np.floor(sums["hp"].astype(np.float32) * self.failure_multiplier).astype(np.int64)
+        hp = np.where(failure, np.maximum(failure_hp, self.failure_life_recover), hp)
+
+        # the effect is the same for all ingredients with one
+        effects = self.effect_ids[rows]
+        highest = effects.max(axis=1)
+        lowest = np.where(effects == NO_EFFECT, len(self.effects), effects).min(axis=1)
+        effect = np.where((highest == lowest) & ~failure, highest, NO_EFFECT)
+        has_effect = effect != NO_EFFECT
+        e = np.where(has_effect, effect, 0)
+
+        level = np.floor(sums["effect_level"].astype(np.float32) * self.effect_multiplier[e]).astype(np.int64)
+        for effect_i, column in self.spice_level_column.items():
+            level += np.where(effect == effect_i, sums[column], 0)
+        level = np.clip(level, self.effect_min[e], self.effect_max[e])
+        level = np.where(has_effect, level, 0)
+
+        timed = has_effect & (self.effect_base_time[e] > 0)
+        effect_time = np.where(timed, self.effect_base_time[e] + sums["effect_time"] + sums["boost_time"], 0)
+
+        c = np.maximum(count - 1, 0)
+        crit_rate = np.minimum(100, self.super_success_rate[c] + sums["boost_rate"])
+        price = np.floor(sums["sell"].astype(np.float32) * self.material_multiplier[c]).astype(np.int64)
+        price = np.maximum(MIN_PRICE, np.minimum(price // 10 * 10, sums["buy"]))
+        empty = count == 0
+        crit_rate[empty] = 0
+        price[empty] = 0
+
+        if critical is not None:
+            critical = np.asarray(critical, dtype=bool)
+            hp += np.where(critical & ~has_effect, self.life_recover.super_success_amount, 0)
+            level = np.where(critical & has_effect, np.minimum(level + self.effect_ssa[e], self.effect_max[e]), level)
+            effect_time += np.where(critical & (effect_time > 0), self.super_success_time, 0)
+        hp = np.minimum(hp, self.life_recover.max)
+        effect_time = np.minimum(effect_time, MAX_EFFECT_TIME)
+
+        return {
+            "recipe": recipe,
+            "hp": hp,
+            "effect": effect,
+            "level": level,
+            "time": effect_time,
+            "crit_rate": crit_rate,
+            "price": price,
+        }, None
+
+def load(output_dir: str | None = None) -> tuple[Simulator, str | None]:
+    """Load the simulator from the output directory"""
+    if output_dir is None:
+        output_dir = u.output()
+    system, err = u.fyaml(os.path.join(output_dir, "cook-system.yaml"))
+    if err: return None, err # type: ignore
+    actors, err = r.load_actors(output_dir)
+    if err: return None, err # type: ignore
+    matcher, err = r.load(output_dir, actors)
+    if err: return None, err # type: ignore
+    gparams = { name: actor["gparamlist"] for name, actor in actors.items() }
+    # actors in the recipe index must have an Actor file
+    for actor in matcher.actors:
+        if actor not in gparams:
+            return None, f"unknown actor: {actor}" # type: ignore
+    try:
+        return Simulator(matcher, system, gparams), None
+    except KeyError as e:
+        return None, f"unknown cook effect or missing key: {e}" # type: ignore
+
+def bench(sim: Simulator, count: int) -> str | None:
+    rng = np.random.default_rng(0)
+    actor_count = len(sim.matcher.actors)
+    ids = rng.integers(0, actor_count, size=(count, r.MAX_INGREDIENTS))
+    ids[rng.random((count, r.MAX_INGREDIENTS)) < 0.3] = r.EMPTY
+    ids[:, 0] = rng.integers(0, actor_count, size=count)
+    critical = rng.random(count) < 0.2
+
+    start = time.monotonic()
+    result, err = sim.cook_batch(ids, critical)
+    if err: return err
+    elapsed = time.monotonic() - start
+    print(f"cook_batch: {count} in {elapsed:.2f}s ({count / elapsed:,.0f}/s)")
+
+    sample = min(count, 20000)
+    progress = spp.printer(sample, "Check against cook")
+    start = time.monotonic()
+    for i in range(sample):
+        names = [sim.matcher.actors[x] for x in ids[i] if x != r.EMPTY]
+        expected, err = sim.cook(names, bool(critical[i]))
+        if err:
+            progress.done()
+            return err
+        actual = Result(*(int(result[c][i]) for c in Result.__slots__)) # type: ignore
+        if actual != expected:
+            progress.done()
+            return f"mismatch for {names}: cook_batch={actual}, cook={expected}"
+        progress.update(i)
+    progress.done()
+    elapsed = time.monotonic() - start
+    print(f"cook: {sample} in {elapsed:.2f}s ({sample / elapsed:,.0f}/s)")
+    return None
+
+def main(argv: list[str]) -> str | None:
+    sim, err = load()
+    if err: return err
+    if argv and argv[0] == "--bench":
+        return bench(sim, int(argv[1]) if len(argv) > 1 else 1000000)
+    err = u.ensure(0 < len(argv) <= r.MAX_INGREDIENTS, f"need 1 to {r.MAX_INGREDIENTS} actors")
+    if err: return err
+    result, err = sim.cook(argv)
+    if err: return err
+    effect = sim.effects[result.effect].type if result.effect != NO_EFFECT else "None"
+    print(f"recipe: {sim.matcher.recipes[result.recipe]['recipe']}")
+    print(f"hp: {result.hp}")
+    print(f"effect: {effect} (level {result.level}, {result.time}s)")
+    print(f"crit_rate: {result.crit_rate}")
+    print(f"price: {result.price}")
+    return None
+
+if __name__ == "__main__":
+    u.fatal(main(sys.argv[1:]))
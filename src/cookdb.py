@@ -0,0 +1,248 @@
+"""
+Database of cook results, with a row for each combination of groups of actors (see groups.py)
+
+Usage:
+  python src/cookdb.py build [options]   build from the shards of enumerate_cooks.py
+  python src/cookdb.py get ACTOR...      look up the result of the ingredients
+
+The rows are the rows of groups.py (combinations of groups of actors by rank,
+then the mixed rows), and any actor of a group can be used to look up a result.
+Reader.expand lists the actor combinations of a row when needed
+
+Since the row is computed from the ingredients, the combinations are not stored.
+Each row is a fixed-width record of the fields of cook.Result (packed, with the dtypes in
+cook.RESULT_DTYPES). Rows are split into chunks of the same number of rows, and each
+chunk can be compressed (zlib or lzma). Looking up a row is then:
+row -> chunk -> (decompress) -> record, without reading the other chunks.
+Little-endian:
+
+    header: "CKDB", version (u32), K (u32), group count (u32), row count (u64),
+            rows per chunk (u32), compression (u32), field count (u32), chunk index offset (u64)
+    fields: name (16 bytes, null-padded), numpy dtype (4 bytes, like "<i2")
+    groups: actor count (u32), then length (u32) and UTF-8 name of each actor
+    chunks
+    chunk index: offset (u64), size (u64) of each chunk
+"""
+
+import os
+import sys
+import mmap
+import lzma
+import zlib
+import struct
+import argparse
+from collections import OrderedDict
+import numpy as np
+import util as u
+import spp
+import cook
+import combos
+import groups as g
+
+MAGIC = b"CKDB"
+VERSION = 3
+HEADER = struct.Struct("<4sIIIQIIIQ")
+FIELD = struct.Struct("<16s4s")
+CHUNK = struct.Struct("<QQ")
+COMPRESSIONS = { "none": 0, "zlib": 1, "lzma": 2 }
+DEFAULT_CHUNK_ROWS = 1 << 16
+# decompressed chunks to keep in Reader
+CACHED_CHUNKS = 16
+
+RECORD = np.dtype([(name, dtype) for name, dtype in cook.RESULT_DTYPES.items()])
+
+def _compress(data: bytes, compression: int) -> bytes:
+    if compression == 1:
+        return zlib.compress(data, 6)
+    if compression == 2:
+        return lzma.compress(data)
+    return data
+
+def _decompress(data, compression: int) -> bytes:
+    if compression == 1:
+        return zlib.decompress(data)
+    if compression == 2:
+        return lzma.decompress(data)
+    return data
+
+class Writer:
+    """Write a database, appending the records in order of row"""
+    def __init__(self, path: str, groups: list[list[str]], row_count: int, chunk_rows: int = DEFAULT_CHUNK_ROWS, compression: str = "zlib"):
+        self.path = path
+        self.groups = groups
+        self.row_count = row_count
+        self.chunk_rows = chunk_rows
+        self.compression = COMPRESSIONS[compression]
+        self.chunks: list[tuple[int, int]] = []
+        self.pending: list[np.ndarray] = []
+        self.pending_rows = 0
+        self.written_rows = 0
+        self.file = open(path, "wb")
+        self.file.write(self._header(0))
+        for name, dtype in RECORD.fields.items(): # type: ignore
+            self.file.write(FIELD.pack(name.encode("utf-8"), dtype[0].str.encode("ascii")))
+        for group in groups:
+            self.file.write(struct.pack("<I", len(group)))
+            for actor in group:
+                name = actor.encode("utf-8")
+                self.file.write(struct.pack("<I", len(name)) + name)
+
+    def _header(self, index_offset: int) -> bytes:
+        return HEADER.pack(
+            MAGIC, VERSION, combos.K, len(self.groups), self.row_count,
+            self.chunk_rows, self.compression, len(RECORD.names), index_offset) # type: ignore
+
+    def append(self, records: np.ndarray):
+        self.pending.append(records.astype(RECORD, copy=False))
+        self.pending_rows += len(records)
+        while self.pending_rows >= self.chunk_rows:
+            self._flush(self.chunk_rows)
+
+    def _flush(self, rows: int):
+        data = np.concatenate(self.pending)
+        self.pending = [data[rows:]]
+        self.pending_rows = len(data) - rows
+        chunk = _compress(data[:rows].tobytes(), self.compression)
+        self.chunks.append((self.file.tell(), len(chunk)))
+        self.file.write(chunk)
+        self.written_rows += rows
+
+    def close(self) -> str | None:
+        if self.pending_rows:
+            self._flush(self.pending_rows)
+        err = u.ensure(self.written_rows == self.row_count, f"expected {self.row_count} rows, got {self.written_rows}")
+        index_offset = self.file.tell()
+        for chunk in self.chunks:
+            self.file.write(CHUNK.pack(*chunk))
+        self.file.seek(0)
+        self.file.write(self._header(index_offset))
+        self.file.close()
+        return err
+
+class Reader:
+    """Memory-mapped database. Uncompressed chunks are read in place"""
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, k, group_count, self.row_count,
+            self.chunk_rows, self.compression, field_count, index_offset) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"invalid cook database: {path}")
+        offset = HEADER.size
+        fields = []
+        for _ in range(field_count):
+            name, dtype = FIELD.unpack_from(self.data, offset)
+            fields.append((name.rstrip(b"\0").decode("utf-8"), dtype.rstrip(b"\0").decode("ascii")))
+            offset += FIELD.size
+        self.record = np.dtype(fields)
+        groups = []
+        for _ in range(group_count):
+            actor_count, = struct.unpack_from("<I", self.data, offset)
+            offset += 4
+            group = []
+            for _ in range(actor_count):
+                length, = struct.unpack_from("<I", self.data, offset)
+                group.append(self.data[offset + 4:offset + 4 + length].decode("utf-8"))
+                offset += 4 + length
+            groups.append(group)
+        self.grouping = g.Grouping(groups, k)
+        chunk_count = (self.row_count + self.chunk_rows - 1) // self.chunk_rows
+        self.chunks = np.frombuffer(self.data, dtype="<u8", count=2 * chunk_count, offset=index_offset).reshape(-1, 2)
+        self.cache: OrderedDict[int, np.ndarray] = OrderedDict()
+
+    def chunk(self, i: int) -> np.ndarray:
+        """Records of the i-th chunk"""
+        offset, size = int(self.chunks[i][0]), int(self.chunks[i][1])
+        if self.compression == 0:
+            return np.frombuffer(self.data, dtype=self.record, count=size // self.record.itemsize, offset=offset)
+        if i in self.cache:
+            self.cache.move_to_end(i)
+            return self.cache[i]
+        records = np.frombuffer(_decompress(self.data[offset:offset + size], self.compression), dtype=self.record)
+        self.cache[i] = records
+        if len(self.cache) > CACHED_CHUNKS:
+            self.cache.popitem(last=False)
+        return records
+
+    def get(self, row: int) -> cook.Result:
+        chunk, row = divmod(row, self.chunk_rows)
+        return cook.Result(*(int(x) for x in self.chunk(chunk)[row])) # type: ignore
+
+    def get_batch(self, rows: np.ndarray) -> np.ndarray:
+        """Records of the rows, as a structured array"""
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.empty(len(rows), dtype=self.record)
+        chunks, rows = np.divmod(rows, self.chunk_rows)
+        for chunk in np.unique(chunks):
+            selected = chunks == chunk
+            out[selected] = self.chunk(int(chunk))[rows[selected]]
+        return out
+
+    def row(self, actors: list[str]) -> tuple[int, str | None]:
+        """Row of the ingredients (up to K)"""
+        return self.grouping.row(actors)
+
+    def expand(self, row: int) -> list[tuple[str, ...]]:
+        """The actor combinations of a row"""
+        return list(self.grouping.expand(row))
+
+    def lookup(self, actors: list[str]) -> tuple[cook.Result, str | None]:
+        row, err = self.row(actors)
+        if err: return None, err # type: ignore
+        return self.get(row), None
+
+def open_db(path: str) -> tuple[Reader, str | None]:
+    try:
+        return Reader(path), None
+    except Exception as e:
+        return None, str(e) # type: ignore
+
+def build(shard_dir: str, path: str, chunk_rows: int, compression: str) -> str | None:
+    """Build the database from the shards of enumerate_cooks.py"""
+    import enumerate_cooks
+    manifest, err = u.fyaml(os.path.join(shard_dir, "manifest.yaml"))
+    if err: return err
+    writer = Writer(path, manifest["groups"], manifest["row_count"], chunk_rows, compression)
+    progress = spp.printer(manifest["shard_count"], "Build cook database")
+    for shard in range(manifest["shard_count"]):
+        progress.update(shard)
+        shard_path = enumerate_cooks.shard_path(shard_dir, shard)
+        if not os.path.exists(shard_path):
+            progress.done()
+            writer.close()
+            return f"missing {u.relpath(shard_path)}, finish enumerate_cooks.py first"
+        with np.load(shard_path) as data:
+            records = np.empty(len(data["recipe"]), dtype=RECORD)
+            for name in RECORD.names: # type: ignore
+                records[name] = data[name]
+        writer.append(records)
+    progress.done()
+    err = writer.close()
+    if err: return err
+    print(f"Saved {manifest['row_count']} rows to {u.relpath(path)} ({os.path.getsize(path)} bytes)")
+    return None
+
+def main(argv: list[str]) -> str | None:
+    parser = argparse.ArgumentParser(prog="cookdb.py", description="Database of cook results by combination row (see groups.py)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="build from the shards of enumerate_cooks.py")
+    build_parser.add_argument("--shards", default=u.output("cooks"), help="shard directory (default: output/cooks)")
+    build_parser.add_argument("-o", "--out", default=u.output("cooks.db"), help="database path (default: output/cooks.db)")
+    build_parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    build_parser.add_argument("--compression", choices=list(COMPRESSIONS), default="zlib")
+    get_parser = sub.add_parser("get", help="look up the result of the ingredients")
+    get_parser.add_argument("-d", "--db", default=u.output("cooks.db"), help="database path (default: output/cooks.db)")
+    get_parser.add_argument("actors", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        return build(args.shards, args.out, args.chunk_rows, args.compression)
+    db, err = open_db(args.db)
+    if err: return err
+    result, err = db.lookup(args.actors)
+    if err: return err
+    print(result)
+    return None
+
+if __name__ == "__main__":
+    u.fatal(main(sys.argv[1:]))
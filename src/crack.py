@@ -0,0 +1,264 @@
+"""
+Find names for unknown CRC32 hashes (like "unknown hash" in decode_recipes)
+by searching candidate names
+
+Usage: python src/crack.py HASH... [options], see --help
+
+Candidates come from:
+  - wordlists (-w): each line is a candidate
+  - templates (-t): # is a digit, ? is an upper case letter,
+    * is a word from the wordlists. For example Item_Cook_?? or Armor_###_Upper
+  - prefixes + suffixes (-p, -s): each prefix followed by each suffix
+
+A candidate space is the concatenation of one choice from each part, so
+the CRC32 of a prefix is computed once for everything after it. The last
+parts are combined into a table, and checked for all of them at once with
+numpy, using that CRC32 is affine:
+
+    crc32(B, s) = crc32(0^L, s) ^ crc32(B, 0) ^ crc32(0^L, 0)
+
+for any B of length L, where s is the CRC32 of the prefix
+"""
+
+import sys
+import time
+import zlib
+import argparse
+import itertools
+import numpy as np
+import util as u
+import spp
+
+DIGITS = [str(i).encode() for i in range(10)]
+UPPER = [chr(c).encode() for c in range(ord("A"), ord("Z") + 1)]
+
+# combine the last parts until there are at least this many choices in the table
+MIN_TABLE_SIZE = 256
+MAX_TABLE_SIZE = 1 << 16
+# split the search into at least this many jobs
+MIN_JOBS = 64
+
+class Space:
+    """All concatenations of one choice from each part"""
+    name: str
+    parts: list[list[bytes]]
+
+    def __init__(self, name: str, parts: list[list[bytes]]):
+        self.name = name
+        self.parts = _combine_tail(_merge_literals(parts))
+
+    def size(self) -> int:
+        size = 1
+        for part in self.parts:
+            size *= len(part)
+        return size
+
+def wordlist_space(words: list[bytes]) -> Space:
+    return Space("wordlist", [words])
+
+def prefix_suffix_space(prefixes: list[bytes], suffixes: list[bytes]) -> Space:
+    return Space("prefix+suffix", [prefixes, suffixes])
+
+def template_space(template: str, words: list[bytes]) -> tuple[Space, str | None]:
+    parts = []
+    for c in template:
+        if c == "#":
+            parts.append(DIGITS)
+        elif c == "?":
+            parts.append(UPPER)
+        elif c == "*":
+            if not words:
+                return None, f"template {template} needs a wordlist (-w)" # type: ignore
+            parts.append(words)
+        else:
+            parts.append([c.encode("utf-8")])
+    return Space(template, parts), None
+
+def _merge_literals(parts: list[list[bytes]]) -> list[list[bytes]]:
+    out = []
+    for part in parts:
+        if len(part) == 1 and out and len(out[-1]) == 1:
+            out[-1] = [out[-1][0] + part[0]]
+        else:
+            out.append(part)
+    return out
+
+def _combine_tail(parts: list[list[bytes]]) -> list[list[bytes]]:
+    """Combine the last parts into one, so the table checked at once is big enough"""
+    parts = list(parts)
+    while len(parts) > 1 and len(parts[-1]) < MIN_TABLE_SIZE and len(parts[-1]) * len(parts[-2]) <= MAX_TABLE_SIZE:
+        last = parts.pop()
+        parts[-1] = [a + b for a in parts[-1] for b in last]
+    return parts
+
+# Search states in the worker processes
+_spaces: list[Space] = []
+_targets: np.ndarray = np.zeros(0, np.uint32)
+# per space: (length, zero bytes of length, crc32(B, 0) ^ crc32(0^L, 0) for B of the length, indices of B in the last part)
+_tables: list[list[tuple[int, bytes, np.ndarray, np.ndarray]]] = []
+
+def _init_worker(spaces: list[Space], targets: list[int]):
+    global _spaces, _targets, _tables
+    _spaces = spaces
+    _targets = np.array(sorted(targets), dtype=np.uint32)
+    _tables = []
+    for space in spaces:
+        by_length = {}
+        for i, choice in enumerate(space.parts[-1]):
+            by_length.setdefault(len(choice), []).append(i)
+        tables = []
+        for length, indices in sorted(by_length.items()):
+            zeros = b"\0" * length
+            zero_crc = zlib.crc32(zeros)
+            values = np.array([zlib.crc32(space.parts[-1][i]) ^ zero_crc for i in indices], dtype=np.uint32)
+            tables.append((length, zeros, values, np.array(indices)))
+        _tables.append(tables)
+
+def _search(job: tuple[int, tuple[int, ...]]) -> tuple[list[tuple[int, str]], int]:
+    """Search the candidates starting with the choices in job, return (matches, candidates searched)"""
+    space_i, prefix = job
+    parts = _spaces[space_i].parts
+    tables = _tables[space_i]
+    state = 0
+    for part_i, choice_i in enumerate(prefix):
+        state = zlib.crc32(parts[part_i][choice_i], state)
+    matches = []
+    path = list(prefix)
+
+    def search_last(state: int):
+        for _, zeros, values, indices in tables:
+            hashes = values ^ np.uint32(zlib.crc32(zeros, state))
+            found = np.searchsorted(_targets, hashes)
+            found[found == len(_targets)] = 0
+            for i in np.nonzero(_targets[found] == hashes)[0]:
+                choices = [parts[p][c] for p, c in enumerate(path)]
+                choices.append(parts[-1][indices[i]])
+                matches.append((int(hashes[i]), b"".join(choices).decode("utf-8")))
+
+    def search(part_i: int, state: int):
+        if part_i == len(parts) - 1:
+            search_last(state)
+            return
+        for choice_i, choice in enumerate(parts[part_i]):
+            path.append(choice_i)
+            search(part_i + 1, zlib.crc32(choice, state))
+            path.pop()
+
+    search(len(prefix), state)
+    count = 1
+    for part in parts[len(prefix):]:
+        count *= len(part)
+    return matches, count
+
+def _jobs(space_i: int, space: Space) -> list[tuple[int, tuple[int, ...]]]:
+    """Split a space by the choices of the first parts"""
+    depth = 0
+    count = 1
+    while depth < len(space.parts) - 1 and count < MIN_JOBS:
+        count *= len(space.parts[depth])
+        depth += 1
+    ranges = [range(len(part)) for part in space.parts[:depth]]
+    return [(space_i, prefix) for prefix in itertools.product(*ranges)]
+
+def crack(targets: set[int], spaces: list[Space]) -> dict[int, list[str]]:
+    """Search the spaces for names with the target hashes. Return hash -> names"""
+    jobs = []
+    for i, space in enumerate(spaces):
+        jobs.extend(_jobs(i, space))
+    total = sum(space.size() for space in spaces)
+    print(f"Searching {total} candidates for {len(targets)} hashes")
+
+    found: dict[int, list[str]] = {}
+    searched = 0
+    start = time.monotonic()
+    progress = spp.printer(len(jobs), "Search")
+    with u.pool(_init_worker, (spaces, list(targets))) as pool:
+        for i, (matches, count) in enumerate(pool.imap_unordered(_search, jobs, chunksize=4)):
+            searched += count
+            for hash, name in matches:
+                if name not in found.setdefault(hash, []):
+                    found[hash].append(name)
+            progress.update(i)
+    progress.done()
+    elapsed = max(time.monotonic() - start, 1e-9)
+    print(f"Searched {searched} candidates in {elapsed:.2f}s ({searched / elapsed:,.0f} hashes/s)")
+    return found
+
+def load_words(paths: list[str]) -> tuple[list[bytes], str | None]:
+    words = []
+    seen = set()
+    for path in paths:
+        try:
+            with u.fopenr(path) as f:
+                for line in f:
+                    word = line.strip()
+                    if word and word not in seen:
+                        seen.add(word)
+                        words.append(word.encode("utf-8"))
+        except OSError as e:
+            return [], str(e)
+    return words, None
+
+def parse_hash(s: str) -> tuple[int, str | None]:
+    try:
+        return int(s, 16) & 0xFFFFFFFF, None
+    except ValueError:
+        return 0, f"invalid hash: {s}"
+
+def main(argv: list[str]) -> str | None:
+    parser = argparse.ArgumentParser(prog="crack.py", description="Find names for unknown CRC32 hashes")
+    parser.add_argument("hashes", nargs="*", help="hashes in hex (like 0x1234abcd)")
+    parser.add_argument("--hash-file", action="append", default=[], help="file with one hash per line")
+    parser.add_argument("-w", "--wordlist", action="append", default=[], help="file with one word per line")
+    parser.add_argument("-t", "--template", action="append", default=[], help="# = digit, ? = A-Z, * = word")
+    parser.add_argument("-p", "--prefixes", action="append", default=[], help="file with one prefix per line")
+    parser.add_argument("-s", "--suffixes", action="append", default=[], help="file with one suffix per line")
+    args = parser.parse_args(argv)
+
+    targets = set()
+    hash_strs = list(args.hashes)
+    for path in args.hash_file:
+        try:
+            with u.fopenr(path) as f:
+                hash_strs.extend(line.strip() for line in f if line.strip())
+        except OSError as e:
+            return str(e)
+    for s in hash_strs:
+        hash, err = parse_hash(s)
+        if err: return err
+        targets.add(hash)
+    if not targets:
+        return "no hashes to search for"
+
+    words, err = load_words(args.wordlist)
+    if err: return err
+    spaces = []
+    if words:
+        spaces.append(wordlist_space(words))
+    for template in args.template:
+        space, err = template_space(template, words)
+        if err: return err
+        spaces.append(space)
+    if args.prefixes or args.suffixes:
+        prefixes, err = load_words(args.prefixes)
+        if err: return err
+        suffixes, err = load_words(args.suffixes)
+        if err: return err
+        err = u.ensure(prefixes and suffixes, "both prefixes (-p) and suffixes (-s) are needed")
+        if err: return err
+        spaces.append(prefix_suffix_space(prefixes, suffixes))
+    if not spaces:
+        return "no candidates, use -w, -t or -p/-s"
+
+    found = crack(targets, spaces)
+    for hash in sorted(targets):
+        names = found.get(hash)
+        if names:
+            print(f"\"{u.hex08(hash)}\": {', '.join(names)}")
+        else:
+            print(f"\"{u.hex08(hash)}\": # not found")
+    print(f"Found {len(found)}/{len(targets)} hashes")
+    return None
+
+if __name__ == "__main__":
+    u.fatal(main(sys.argv[1:]))
@@ -0,0 +1,94 @@
+"""
+Packed lists of names for each row (compressed sparse rows), like recipe -> actors
+in recipe-actor-reverse.bin
+
+Row i is names[ids[offsets[i]:offsets[i + 1]]], so a lookup only reads
+the result. The file can be memory-mapped, or loaded with one read.
+All numbers are little-endian u32:
+
+    header: "CSR\\0", version, row count, id count, name count, size of strings
+    offsets: row count + 1
+    ids: id count, sorted in each row
+    name offsets: name count + 1, into strings
+    strings: UTF-8 names, not terminated
+"""
+
+import mmap
+import struct
+import numpy as np
+import util as u
+
+MAGIC = b"CSR\0"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIII")
+
+def build(row_count: int, row_of: np.ndarray, ids: np.ndarray, names: list[str]) -> bytes:
+    """Build the table from (row, id) pairs, in any order"""
+    row_of = np.asarray(row_of, dtype=np.int64)
+    ids = np.asarray(ids, dtype=np.uint32)
+    order = np.lexsort((ids, row_of))
+    ids = ids[order]
+    offsets = np.zeros(row_count + 1, dtype=np.uint32)
+    np.cumsum(np.bincount(row_of, minlength=row_count), out=offsets[1:])
+
+    encoded = [name.encode("utf-8") for name in names]
+    name_offsets = np.zeros(len(names) + 1, dtype=np.uint32)
+    np.cumsum([len(e) for e in encoded], out=name_offsets[1:])
+    strings = b"".join(encoded)
+
+    out = bytearray(HEADER.pack(MAGIC, VERSION, row_count, len(ids), len(names), len(strings)))
+    out += offsets.astype("<u4").tobytes()
+    out += ids.astype("<u4").tobytes()
+    out += name_offsets.astype("<u4").tobytes()
+    out += strings
+    return bytes(out)
+
+def save(path: str, row_count: int, row_of: np.ndarray, ids: np.ndarray, names: list[str]) -> str | None:
+    try:
+        with open(path, "wb") as f:
+            f.write(build(row_count, row_of, ids, names))
+    except OSError as e:
+        return f"failed to save {u.relpath(path)}: {e}"
+    return None
+
+class Table:
+    """Table saved by save(), over bytes or a memory map"""
+    def __init__(self, data):
+        self.data = data
+        magic, version, row_count, id_count, name_count, strings_size = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("invalid CSR table")
+        offset = HEADER.size
+        self.offsets = np.frombuffer(data, dtype="<u4", count=row_count + 1, offset=offset)
+        offset += 4 * (row_count + 1)
+        self.ids = np.frombuffer(data, dtype="<u4", count=id_count, offset=offset)
+        offset += 4 * id_count
+        self.name_offsets = np.frombuffer(data, dtype="<u4", count=name_count + 1, offset=offset)
+        offset += 4 * (name_count + 1)
+        self.strings_offset = offset
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def row(self, i: int) -> np.ndarray:
+        """Ids in row i"""
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def name(self, id: int) -> str:
+        start = self.strings_offset + int(self.name_offsets[id])
+        end = self.strings_offset + int(self.name_offsets[id + 1])
+        return bytes(self.data[start:end]).decode("utf-8")
+
+    def names(self, i: int) -> list[str]:
+        """Names in row i"""
+        return [self.name(int(id)) for id in self.row(i)]
+
+def fload(path: str, use_mmap: bool = False) -> tuple[Table, str | None]:
+    """Load a table with one read, or memory-map it"""
+    try:
+        with open(path, "rb") as f:
+            if use_mmap:
+                return Table(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)), None
+            return Table(f.read()), None
+    except Exception as e:
+        return None, str(e) # type: ignore
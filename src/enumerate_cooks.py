@@ -0,0 +1,169 @@
+"""
+Cook every combination of up to 5 cookable actors (the actors in recipe-groups.yaml)
+
+The combinations are of groups (see groups.py), cooked with one representative
+of each group, which is the same result for every actor in the group (plus a row
+for the combinations of different actors of one group). Use --all-actors to cook
+every actor
+
+Usage: python src/enumerate_cooks.py [options], see --help
+
+The rows (see groups.py: the ranks of the combinations, see combos.py, then the
+mixed rows) are split into shards of consecutive rows. Shards are cooked with
+cook.Simulator in a process pool, and each is saved as OUT/shard-XXXXXX.npz with
+a column for each field of cook.Result (the row in the shard is row - start of
+the shard). Row 0 (no ingredients) is included, so shard i starts at row i * shard size.
+
+A shard is saved to a temporary file first and renamed when done, so shard files
+that exist are complete. Running again with the same OUT skips them, which
+resumes after a crash or Ctrl-C. OUT/manifest.yaml has the groups and the shard size,
+and resuming fails if they changed (use --clean to start over)
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import yaml
+import numpy as np
+import util as u
+import spp
+import cook
+import recipe as r
+import groups as g
+
+DEFAULT_SHARD_SIZE = 1 << 20
+
+def shard_path(out_dir: str, shard: int) -> str:
+    return os.path.join(out_dir, f"shard-{shard:06d}.npz")
+
+# Worker states
+_sim: cook.Simulator = None # type: ignore
+_grouping: g.Grouping = None # type: ignore
+# index in grouping.actors() -> actor id in the simulator, the last one is EMPTY
+_actor_ids: np.ndarray = np.zeros(0, dtype=np.int64)
+
+def _init_worker(sim: cook.Simulator, grouping: g.Grouping, actor_ids: np.ndarray):
+    global _sim, _grouping, _actor_ids
+    # Ctrl-C is handled by the main process, which stops the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _sim = sim
+    _grouping = grouping
+    _actor_ids = actor_ids
+
+def _cook_shard(job: tuple[str, int, int, int]) -> tuple[int, int, str | None]:
+    """Cook and save one shard, return (shard, number of rows, error)"""
+    out_dir, shard, start, end = job
+    rows = np.arange(start, end, dtype=np.int64)
+    ids = _actor_ids[_grouping.unrank(rows)]
+    result, err = _sim.cook_batch(ids)
+    if err: return shard, 0, err
+    columns = { c: result[c].astype(dtype) for c, dtype in cook.RESULT_DTYPES.items() }
+    path = shard_path(out_dir, shard)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(f, start=np.int64(start), **columns)
+    os.replace(temp_path, path)
+    return shard, end - start, None
+
+def check_manifest(out_dir: str, manifest: dict) -> str | None:
+    """Save the manifest, or check that it is the same as the saved one"""
+    path = os.path.join(out_dir, "manifest.yaml")
+    if os.path.exists(path):
+        saved, err = u.fyaml(path)
+        if err: return err
+        if saved != manifest:
+            return f"{u.relpath(out_dir)} has shards of a different enumeration, use --clean to start over"
+        return None
+    with u.fopenw(path) as f:
+        yaml.dump(manifest, f, sort_keys=False)
+    return None
+
+def enumerate_cooks(sim: cook.Simulator, grouping: g.Grouping, out_dir: str, shard_size: int) -> str | None:
+    actor_ids = []
+    for actor in grouping.actors():
+        actor_id, err = sim.matcher.actor_id(actor)
+        if err: return err
+        actor_ids.append(actor_id)
+    actor_ids.append(r.EMPTY)
+    total = grouping.row_count()
+    shard_count = (total + shard_size - 1) // shard_size
+    os.makedirs(out_dir, exist_ok=True)
+    err = check_manifest(out_dir, {
+        "shard_size": shard_size,
+        "row_count": total,
+        "shard_count": shard_count,
+        "groups": grouping.groups,
+    })
+    if err: return err
+
+    jobs = []
+    for shard in range(shard_count):
+        if os.path.exists(shard_path(out_dir, shard)):
+            continue
+        start = shard * shard_size
+        jobs.append((out_dir, shard, start, min(start + shard_size, total)))
+    done = shard_count - len(jobs)
+    print(f"{total} rows for {len(grouping.groups)} groups ({grouping.actor_count()} actors, {grouping.reduction_factor():.1f}x fewer rows)")
+    print(f"{shard_count} shards, {done} already done")
+    if not jobs:
+        return None
+
+    cooked = 0
+    start_time = time.monotonic()
+    progress = spp.printer(len(jobs), "Cook shards")
+    pool = u.pool(_init_worker, (sim, grouping, np.array(actor_ids, dtype=np.int64)))
+    try:
+        for i, (shard, count, err) in enumerate(pool.imap_unordered(_cook_shard, jobs)):
+            if err:
+                pool.terminate()
+                progress.done()
+                return f"shard {shard}: {err}"
+            cooked += count
+            progress.print(i, f"shard {shard}")
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        progress.done()
+        return f"interrupted, run again to resume ({cooked} rows cooked)"
+    finally:
+        pool.join()
+    progress.done()
+    elapsed = max(time.monotonic() - start_time, 1e-9)
+    print(f"Cooked {cooked} rows in {elapsed:.2f}s ({cooked / elapsed:,.0f}/s)")
+    return None
+
+def load_result(out_dir: str, row: int) -> tuple[cook.Result, str | None]:
+    """Read the result of one row from the shards"""
+    manifest, err = u.fyaml(os.path.join(out_dir, "manifest.yaml"))
+    if err: return None, err # type: ignore
+    shard, row = divmod(row, manifest["shard_size"])
+    try:
+        with np.load(shard_path(out_dir, shard)) as data:
+            return cook.Result(*(int(data[c][row]) for c in cook.RESULT_DTYPES)), None
+    except Exception as e:
+        return None, str(e) # type: ignore
+
+def main(argv: list[str]) -> str | None:
+    parser = argparse.ArgumentParser(prog="enumerate_cooks.py", description="Cook every combination of up to 5 cookable actors")
+    parser.add_argument("-o", "--out", default=u.output("cooks"), help="directory for the shards (default: output/cooks)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="rows per shard")
+    parser.add_argument("--clean", action="store_true", help="delete the shards and start over")
+    parser.add_argument("--all-actors", action="store_true", help="cook every actor instead of one per group")
+    args = parser.parse_args(argv)
+    err = u.ensure(args.shard_size > 0, "shard size must be positive")
+    if err: return err
+
+    if args.clean:
+        u.clean_dir(args.out)
+    sim, err = cook.load()
+    if err: return err
+    grouping, err = g.load(u.output())
+    if err: return err
+    if args.all_actors:
+        grouping = g.Grouping([[actor] for actor in sorted(grouping.actor_group)])
+    return enumerate_cooks(sim, grouping, args.out, args.shard_size)
+
+if __name__ == "__main__":
+    u.fatal(main(sys.argv[1:]))
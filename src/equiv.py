@@ -0,0 +1,65 @@
+"""
+Equivalence classes of actors (or any names), from edges between them
+
+Edges can come from different sources (like actors with the same localized name,
+or an actor and its itemUseIconActorName), and the classes are the connected
+components of all of them. This is a union-find with path compression
+and union by size, so adding the edges is close to linear
+"""
+
+from typing import Iterable
+
+class UnionFind:
+    parent: dict[str, str]
+    size: dict[str, int]
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def add(self, x: str):
+        if x not in self.parent:
+            self.parent[x] = x
+            self.size[x] = 1
+
+    def find(self, x: str) -> str:
+        """Root of the class of x (x is added if it's new)"""
+        self.add(x)
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # path compression
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, a: str, b: str):
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+    def add_edges(self, edges: Iterable[tuple[str, str]]):
+        for a, b in edges:
+            self.union(a, b)
+
+    def same(self, a: str, b: str) -> bool:
+        return self.find(a) == self.find(b)
+
+    def components(self) -> dict[str, list[str]]:
+        """
+        Classes as representative -> sorted members, sorted by representative.
+        The representative is the smallest member, so it doesn't depend on the
+        order of the edges
+        """
+        members: dict[str, list[str]] = {}
+        for x in self.parent:
+            members.setdefault(self.find(x), []).append(x)
+        out = {}
+        for group in sorted(sorted(group) for group in members.values()):
+            out[group[0]] = group
+        return out
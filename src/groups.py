@@ -0,0 +1,171 @@
+"""
+Actor groups from recipe-groups.yaml, to cook one representative per group
+
+Actors in the same group have the same cooking parameters and important tags
+(see build_recipe_groups.py), so they cook the same, with one exception:
+single recipes are only matched when all the ingredients are the same actor
+(see recipe.Matcher.match), and actors of a group can match one by tag.
+So m > 1 actors of one group (and nothing else) can cook differently when
+they are all the same actor and when they are not.
+
+The rows of an enumeration are:
+  - the combinations of groups, by rank (see combos.py). The row is cooked with
+    the representatives (the first actor of each group), and stands for
+    C(n1 + m1 - 1, m1) * C(n2 + m2 - 1, m2) * ... combinations of actors, where
+    n is the size of a group and m its multiplicity. Except that a row of only one
+    group with m > 1 stands for the n combinations of the same actor m times
+  - then the mixed rows: for each group with more than one actor and each m from
+    2 to K, m actors of the group that are not all the same. The row is cooked
+    with the representative and the second actor of the group, and stands for
+    C(n + m - 1, m) - n combinations of actors
+"""
+
+import os
+import math
+import itertools
+from typing import Iterator
+import numpy as np
+import util as u
+import combos
+
+class Grouping:
+    groups: list[list[str]]
+    # actor -> index of its group
+    actor_group: dict[str, int]
+    space: combos.Space
+    # groups with more than one actor, which have mixed rows
+    mixed_groups: list[int]
+
+    def __init__(self, groups: list[list[str]], k: int = combos.K):
+        self.groups = [sorted(group) for group in groups]
+        self.actor_group = { actor: i for i, group in enumerate(self.groups) for actor in group }
+        self.space = combos.Space(len(self.groups), k)
+        self.mixed_groups = [i for i, group in enumerate(self.groups) if len(group) > 1]
+
+    def representatives(self) -> list[str]:
+        return [group[0] for group in self.groups]
+
+    def actors(self) -> list[str]:
+        """
+        Actors the rows are cooked with (see unrank): the representatives,
+        then the second actor of each group with mixed rows
+        """
+        return self.representatives() + [self.groups[i][1] for i in self.mixed_groups]
+
+    def actor_count(self) -> int:
+        return len(self.actor_group)
+
+    def row_count(self) -> int:
+        return self.space.size() + len(self.mixed_groups) * (self.space.k - 1)
+
+    def _mixed(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Index in mixed_groups, group and multiplicity of mixed rows"""
+        i, m = np.divmod(rows - self.space.size(), self.space.k - 1)
+        return i, np.array(self.mixed_groups, dtype=np.int64)[i], m + 2
+
+    def _mixed_row(self, group: int, m: int) -> int:
+        return self.space.size() + self.mixed_groups.index(group) * (self.space.k - 1) + m - 2
+
+    def unrank(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Return the actors to cook for the rows as a (len(rows), k) array of
+        indices into actors(), with -1 for empty slots
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.empty((len(rows), self.space.k), dtype=np.int64)
+        ranked = rows < self.space.size()
+        out[ranked] = self.space.unrank(rows[ranked])
+        if not ranked.all():
+            i, group, m = self._mixed(rows[~ranked])
+            mixed = np.where(np.arange(self.space.k) < m[:, None], group[:, None], -1)
+            mixed[:, 0] = len(self.groups) + i
+            out[~ranked] = mixed
+        return out
+
+    def row(self, actors: list[str]) -> tuple[int, str | None]:
+        """Row of up to k ingredients"""
+        if len(actors) > self.space.k:
+            return 0, f"more than {self.space.k} ingredients"
+        indices = []
+        for actor in actors:
+            if actor not in self.actor_group:
+                return 0, f"not a cookable actor: {actor}"
+            indices.append(self.actor_group[actor])
+        if len(set(indices)) == 1 and len(set(actors)) > 1:
+            return self._mixed_row(indices[0], len(actors)), None
+        indices += [-1] * (self.space.k - len(actors))
+        return int(self.space.rank(np.array([indices]))[0]), None
+
+    def count(self, rows: np.ndarray) -> np.ndarray:
+        """Number of actor combinations each row stands for"""
+        rows = np.asarray(rows, dtype=np.int64)
+        sizes = np.array([len(g) for g in self.groups] + [1], dtype=np.int64)
+        out = np.empty(len(rows), dtype=np.int64)
+
+        ranked = rows < self.space.size()
+        # sorted, with the empty slots first
+        group_indices = self.space.unrank(rows[ranked])
+        counts = np.ones(len(group_indices), dtype=np.int64)
+        # multiplicity of the group in each slot, counting from the first slot with the group
+        multiplicity = np.ones(len(group_indices), dtype=np.int64)
+        for j in range(group_indices.shape[1]):
+            column = group_indices[:, j]
+            if j > 0:
+                same = column == group_indices[:, j - 1]
+                multiplicity = np.where(same, multiplicity + 1, 1)
+            # C(n + m - 1, m) = C(n + m - 2, m - 1) * (n + m - 1) / m
+            n = sizes[column]
+            factor = np.where(column < 0, 1, n + multiplicity - 1)
+            counts = counts * factor // np.where(column < 0, 1, multiplicity)
+        # one group m > 1 times: the same actor m times, the others are in the mixed row
+        last = group_indices[:, -1]
+        one_group = np.all((group_indices == last[:, None]) | (group_indices < 0), axis=1)
+        one_group &= (group_indices >= 0).sum(axis=1) > 1
+        counts[one_group] = sizes[last[one_group]]
+        out[ranked] = counts
+
+        if not ranked.all():
+            _, group, m = self._mixed(rows[~ranked])
+            n = sizes[group]
+            mixed = np.ones(len(group), dtype=np.int64)
+            for j in range(1, self.space.k + 1):
+                mixed = np.where(j <= m, mixed * (n + j - 1) // j, mixed)
+            out[~ranked] = mixed - n
+        return out
+
+    def expand(self, row: int) -> Iterator[tuple[str, ...]]:
+        """All actor combinations a row stands for"""
+        if row >= self.space.size():
+            _, group, m = self._mixed(np.array([row]))
+            for actors in itertools.combinations_with_replacement(self.groups[int(group[0])], int(m[0])):
+                if len(set(actors)) > 1:
+                    yield actors
+            return
+        multiplicities = _multiplicities([int(x) for x in self.space.unrank([row])[0]])
+        if len(multiplicities) == 1:
+            (group, m), = multiplicities.items()
+            if m > 1:
+                for actor in self.groups[group]:
+                    yield (actor,) * m
+                return
+        per_group = []
+        for group, m in sorted(multiplicities.items()):
+            per_group.append(list(itertools.combinations_with_replacement(self.groups[group], m)))
+        for choice in itertools.product(*per_group):
+            yield tuple(actor for actors in choice for actor in actors)
+
+    def reduction_factor(self) -> float:
+        """How many times fewer rows there are with groups than with all actors"""
+        return math.comb(self.actor_count() + self.space.k, self.space.k) / self.row_count()
+
+def _multiplicities(group_indices: list[int]) -> dict[int, int]:
+    out = {}
+    for g in group_indices:
+        if g >= 0:
+            out[g] = out.get(g, 0) + 1
+    return out
+
+def load(output_dir: str) -> tuple[Grouping, str | None]:
+    groups, err = u.fyaml(os.path.join(output_dir, "recipe-groups.yaml"))
+    if err: return None, err # type: ignore
+    return Grouping(groups), None
@@ -0,0 +1,200 @@
+"""
+Registry of CRC32 hashes of names (actors, tags, flags, ...)
+
+Names are added with a namespace and the source they came from.
+Collisions are found by sorting all entries by hash, so entries
+with the same hash are next to each other.
+
+The registry can be saved as a binary reverse-lookup table, which is
+memory-mapped by Table. All numbers are little-endian u32:
+
+    header: "HASH", version, entry count, namespace count
+    namespaces: offset of the name in strings
+    entries (sorted by hash, then name): hash, namespace index, offset of the name in strings
+    strings: null-terminated UTF-8
+"""
+
+import mmap
+import struct
+from dataclasses import dataclass
+import util as u
+
+MAGIC = b"HASH"
+VERSION = 1
+HEADER = struct.Struct("<4sIII")
+ENTRY = struct.Struct("<III")
+
+@dataclass(slots=True)
+class Entry:
+    hash: int
+    namespace: str
+    name: str
+    source: str
+
+    def __str__(self):
+        return f"{self.namespace} {self.name} ({self.source})"
+
+@dataclass(slots=True)
+class Collision:
+    hash: int
+    a: Entry
+    b: Entry
+
+    def is_cross_namespace(self) -> bool:
+        return self.a.namespace != self.b.namespace
+
+    def __str__(self):
+        return f"hash collision {u.hex08(self.hash)}: {self.a} and {self.b}"
+
+class Registry:
+    entries: list[Entry]
+    # (namespace, name) that are added, to skip duplicates
+    added: set[tuple[str, str]]
+
+    def __init__(self):
+        self.entries = []
+        self.added = set()
+        self.sorted = True
+
+    def add(self, namespace: str, name: str, source: str, hash: int | None = None):
+        """
+        Add a name. The hash is the CRC32 of the name if not given
+        (signed hashes are stored as unsigned)
+        """
+        if (namespace, name) in self.added:
+            return
+        self.added.add((namespace, name))
+        if hash is None:
+            hash = u.crc32(name)
+        self.entries.append(Entry(hash & 0xFFFFFFFF, namespace, name, source))
+        self.sorted = False
+
+    def add_all(self, namespace: str, names, source: str):
+        for name in names:
+            self.add(namespace, name, source)
+
+    def sort(self):
+        if not self.sorted:
+            self.entries.sort(key=lambda e: (e.hash, e.name, e.namespace))
+            self.sorted = True
+
+    def collisions(self) -> list[Collision]:
+        """Find names with the same hash, in the same or different namespaces"""
+        self.sort()
+        out = []
+        entries = self.entries
+        i = 0
+        while i < len(entries):
+            j = i + 1
+            while j < len(entries) and entries[j].hash == entries[i].hash:
+                j += 1
+            for a in range(i, j):
+                for b in range(a + 1, j):
+                    # same name in different namespaces is not a collision
+                    if entries[a].name != entries[b].name:
+                        out.append(Collision(entries[i].hash, entries[a], entries[b]))
+            i = j
+        return out
+
+    def check(self) -> str | None:
+        """Return an error for the first collision within a namespace"""
+        for collision in self.collisions():
+            if not collision.is_cross_namespace():
+                return str(collision)
+        return None
+
+    def find(self, hash: int, namespace: str | None = None) -> list[Entry]:
+        """Find entries with the hash (and namespace if given)"""
+        self.sort()
+        hash &= 0xFFFFFFFF
+        lo, hi = 0, len(self.entries)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.entries[mid].hash < hash:
+                lo = mid + 1
+            else:
+                hi = mid
+        out = []
+        while lo < len(self.entries) and self.entries[lo].hash == hash:
+            if namespace is None or self.entries[lo].namespace == namespace:
+                out.append(self.entries[lo])
+            lo += 1
+        return out
+
+    def save(self, path: str) -> str | None:
+        """Save the binary reverse-lookup table"""
+        self.sort()
+        namespaces = sorted(set(e.namespace for e in self.entries))
+        namespace_index = { n: i for i, n in enumerate(namespaces) }
+        strings = bytearray()
+        string_offsets = {}
+        def add_string(s: str) -> int:
+            if s not in string_offsets:
+                string_offsets[s] = len(strings)
+                strings.extend(s.encode("utf-8"))
+                strings.append(0)
+            return string_offsets[s]
+
+        out = bytearray(HEADER.pack(MAGIC, VERSION, len(self.entries), len(namespaces)))
+        for n in namespaces:
+            out += struct.pack("<I", add_string(n))
+        for e in self.entries:
+            out += ENTRY.pack(e.hash, namespace_index[e.namespace], add_string(e.name))
+        out += strings
+        try:
+            with open(path, "wb") as f:
+                f.write(out)
+        except OSError as e:
+            return f"failed to save {u.relpath(path)}: {e}"
+        return None
+
+class Table:
+    """Memory-mapped reverse-lookup table saved by Registry.save"""
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, namespace_count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"invalid hash table: {path}")
+        self.entries_offset = HEADER.size + 4 * namespace_count
+        self.strings_offset = self.entries_offset + ENTRY.size * self.count
+        self.namespaces = [
+            self.string(struct.unpack_from("<I", self.data, HEADER.size + 4 * i)[0])
+            for i in range(namespace_count)
+        ]
+
+    def __len__(self):
+        return self.count
+
+    def string(self, offset: int) -> str:
+        start = self.strings_offset + offset
+        end = self.data.find(b"\0", start)
+        return self.data[start:end].decode("utf-8")
+
+    def entry(self, i: int) -> tuple[int, int, int]:
+        return ENTRY.unpack_from(self.data, self.entries_offset + ENTRY.size * i)
+
+    def lookup(self, hash: int) -> list[tuple[str, str]]:
+        """Return (namespace, name) of the names with the hash"""
+        hash &= 0xFFFFFFFF
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.entry(mid)[0] < hash:
+                lo = mid + 1
+            else:
+                hi = mid
+        out = []
+        while lo < self.count:
+            h, namespace, name = self.entry(lo)
+            if h != hash:
+                break
+            out.append((self.namespaces[namespace], self.string(name)))
+            lo += 1
+        return out
+
+def open_table(path: str) -> tuple[Table | None, str | None]:
+    try:
+        return Table(path), None
+    except Exception as e:
+        return None, str(e)
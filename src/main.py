@@ -1,4 +1,5 @@
 import os
+import sys
 import util as u
 import task as t
 
@@ -9,7 +10,15 @@ if __name__ == "__main__":
 
     mgr = t.mgr()
     from tasks import link_actors
-    u.fatal(mgr.add(link_actors.task()))
+    link_options = link_actors.LinkOptions(
+        # save GParamLists once in output/GParamList instead of in every actor
+        shared_gparams="--shared-gparams" in sys.argv,
+        # save localization in output/Localization/<locale>.yaml instead of in every actor
+        split_l10n="--split-l10n" in sys.argv,
+        # stream the sources through partitions on disk instead of loading all of them
+        low_memory="--low-memory" in sys.argv,
+    )
+    u.fatal(mgr.add(link_actors.task(link_options)))
     from tasks import list_tags
     u.fatal(mgr.add(list_tags.task()))
     from tasks import link_effects
@@ -30,5 +39,7 @@ if __name__ == "__main__":
     u.fatal(mgr.add(build_armor_upgrade.task()))
     from tasks import list_gamedata
     u.fatal(mgr.add(list_gamedata.task()))
+    from tasks import build_hash_registry
+    u.fatal(mgr.add(build_hash_registry.task()))
 
     u.fatal(mgr.finish())
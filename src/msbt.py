@@ -0,0 +1,245 @@
+"""
+Reader for MSBT (message studio binary text) files, like ActorType/Item.msbt
+
+The result has the same shape as the msyt YAML conversion of the file
+(entries -> label -> contents), so it can be passed to msyt.parse_localization.
+Controls are read like msyt reads them, including how many bytes of the parameters
+it reads (the rest is read as text). The controls that parse_localization uses are
+converted like msyt does; the others keep their kind (and the group and type for
+raw ones, which parse_localization rejects) but not all their fields. Controls
+msyt doesn't know, or whose parameters go past the text, fail the file like in msyt
+"""
+
+import struct
+from typing import Any
+
+MAGIC = b"MsgStdBn"
+ENCODING_UTF16 = 1
+CONTROL_BEGIN = 0x0E
+
+# names msyt uses for control groups and types
+_NAMES = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
+# (group 2) effect placeholders and variables
+_ONE_FIELD_TYPES = {3, 4, 7, 8, 10, 13}
+_VARIABLE_TYPES = {1, 2, 9, 11, 12, 14, 15, 16, 17, 18, 19}
+_COLOURS = ["red", "light_green1", "blue", "grey", "light_green4", "orange", "light_grey"]
+_PAUSE_LENGTHS = ["short", "long", "longer"]
+_LOCALISATION_KINDS = { 5: "gender", 6: "plural" }
+
+def load(data) -> tuple[dict[str, Any], str | None]:
+    """Load MSBT from bytes (or a memoryview)"""
+    try:
+        return _Reader(data).read(), None
+    except Exception as e:
+        return {}, f"invalid MSBT: {e}"
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        if bytes(data[0:8]) != MAGIC:
+            raise ValueError(f"invalid magic: {bytes(data[0:8])}")
+        bom = bytes(data[8:10])
+        if bom == b"\xfe\xff":
+            self.endian = ">"
+            self.encoding = "utf-16-be"
+        elif bom == b"\xff\xfe":
+            self.endian = "<"
+            self.encoding = "utf-16-le"
+        else:
+            raise ValueError(f"invalid byte order mark: {bom}")
+        if data[0xc] != ENCODING_UTF16:
+            raise ValueError(f"unsupported encoding: {data[0xc]}")
+        self.section_count, = struct.unpack_from(f"{self.endian}H", data, 0xe)
+
+    def read(self) -> dict[str, Any]:
+        labels = {}
+        attributes = []
+        texts = []
+        offset = 0x20
+        for _ in range(self.section_count):
+            magic = bytes(self.data[offset:offset + 4])
+            size, = struct.unpack_from(f"{self.endian}I", self.data, offset + 4)
+            start = offset + 0x10
+            if magic == b"LBL1":
+                labels = self.read_labels(start)
+            elif magic == b"ATR1":
+                attributes = self.read_attributes(start, size)
+            elif magic == b"TXT2":
+                texts = self.read_texts(start, size)
+            offset = start + size
+            offset += (-offset) % 0x10
+
+        # sorted by label, like msyt
+        entries = {}
+        for label, index in sorted(labels.items()):
+            entry: dict[str, Any] = { "contents": texts[index] }
+            if index < len(attributes) and attributes[index]:
+                # msyt keeps these as well, parse_localization rejects them
+                entry["attributes"] = attributes[index]
+            entries[label] = entry
+        return { "entries": entries }
+
+    def read_labels(self, start: int) -> dict[str, int]:
+        group_count, = struct.unpack_from(f"{self.endian}I", self.data, start)
+        labels = {}
+        for i in range(group_count):
+            count, offset = struct.unpack_from(f"{self.endian}II", self.data, start + 4 + 8 * i)
+            offset += start
+            for _ in range(count):
+                length = self.data[offset]
+                label = bytes(self.data[offset + 1:offset + 1 + length]).decode("utf-8")
+                index, = struct.unpack_from(f"{self.endian}I", self.data, offset + 1 + length)
+                labels[label] = index
+                offset += 1 + length + 4
+        return labels
+
+    def read_attributes(self, start: int, size: int) -> list[bytes]:
+        count, attr_size = struct.unpack_from(f"{self.endian}II", self.data, start)
+        if attr_size == 0:
+            return []
+        out = []
+        for i in range(count):
+            attr_start = start + 8 + attr_size * i
+            attr = bytes(self.data[attr_start:attr_start + attr_size])
+            out.append(attr if any(attr) else b"")
+        return out
+
+    def read_texts(self, start: int, size: int) -> list[list[dict[str, Any]]]:
+        count, = struct.unpack_from(f"{self.endian}I", self.data, start)
+        offsets = struct.unpack_from(f"{self.endian}{count}I", self.data, start + 4)
+        out = []
+        for i in range(count):
+            begin = start + offsets[i]
+            end = start + offsets[i + 1] if i + 1 < count else start + size
+            out.append(self.read_contents(begin, end))
+        return out
+
+    def read_contents(self, offset: int, end: int) -> list[dict[str, Any]]:
+        contents = []
+        text_start = offset
+        def flush_text(text_end: int):
+            if text_end > text_start:
+                text = bytes(self.data[text_start:text_end]).decode(self.encoding)
+                contents.append({ "text": text })
+
+        while offset + 2 <= end:
+            c, = struct.unpack_from(f"{self.endian}H", self.data, offset)
+            if c != CONTROL_BEGIN:
+                offset += 2
+                continue
+            flush_text(offset)
+            group, typ, size = struct.unpack_from(f"{self.endian}HHH", self.data, offset + 2)
+            params_start = offset + 8
+            control, consumed = self.read_control(group, typ, size, params_start)
+            if params_start + consumed > end:
+                raise ValueError(f"parameters of control {group} type {typ} go past the end of the text")
+            contents.append({ "control": control })
+            offset = params_start + consumed
+            # parameters msyt doesn't read are read as text
+            text_start = offset
+        # like msyt, only the terminator is removed, not the null characters before it
+        if offset - 2 >= text_start and self.unpack("H", offset - 2) == (0,):
+            offset -= 2
+        flush_text(offset)
+        return contents
+
+    def read_control(self, group: int, typ: int, size: int, params: int) -> tuple[dict[str, Any], int]:
+        """Return the control in msyt form, and how many bytes of the parameters msyt reads"""
+        if group == 0:
+            if typ == 0:
+                # ruby (katakana above kanji). msyt reads 2 values, and the
+                # ruby text after them is read as text
+                field_2, field_3 = self.unpack("HH", params)
+                return { "kind": "raw", "zero": { "zero": { "field_1": size, "field_2": field_2, "field_3": field_3 } } }, 4
+            if typ in (1, 2, 3):
+                value, = self.unpack("H", params)
+                if size == 2:
+                    if typ == 1 and value in (0, 0xFFFF):
+                        return { "kind": "font", "font_kind": "hylian" if value == 0 else "normal" }, 2
+                    if typ == 2:
+                        return { "kind": "text_size", "percent": value }, 2
+                    if typ == 3 and value == 0xFFFF:
+                        return { "kind": "reset_colour" }, 2
+                    if typ == 3 and value < len(_COLOURS):
+                        return { "kind": "set_colour", "colour": _COLOURS[value] }, 2
+                return _raw(group, typ, size), 2
+            if typ == 4:
+                return _raw(group, typ, size), 0
+        elif group == 1:
+            if typ in (0, 3):
+                frames, = self.unpack("I", params)
+                if size == 4:
+                    return { "kind": "pause" if typ == 0 else "auto_advance", "frames": frames }, 4
+                return _raw(group, typ, size), 4
+            if typ in (4, 5, 6):
+                # choice labels, then the selected and cancel indices
+                return { "kind": "choice" }, 2 * (typ - 2) + 2
+            if typ == 8 and size < 4:
+                raise ValueError(f"control {group} type {typ} needs 4 bytes of parameters, has {size}")
+            if typ in (1, 2, 7, 8, 10):
+                return _raw(group, typ, size), size
+        elif group == 2:
+            if typ in _ONE_FIELD_TYPES:
+                # effect placeholders, msyt doesn't read the parameters
+                return { "kind": "raw", "two": { "one_field": [typ, { "field_1": size }] } }, 0
+            if typ in _VARIABLE_TYPES:
+                name, length = self.read_string(params)
+                field_3, = self.unpack("H", params + 2 + length)
+                if field_3 == 0:
+                    return { "kind": "variable", "variable_kind": typ, "name": name }, 2 + length + 2
+                variable = { "field_1": size, "string": name, "field_3": field_3 }
+                return { "kind": "raw", "two": { "variable": [typ, variable] } }, 2 + length + 2
+        elif group == 3:
+            if typ == 1:
+                return { "kind": "sound" }, size
+            return _raw(group, typ, size), size
+        elif group == 4:
+            if typ == 1:
+                return { "kind": "sound2" }, size
+            if typ == 2:
+                name, length = self.read_string(params)
+                return { "kind": "animation", "name": name }, 2 + length
+            if typ == 0:
+                _, length = self.read_string(params)
+                return _raw(group, typ, size), 2 + length
+            if typ == 3:
+                return _raw(group, typ, size), size
+            raise ValueError(f"unknown control 4 subtype: {typ}")
+        elif group == 5:
+            if typ < len(_PAUSE_LENGTHS) and size == 0:
+                return { "kind": "pause", "length": _PAUSE_LENGTHS[typ] }, 0
+            return _raw(group, typ, size), 0
+        elif group == 201:
+            if typ == 0:
+                # gender and plural
+                field_2 = list(self.data[params:params + size])
+                return { "kind": "raw", "two_hundred_one": { "dynamic": [typ, { "len": size, "field_2": field_2 }] } }, size
+            if typ <= 4:
+                return { "kind": "raw", "two_hundred_one": { "one_field": [typ, { "field_1": size }] } }, 0
+            if typ <= 8:
+                kind = _LOCALISATION_KINDS.get(typ, { "unknown": typ })
+                options = []
+                offset = params
+                while offset < params + size:
+                    option, length = self.read_string(offset)
+                    options.append(option)
+                    offset += 2 + length
+                if offset > params + size:
+                    raise ValueError(f"options of control {group} type {typ} go past its parameters")
+                return { "kind": "localisation", "localisation_kind": kind, "options": options }, size
+        else:
+            raise ValueError(f"unknown control sequence: {group}")
+        raise ValueError(f"unknown control {group} type: {typ}")
+
+    def unpack(self, fmt: str, offset: int) -> tuple:
+        return struct.unpack_from(f"{self.endian}{fmt}", self.data, offset)
+
+    def read_string(self, offset: int) -> tuple[str, int]:
+        """Read a string with its length in bytes before it, return it and the length"""
+        length, = self.unpack("H", offset)
+        text = bytes(self.data[offset + 2:offset + 2 + length]).decode(self.encoding)
+        return text, length
+
+def _raw(group: int, typ: int, size: int) -> dict[str, Any]:
+    """Raw control parse_localization doesn't use, with the group and type msyt would name it by"""
+    return { "kind": "raw", _NAMES[group]: { _NAMES[typ] if typ < len(_NAMES) else str(typ): { "field_1": size } } }
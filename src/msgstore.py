@@ -0,0 +1,119 @@
+"""
+Store for parsed message files (msyt or MSBT, see msyt.fload)
+
+The parsed entries (msyt.parse_localizations) are cached in output/.cache/messages,
+one file for each message file, so the messages are parsed once, and not again
+by other tasks (link_actors and link_effects) or in the next runs. The cache
+entry of a file is replaced when the file (or the code that parses it) changes
+"""
+
+import os
+import sys
+import pickle
+import hashlib
+from typing import Callable
+import util as u
+import msyt
+import msbt
+import sarc
+
+CACHE_DIR = u.output(".cache", "messages")
+
+Localizations = dict[str, tuple[str, str, str | None]]
+
+def fload_localizations(
+        path: str,
+        allow_attr: Callable[[str], bool] | None = None,
+        include: Callable[[str], bool] | None = None,
+        ) -> tuple[Localizations, str | None]:
+    """
+    Like msyt.fload followed by msyt.parse_localizations on the entries,
+    but from the cache if the file was parsed before
+    """
+    try:
+        path = msyt.resolve(path)
+        data = sarc.read(path)
+    except Exception as e:
+        return {}, str(e)
+
+    cache_path = os.path.join(CACHE_DIR, f"{path_key(path)}.pickle")
+    key = content_key(path, data, [allow_attr, include])
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, parsed = pickle.load(f)
+        if cached_key == key:
+            return parsed, None
+    except Exception:
+        # not cached or invalid, load it again
+        pass
+
+    loaded, err = msyt.load(path, data)
+    if err: return {}, err
+    entries, err = u.sfget(loaded, "entries", dict)
+    if err: return {}, err
+    parsed = msyt.parse_localizations(entries, allow_attr, include)
+    # failing to save only makes the next load slower
+    err = save(cache_path, (key, parsed))
+    if err: _report_save_error(err)
+    return parsed, None
+
+def path_key(path: str) -> str:
+    """Name of the cache file of a message file"""
+    return hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=16).hexdigest()
+
+def content_key(path: str, data, callbacks: list) -> str:
+    """
+    Hash of the content of a message file, together with the file type
+    and the code that parses it (including the modules of the callbacks)
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(os.path.splitext(path)[1].encode("utf-8"))
+    scripts = [msyt.__file__, msbt.__file__]
+    for callback in callbacks:
+        if callback is None:
+            h.update(b"\0")
+            continue
+        module = sys.modules.get(callback.__module__)
+        scripts.append(getattr(module, "__file__", None) or callback.__module__)
+        h.update(f"{callback.__module__}:{callback.__qualname__}".encode("utf-8"))
+        # lambdas and nested functions can have the same name
+        _update_code(h, callback.__code__)
+        for cell in callback.__closure__ or ():
+            h.update(repr(cell.cell_contents).encode("utf-8"))
+    for script in scripts:
+        if os.path.exists(script):
+            stat = os.stat(script)
+            h.update(f"{script}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"))
+        else:
+            h.update(script.encode("utf-8"))
+    h.update(data)
+    return h.hexdigest()
+
+def _update_code(h, code):
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode("utf-8"))
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            _update_code(h, const)
+        else:
+            h.update(repr(const).encode("utf-8"))
+
+_save_error_reported = False
+
+def _report_save_error(err: str):
+    """Print the first save error of the process"""
+    global _save_error_reported
+    if not _save_error_reported:
+        _save_error_reported = True
+        print(f"Warning: {err}, messages will be parsed again next time")
+
+def save(cache_path: str, cached) -> str | None:
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(temp_path, "wb") as f:
+            pickle.dump(cached, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        return f"failed to save {u.relpath(cache_path)}: {e}"
+    return None
@@ -1,6 +1,10 @@
-"""Utils for processing myst text resources (in YAML format)"""
+"""Utils for processing myst text resources (in YAML format, or MSBT with msbt.py)"""
 
+import yaml
+from typing import Callable
 import util as u
+import sarc
+import msbt
 
 locale_map = {
     "en-US": "USen",
@@ -16,92 +20,139 @@ locale_map = {
     "nl-NL": "EUnl",
 }
 
+def fload(path: str):
+    """
+    Load a msyt file, which can be in a SARC archive (see sarc.read).
+    If the MSBT file it was converted from is next to it (or path is a .msbt file),
+    that is loaded instead
+    """
+    try:
+        path = resolve(path)
+        return load(path, sarc.read(path))
+    except Exception as e:
+        return None, str(e)
+
+def resolve(path: str) -> str:
+    """Get the path of the file fload loads for path"""
+    if path.endswith(".msyt") and sarc.exists(path[:-5] + ".msbt"):
+        return path[:-5] + ".msbt"
+    return path
+
+def load(path: str, data):
+    """Load the content of a msyt or MSBT file, depending on the extension of path"""
+    try:
+        if path.endswith(".msbt"):
+            return msbt.load(data)
+        return yaml.load(bytes(data), yaml.FullLoader), None
+    except Exception as e:
+        return None, str(e)
+
+# text for the effect placeholders (two.one_field[0])
+_EFFECT_PLACEHOLDERS = {
+    7: "{{effect}}",
+    8: "{{effect_desc}}",
+    13: "{{modifier_value}}",
+}
+
+# grammatical gender for two_hundred_one.dynamic field_2[0]
+_GENDERS = {
+    0: "",
+    1: "masculine",
+    2: "feminine",
+    3: "neuter",
+}
+
+def parse_localizations(
+        entries: dict, 
+        allow_attr: Callable[[str], bool] | None = None,
+        include: Callable[[str], bool] | None = None,
+        ) -> dict[str, tuple[str, str, str | None]]:
+    """
+    Parse the localization entries (the "entries" of a msyt file)
+
+    allow_attr(label) is passed to parse_localization for each entry (False if not given).
+    If include is given, only the entries with include(label) are parsed
+
+    Return label -> (text, attr, error)
+    """
+    out = {}
+    for label, data in entries.items():
+        if include and not include(label):
+            continue
+        out[label] = parse_localization(data, allow_attr(label) if allow_attr else False)
+    return out
+
 def parse_localization(data: dict, allow_attr: bool) -> tuple[str, str, str | None]:
     """
     Parse localization entry
 
     Return text, attr, error
     """
-    err = u.ensure(isinstance(data, dict) and "contents" in data and len(data) == 1, "Localization data must have 'contents'")
+    err = u.ensure(isinstance(data, dict) and len(data) == 1 and "contents" in data, "Localization data must have 'contents'")
     if err: return "", "", err
 
-    contents = data["contents"]
-    text = ""
+    texts = []
     attr = ""
     last_control = None
 
-    for x in contents:
+    for x in data["contents"]:
         if "text" in x:
             if last_control:
-                text += x["text"][last_control:]
+                texts.append(x["text"][last_control:])
                 last_control = None
             else:
-                text += x["text"]
+                texts.append(x["text"])
             continue
-        err = u.ensure("control" in x and len(x) == 1, f"entry must have either text or control")
+        err = u.ensure(len(x) == 1 and "control" in x, "entry must have either text or control")
         if err: return "", "", err
         c = x["control"]
-        err = u.ensure("kind" in c and isinstance(c["kind"], str), f"control must have kind")
-        kind = c["kind"]
-        if kind == "raw":
-            if "zero" in c:
-                # katakana marking above kanji
-                try:
-                    last_control = c["zero"]["zero"]["field_3"] 
-                except KeyError:
-                    return "", "", f"failed to parse control"
-        
-                # divided by 2 because it's in bytes
-                err = u.ensure(last_control % 2 == 0, "odd number of bytes to remove")
+        kind = c.get("kind")
+        err = u.ensure(isinstance(kind, str), "control must have kind")
+        if err: return "", "", err
+        if kind != "raw":
+            continue
+
+        if "zero" in c:
+            # katakana marking above kanji
+            try:
+                last_control = c["zero"]["zero"]["field_3"] 
+            except KeyError:
+                return "", "", f"failed to parse control"
+            # divided by 2 because it's in bytes
+            err = u.ensure(last_control % 2 == 0, "odd number of bytes to remove")
+            if err: return "", "", err
+            last_control = last_control // 2
+            continue
+
+        if "two" in c and "one_field" in c["two"]:
+            # effect and effect description placeholder
+            one_field_value = c["two"]["one_field"][0]
+            placeholder = _EFFECT_PLACEHOLDERS.get(one_field_value)
+            if placeholder is None:
+                return "", "", f"invalid two.one_field0: {one_field_value}"
+            texts.append(placeholder)
+            continue
+
+        if "two_hundred_one" in c:
+            # See exefs/main/sub_7100AA4B4C
+            if allow_attr:
+                err = u.ensure("dynamic" in c["two_hundred_one"], "two_hundred_one must have dynamic")
+                if err: return "", "", err
+                dynamic = c["two_hundred_one"]["dynamic"]
+                err = u.ensure("field_2" in dynamic[1], "two_hundred_one.dynamic[1] must have field_2")
+                if err: return "", "", err
+                v = dynamic[1]["field_2"]
+                err = u.ensure(len(v) == 4, "dynamic field_2 must have 4 elements")
                 if err: return "", "", err
-                last_control = last_control // 2
-                continue
-
-            if "two" in c:
-                # effect and effect description placeholder
-                one_field_value = c["two"]["one_field"][0]
-                if one_field_value == 7:
-                    text += "{{effect}}"
-                elif one_field_value == 8:
-                    text += "{{effect_desc}}"
-                elif one_field_value == 13:
-                    text += "{{modifier_value}}"
-                else:
-                    return "", "", f"invalid two.one_field0: {one_field_value}"
-                continue
-
-            if "two_hundred_one" in c:
-                # See exefs/main/sub_7100AA4B4C
-                if allow_attr:
-                    err = u.ensure("dynamic" in c["two_hundred_one"], "two_hundred_one must have dynamic")
-                    if err: return "", "", err
-                    dynamic = c["two_hundred_one"]["dynamic"]
-                    err = u.ensure("field_2" in dynamic[1])
-                    if err: return "", "", err
-                    v = dynamic[1]["field_2"]
-                    err = u.ensure(len(v) == 4, "dynamic field_2 must have 4 elements")
-                    if err: return "", "", err
-                    plural = v[3]
-                    err = u.ensure(plural == 0 or plural == 1, "plural must be 0 or 1")
-                    if err: return "", "", err
-                    plural = plural == 1
-                    if v[0] == 0:
-                        t = ""
-                    elif v[0] == 1:
-                        t = "masculine"
-                    elif v[0] == 2:
-                        t = "feminine"
-                    elif v[0] == 3:
-                        t = "neuter"
-                    else:
-                        return "", "", f"invalid dynamic field_2: {v}"
-                    if plural:
-                        attr = "plural"
-                    else:
-                        attr = t
-                continue
-
-            return "", "", f"invalid raw control: {c}"
-
-    return text, attr, None
+                plural = v[3]
+                err = u.ensure(plural == 0 or plural == 1, "plural must be 0 or 1")
+                if err: return "", "", err
+                gender = _GENDERS.get(v[0])
+                if gender is None:
+                    return "", "", f"invalid dynamic field_2: {v}"
+                attr = "plural" if plural == 1 else gender
+            continue
+
+        return "", "", f"invalid raw control: {c}"
 
+    return "".join(texts), attr, None
@@ -0,0 +1,148 @@
+"""
+Minimal perfect hash tables from CRC32 hashes to names (like actor-hashes.phf)
+
+The table is built with hash and displace: keys are put in buckets, and
+each bucket (largest first) gets a displacement that puts all of its keys in
+free slots. Buckets with one key take the next free slot directly, stored as
+DIRECT | slot instead of a displacement. A lookup is then:
+bucket -> displacement -> slot -> compare key, without parsing anything.
+All numbers are little-endian u32:
+
+    header: "PHF\\0", version, key count, bucket count
+    displacements: one per bucket
+    slots: key, offset of the name in strings
+    strings: null-terminated UTF-8
+"""
+
+import mmap
+import struct
+from collections.abc import Mapping
+from typing import Iterator
+import util as u
+
+MAGIC = b"PHF\0"
+VERSION = 1
+HEADER = struct.Struct("<4sIII")
+SLOT = struct.Struct("<II")
+# average number of keys per bucket. With more, the last buckets are slow to place
+KEYS_PER_BUCKET = 1
+BUCKET_SEED = 0x9E3779B9
+# flag for a slot index stored in place of a displacement
+DIRECT = 0x80000000
+
+def _hash(key: int, seed: int) -> int:
+    """murmur3 finalizer of the key mixed with the seed"""
+    x = (key ^ (seed * 0x85EBCA6B)) & 0xFFFFFFFF
+    x ^= x >> 16
+    x = (x * 0x85EBCA6B) & 0xFFFFFFFF
+    x ^= x >> 13
+    x = (x * 0xC2B2AE35) & 0xFFFFFFFF
+    x ^= x >> 16
+    return x
+
+def build(items: dict[int, str]) -> bytes:
+    """Build the table from hash -> name"""
+    n = len(items)
+    bucket_count = max(1, (n + KEYS_PER_BUCKET - 1) // KEYS_PER_BUCKET)
+    buckets: list[list[int]] = [[] for _ in range(bucket_count)]
+    for key in items:
+        buckets[_hash(key, BUCKET_SEED) % bucket_count].append(key)
+
+    displacements = [0] * bucket_count
+    slots: list[int | None] = [None] * n
+    free = 0
+    for b in sorted(range(bucket_count), key=lambda b: -len(buckets[b])):
+        keys = buckets[b]
+        if not keys:
+            break
+        if len(keys) == 1:
+            while slots[free] is not None:
+                free += 1
+            displacements[b] = DIRECT | free
+            slots[free] = keys[0]
+            continue
+        d = 0
+        while True:
+            d += 1
+            positions = [_hash(key, d) % n for key in keys]
+            if len(set(positions)) == len(positions) and all(slots[p] is None for p in positions):
+                break
+        displacements[b] = d
+        for key, p in zip(keys, positions):
+            slots[p] = key
+
+    out = bytearray(HEADER.pack(MAGIC, VERSION, n, bucket_count))
+    out += struct.pack(f"<{bucket_count}I", *displacements)
+    strings = bytearray()
+    for key in slots:
+        out += SLOT.pack(key, len(strings)) # type: ignore
+        strings += items[key].encode("utf-8") # type: ignore
+        strings.append(0)
+    out += strings
+    return bytes(out)
+
+def save(path: str, items: dict[int, str]) -> str | None:
+    try:
+        with open(path, "wb") as f:
+            f.write(build(items))
+    except OSError as e:
+        return f"failed to save {u.relpath(path)}: {e}"
+    return None
+
+class Table(Mapping[int, str]):
+    """Memory-mapped table saved by save(), as a read-only hash -> name mapping"""
+    def __init__(self, data):
+        self.data = data
+        magic, version, self.count, self.bucket_count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("invalid perfect hash table")
+        self.slots_offset = HEADER.size + 4 * self.bucket_count
+        self.strings_offset = self.slots_offset + SLOT.size * self.count
+
+    def _slot(self, key: int) -> int:
+        """Find the slot of the key, or -1"""
+        if self.count == 0:
+            return -1
+        key &= 0xFFFFFFFF
+        b = _hash(key, BUCKET_SEED) % self.bucket_count
+        d, = struct.unpack_from("<I", self.data, HEADER.size + 4 * b)
+        if d == 0:
+            return -1
+        if d & DIRECT:
+            slot = d & ~DIRECT
+        else:
+            slot = _hash(key, d) % self.count
+        slot_key, _ = SLOT.unpack_from(self.data, self.slots_offset + SLOT.size * slot)
+        return slot if slot_key == key else -1
+
+    def _name(self, slot: int) -> str:
+        _, offset = SLOT.unpack_from(self.data, self.slots_offset + SLOT.size * slot)
+        start = self.strings_offset + offset
+        end = self.data.find(b"\0", start)
+        return self.data[start:end].decode("utf-8")
+
+    def __getitem__(self, key: int) -> str:
+        if not isinstance(key, int):
+            raise KeyError(key)
+        slot = self._slot(key)
+        if slot < 0:
+            raise KeyError(key)
+        return self._name(slot)
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, int) and self._slot(key) >= 0
+
+    def __iter__(self) -> Iterator[int]:
+        for slot in range(self.count):
+            yield SLOT.unpack_from(self.data, self.slots_offset + SLOT.size * slot)[0]
+
+    def __len__(self) -> int:
+        return self.count
+
+def fload(path: str) -> tuple[Table, str | None]:
+    """Load a table. The file is memory-mapped"""
+    try:
+        with open(path, "rb") as f:
+            return Table(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)), None
+    except Exception as e:
+        return None, str(e) # type: ignore
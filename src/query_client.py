@@ -0,0 +1,145 @@
+"""
+Client for query_server.py, and a load test
+
+Usage: python src/query_client.py [options], see --help
+
+Each message is a u32 little-endian length, followed by that many bytes of
+UTF-8 JSON. A request is an object with "op" and the arguments of the op
+(see query_server.py), and the response is {"results": [...]}
+or {"error": "..."}
+"""
+
+import sys
+import json
+import time
+import socket
+import struct
+import argparse
+import threading
+import numpy as np
+import util as u
+
+LENGTH = struct.Struct("<I")
+# larger messages are rejected, instead of allocating whatever the length says
+MAX_MESSAGE_SIZE = 64 << 20
+DEFAULT_SOCKET = u.output(".cache", "query.sock")
+
+def send_message(sock: socket.socket, message: dict):
+    data = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    sock.sendall(LENGTH.pack(len(data)) + data)
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes | None:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def recv_message(sock: socket.socket) -> dict | None:
+    """
+    Receive a message, or None if the connection is closed.
+    Raise ValueError if the message is invalid or larger than MAX_MESSAGE_SIZE
+    """
+    header = _recv_exact(sock, LENGTH.size)
+    if header is None:
+        return None
+    length, = LENGTH.unpack(header)
+    if length > MAX_MESSAGE_SIZE:
+        raise ValueError(f"message is too large ({length} bytes)")
+    data = _recv_exact(sock, length)
+    if data is None:
+        return None
+    return json.loads(data)
+
+def connect(address: str) -> socket.socket:
+    """Connect to a socket path, or HOST:PORT"""
+    if ":" in address and not address.startswith("/"):
+        host, port = address.rsplit(":", 1)
+        return socket.create_connection((host, int(port)))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(address)
+    return sock
+
+class Client:
+    def __init__(self, address: str = DEFAULT_SOCKET):
+        self.sock = connect(address)
+
+    def close(self):
+        self.sock.close()
+
+    def request(self, op: str, **args) -> tuple[list, str | None]:
+        send_message(self.sock, { "op": op, **args })
+        try:
+            response = recv_message(self.sock)
+        except ValueError as e:
+            return [], f"invalid response: {e}"
+        if response is None:
+            return [], "connection closed"
+        if "error" in response:
+            return [], response["error"]
+        return response["results"], None
+
+    def match(self, ingredients: list[list[str]]) -> tuple[list, str | None]:
+        return self.request("match", ingredients=ingredients)
+
+    def cook(self, ingredients: list[list[str]]) -> tuple[list, str | None]:
+        return self.request("cook", ingredients=ingredients)
+
+    def lookup(self, hashes: list[int]) -> tuple[list, str | None]:
+        return self.request("lookup", hashes=hashes)
+
+def load_test(address: str, op: str, clients: int, requests: int, batch: int) -> str | None:
+    client = Client(address)
+    actors, err = client.request("actors")
+    client.close()
+    if err: return err
+
+    latencies = [[] for _ in range(clients)]
+    errors = []
+    def run(i: int):
+        rng = np.random.default_rng(i)
+        client = Client(address)
+        for _ in range(requests):
+            counts = rng.integers(1, 6, size=batch)
+            ingredients = [[actors[a] for a in rng.integers(0, len(actors), size=c)] for c in counts]
+            start = time.perf_counter()
+            _, err = client.request(op, ingredients=ingredients)
+            latencies[i].append(time.perf_counter() - start)
+            if err:
+                errors.append(err)
+                break
+        client.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        return errors[0]
+
+    all_latencies = np.array([x for l in latencies for x in l]) * 1000
+    total = len(all_latencies)
+    print(f"{op}: {clients} clients x {requests} requests x {batch} ingredient lists")
+    print(f"{total / elapsed:,.0f} requests/s, {total * batch / elapsed:,.0f} ingredient lists/s")
+    p50, p90, p99 = np.percentile(all_latencies, [50, 90, 99])
+    print(f"latency (ms): p50 {p50:.3f}, p90 {p90:.3f}, p99 {p99:.3f}, max {all_latencies.max():.3f}")
+    return None
+
+def main(argv: list[str]) -> str | None:
+    parser = argparse.ArgumentParser(prog="query_client.py", description="Load test query_server.py")
+    parser.add_argument("-a", "--address", default=DEFAULT_SOCKET, help="socket path or HOST:PORT (default: output/.cache/query.sock)")
+    parser.add_argument("--op", choices=["match", "cook"], default="cook")
+    parser.add_argument("-c", "--clients", type=int, default=4, help="concurrent connections")
+    parser.add_argument("-n", "--requests", type=int, default=1000, help="requests per client")
+    parser.add_argument("-b", "--batch", type=int, default=16, help="ingredient lists per request")
+    args = parser.parse_args(argv)
+    return load_test(args.address, args.op, args.clients, args.requests, args.batch)
+
+if __name__ == "__main__":
+    u.fatal(main(sys.argv[1:]))
@@ -0,0 +1,171 @@
+"""
+Long-running server for recipe matches, cook results and hash lookups,
+so tools don't load the outputs again for every query
+
+Usage: python src/query_server.py [options], see --help
+
+Listens on a Unix socket (default output/.cache/query.sock), or on
+localhost with --port. See query_client.py for the protocol. Requests:
+
+    {"op": "match", "ingredients": [[ACTOR, ...], ...]}
+        -> recipe index and recipe actor of each ingredient list
+    {"op": "cook", "ingredients": [[ACTOR, ...], ...]}
+        -> cook.Result of each ingredient list, as an object
+    {"op": "lookup", "hashes": [HASH, ...]}
+        -> [[namespace, name], ...] of each hash (from hashes.bin)
+    {"op": "actors"}
+        -> the actors that can be used as ingredients
+
+Ingredient lists in a request are evaluated as one batch with numpy
+"""
+
+import os
+import sys
+import signal
+import socket
+import argparse
+import socketserver
+from typing import Any
+import numpy as np
+import util as u
+import hashreg
+import cook
+import recipe as r
+import query_client as qc
+
+class Service:
+    """Answers requests, shared by all connections (everything is read-only)"""
+    def __init__(self, sim: cook.Simulator, hashes: hashreg.Table):
+        self.sim = sim
+        self.matcher = sim.matcher
+        self.hashes = hashes
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        op = request.get("op")
+        if op == "match":
+            ids, err = self.to_ids(request.get("ingredients"))
+            if err: return { "error": err }
+            recipes, err = self.matcher.match_batch(ids)
+            if err: return { "error": err }
+            return { "results": [[int(i), self.matcher.recipes[i]["recipe"]] for i in recipes] }
+        if op == "cook":
+            ids, err = self.to_ids(request.get("ingredients"))
+            if err: return { "error": err }
+            result, err = self.sim.cook_batch(ids)
+            if err: return { "error": err }
+            columns = { c: result[c].tolist() for c in cook.RESULT_DTYPES }
+            return { "results": [dict(zip(columns, row)) for row in zip(*columns.values())] }
+        if op == "lookup":
+            hashes = request.get("hashes")
+            if not isinstance(hashes, list):
+                return { "error": "hashes must be a list" }
+            for i, h in enumerate(hashes):
+                if not isinstance(h, int) or isinstance(h, bool):
+                    return { "error": f"hashes[{i}] must be an integer" }
+            return { "results": [self.hashes.lookup(h) for h in hashes] }
+        if op == "actors":
+            return { "results": self.matcher.actors }
+        return { "error": f"unknown op: {op}" }
+
+    def to_ids(self, ingredients) -> tuple[np.ndarray, str | None]:
+        """Actor ids for match_batch and cook_batch"""
+        if not isinstance(ingredients, list):
+            return None, "ingredients must be a list" # type: ignore
+        ids = np.full((len(ingredients), r.MAX_INGREDIENTS), r.EMPTY, dtype=np.int64)
+        for i, actors in enumerate(ingredients):
+            if not isinstance(actors, list) or len(actors) > r.MAX_INGREDIENTS:
+                return None, f"ingredients[{i}] must be a list of up to {r.MAX_INGREDIENTS} actors" # type: ignore
+            for j, actor in enumerate(actors):
+                if not isinstance(actor, str):
+                    return None, f"ingredients[{i}][{j}] must be an actor name" # type: ignore
+                actor_id, err = self.matcher.actor_id(actor)
+                if err: return None, err # type: ignore
+                ids[i, j] = actor_id
+        return ids, None
+
+class Handler(socketserver.BaseRequestHandler):
+    server: "UnixServer | TCPServer"
+
+    def handle(self):
+        while True:
+            try:
+                request = qc.recv_message(self.request)
+            except (ValueError, OSError) as e:
+                qc.send_message(self.request, { "error": f"invalid request: {e}" })
+                return
+            if request is None:
+                return
+            if not isinstance(request, dict):
+                response = { "error": "request must be an object" }
+            else:
+                try:
+                    response = self.server.service.handle(request)
+                except Exception as e:
+                    # keep serving the connection and the other ones
+                    response = { "error": f"failed to handle request: {e}" }
+            qc.send_message(self.request, response)
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    service: Service
+
+class TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    service: Service
+
+def load_service(output_dir: str) -> tuple[Service, str | None]:
+    sim, err = cook.load(output_dir)
+    if err: return None, err # type: ignore
+    hashes, err = hashreg.open_table(os.path.join(output_dir, "hashes.bin"))
+    if err: return None, err # type: ignore
+    return Service(sim, hashes), None # type: ignore
+
+def is_listening(socket_path: str) -> bool:
+    try:
+        qc.connect(socket_path).close()
+    except OSError:
+        return False
+    return True
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def main(argv: list[str]) -> str | None:
+    parser = argparse.ArgumentParser(prog="query_server.py", description="Serve recipe, cook and hash queries")
+    parser.add_argument("-s", "--socket", default=qc.DEFAULT_SOCKET, help="Unix socket path (default: output/.cache/query.sock)")
+    parser.add_argument("-p", "--port", type=int, help="listen on localhost:PORT instead of a Unix socket")
+    args = parser.parse_args(argv)
+
+    service, err = load_service(u.output())
+    if err: return err
+
+    if args.port is not None or not hasattr(socket, "AF_UNIX"):
+        port = args.port or 0
+        server = TCPServer(("127.0.0.1", port), Handler)
+        address = f"127.0.0.1:{server.server_address[1]}"
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(args.socket)), exist_ok=True)
+        if os.path.exists(args.socket):
+            if is_listening(args.socket):
+                return f"another server is listening on {args.socket}"
+            # left by a server that didn't stop cleanly
+            os.remove(args.socket)
+        server = UnixServer(args.socket, Handler)
+        address = args.socket
+    server.service = service
+    # stop on kill like Ctrl-C, so the socket is removed
+    signal.signal(signal.SIGTERM, _interrupt)
+    print(f"Listening on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if isinstance(server, UnixServer) and os.path.exists(args.socket):
+            os.remove(args.socket)
+    return None
+
+if __name__ == "__main__":
+    u.fatal(main(sys.argv[1:]))
@@ -0,0 +1,275 @@
+"""
+Match ingredients to recipes, using the outputs of decode_recipes and build_recipe_index
+
+Usage: python src/recipe.py [ACTOR...] to match ingredients,
+or python src/recipe.py --bench [N] to measure the batch throughput
+
+Matching model (same as what the indexes are built for):
+  - If all ingredients are the same actor, the single recipes are checked first
+  - Otherwise (or if no single recipe matches), the candidates are the recipes
+    every ingredient can be used in (AND of the actor bitsets in recipe-actor-index)
+  - A candidate matches if every actor group has an ingredient in the group, and
+    every tag group has an ingredient with a tag in the group. A group is a name
+    or a list of names (any of them)
+  - The first matching recipe in recipes.yaml is the result, or the failure
+    actor (dubious food) if nothing matches
+
+Recipe indices are indices into recipes.yaml (single recipes first)
+"""
+
+import os
+import sys
+import time
+from typing import Any
+import numpy as np
+import util as u
+import actor as a
+import spp
+
+MAX_INGREDIENTS = 5
+# ingredient slot without an actor in match_batch
+EMPTY = -1
+# rows matched at once in match_batch
+BATCH_CHUNK = 1 << 16
+
+def _groups(groups: list) -> list[list[str]]:
+    return [g if isinstance(g, list) else [g] for g in groups]
+
+def _bitset(indices, words: int) -> np.ndarray:
+    bits = np.zeros(words, dtype=np.uint64)
+    for i in indices:
+        bits[i // 64] |= np.uint64(1) << np.uint64(i % 64)
+    return bits
+
+class Matcher:
+    # actor id -> name, ids are used in match_batch
+    actors: list[str]
+    actor_ids: dict[str, int]
+
+    def __init__(
+            self,
+            recipes: list[dict[str, Any]],
+            meta: dict[str, Any],
+            index_keys: list[str],
+            index_bits: np.ndarray,
+            actor_tags: dict[str, list[str]]):
+        self.recipes = recipes
+        self.single_count = meta["single_recipe_count"]
+        self.failure_index = meta["failure_actor_index"]
+        self.actor_tags = { actor: set(tags) for actor, tags in actor_tags.items() }
+        self.actors = sorted(set(actor_tags) | set(index_keys))
+        self.actor_ids = { actor: i for i, actor in enumerate(self.actors) }
+
+        n = len(self.actors)
+        # the last row is for EMPTY
+        words = index_bits.shape[1]
+        self.usable = np.zeros((n + 1, words), dtype=np.uint64)
+        for key, bits in zip(index_keys, index_bits):
+            self.usable[self.actor_ids[key]] = bits
+        # empty slots don't exclude any recipe
+        self.usable[n] = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+        # groups of the non-single recipes, numbered in order
+        groups = []
+        self.recipe_groups = []
+        for recipe in recipes[self.single_count:]:
+            first = len(groups)
+            for group in _groups(recipe["actors"]):
+                groups.append(("actor", set(group)))
+            for group in _groups(recipe["tags"]):
+                groups.append(("tag", set(group)))
+            self.recipe_groups.append(range(first, len(groups)))
+        group_words = max(1, (len(groups) + 63) // 64)
+        # actor -> groups it satisfies, EMPTY satisfies nothing
+        self.satisfies = np.zeros((n + 1, group_words), dtype=np.uint64)
+        for actor, actor_id in self.actor_ids.items():
+            tags = self.actor_tags.get(actor, set())
+            self.satisfies[actor_id] = _bitset(
+                [i for i, (kind, names) in enumerate(groups) if (actor in names if kind == "actor" else tags & names)],
+                group_words)
+        self.required = np.array([_bitset(r, group_words) for r in self.recipe_groups], dtype=np.uint64).reshape(-1, group_words)
+
+        # actor -> first single recipe it matches alone, or -1
+        self.single_match = np.full(n + 1, -1, dtype=np.int64)
+        for actor, actor_id in self.actor_ids.items():
+            for i in range(self.single_count):
+                if self._groups_match(recipes[i], [actor]):
+                    self.single_match[actor_id] = i
+                    break
+
+    def actor_id(self, name: str) -> tuple[int, str | None]:
+        """Id of an actor for match_batch"""
+        actor_id = self.actor_ids.get(name)
+        if actor_id is None:
+            return EMPTY, f"unknown actor: {name}"
+        return actor_id, None
+
+    def check_ids(self, ids: np.ndarray) -> str | None:
+        """Check that ids are actor ids or EMPTY"""
+        if ids.ndim != 2 or ids.shape[1] > MAX_INGREDIENTS:
+            return f"ids must have shape (N, up to {MAX_INGREDIENTS}), got {ids.shape}"
+        invalid = (ids < EMPTY) | (ids >= len(self.actors))
+        if invalid.any():
+            return f"unknown actor id: {ids[invalid][0]}"
+        return None
+
+    def _groups_match(self, recipe: dict[str, Any], actors: list[str]) -> bool:
+        for group in _groups(recipe["actors"]):
+            if not any(actor in group for actor in actors):
+                return False
+        for group in _groups(recipe["tags"]):
+            if not any(tag in self.actor_tags.get(actor, ()) for actor in actors for tag in group):
+                return False
+        return True
+
+    def match(self, actors: list[str]) -> tuple[int, str | None]:
+        """Match up to 5 ingredients, return the index of the recipe"""
+        distinct = list(dict.fromkeys(actors))
+        for actor in distinct:
+            if actor not in self.actor_ids:
+                return self.failure_index, f"unknown actor: {actor}"
+        if not distinct:
+            return self.failure_index, None
+        if len(distinct) == 1:
+            for i in range(self.single_count):
+                if self._groups_match(self.recipes[i], distinct):
+                    return i, None
+        candidates = np.bitwise_and.reduce(self.usable[[self.actor_ids[a] for a in distinct]], axis=0)
+        for word_i, word in enumerate(candidates):
+            word = int(word)
+            while word:
+                bit = (word & -word).bit_length() - 1
+                word &= word - 1
+                i = self.single_count + word_i * 64 + bit
+                if self._groups_match(self.recipes[i], distinct):
+                    return i, None
+        return self.failure_index, None
+
+    def match_batch(self, ids: np.ndarray) -> tuple[np.ndarray, str | None]:
+        """
+        Match many ingredient lists at once. ids is an (N, up to 5) integer array
+        of actor ids (see actor_id), with EMPTY for empty slots.
+        Return the recipe index for each row
+        """
+        ids = np.asarray(ids)
+        err = self.check_ids(ids)
+        if err: return None, err # type: ignore
+        out = np.empty(len(ids), dtype=np.int64)
+        for start in range(0, len(ids), BATCH_CHUNK):
+            out[start:start + BATCH_CHUNK] = self._match_chunk(ids[start:start + BATCH_CHUNK])
+        return out, None
+
+    def _match_chunk(self, ids: np.ndarray) -> np.ndarray:
+        n = len(self.actors)
+        rows = np.where(ids < 0, n, ids)
+        candidates = np.bitwise_and.reduce(self.usable[rows], axis=1)
+        satisfied = np.bitwise_or.reduce(self.satisfies[rows], axis=1)
+
+        result = np.full(len(ids), -1, dtype=np.int64)
+        for r in range(len(self.recipe_groups)):
+            word, bit = divmod(r, 64)
+            ok = (candidates[:, word] >> np.uint64(bit)) & np.uint64(1) == 1
+            ok &= np.all((satisfied & self.required[r]) == self.required[r], axis=1)
+            ok &= result < 0
+            result[ok] = self.single_count + r
+        result[result < 0] = self.failure_index
+
+        # rows with one distinct actor
+        highest = ids.max(axis=1)
+        lowest = np.where(ids < 0, np.iinfo(ids.dtype).max, ids).min(axis=1)
+        single = (highest >= 0) & (highest == lowest)
+        single_result = self.single_match[np.where(single, highest, n)]
+        single &= single_result >= 0
+        result[single] = single_result[single]
+        # empty rows
+        result[highest < 0] = self.failure_index
+        return result
+
+def load(output_dir: str | None = None, actors: dict[str, dict[str, Any]] | None = None) -> tuple[Matcher, str | None]:
+    """Load the matcher from the output directory. actors is from load_actors, if already loaded"""
+    if output_dir is None:
+        output_dir = u.output()
+    recipes, err = u.fyaml(os.path.join(output_dir, "recipes.yaml"))
+    if err: return None, err # type: ignore
+    meta, err = u.fyaml(os.path.join(output_dir, "recipe-meta.yaml"))
+    if err: return None, err # type: ignore
+    try:
+        with np.load(os.path.join(output_dir, "recipe-actor-index.npz"), allow_pickle=False) as index:
+            index_keys = [str(k) for k in index["keys"]]
+            index_bits = index["bits"]
+    except Exception as e:
+        return None, str(e) # type: ignore
+
+    if actors is None:
+        actors, err = load_actors(output_dir)
+        if err: return None, err # type: ignore
+    actor_tags = { name: actor["tags"] for name, actor in actors.items() }
+    return Matcher(recipes, meta, index_keys, index_bits, actor_tags), None
+
+def load_actors(output_dir: str) -> tuple[dict[str, dict[str, Any]], str | None]:
+    """Load the tags and gparamlist of the actors in output/Actor"""
+    actor_dir = os.path.join(output_dir, "Actor")
+    files = [os.path.join(actor_dir, f) for f in os.listdir(actor_dir)]
+    actors = {}
+    errors = []
+    with u.pool() as pool:
+        for (actor_name, actor), err in pool.imap_unordered(_load_actor, files, chunksize=16):
+            if err:
+                errors.append(err)
+                continue
+            actors[actor_name] = actor
+    err = u.check_errors(errors)
+    if err: return {}, err
+    return actors, None
+
+def _load_actor(actor_path: str) -> tuple[tuple[str, dict[str, Any]], str | None]:
+    # a.load resolves shared GParamLists (link_actors --shared-gparams)
+    actor, err = a.load(actor_path)
+    if err: return ("", {}), err
+    return (actor["actor"], { "tags": actor["tags"], "gparamlist": actor["gparamlist"] or {} }), None
+
+def bench(matcher: Matcher, count: int) -> str | None:
+    rng = np.random.default_rng(0)
+    ids = rng.integers(0, len(matcher.actors), size=(count, MAX_INGREDIENTS))
+    # 0 to 4 empty slots per row
+    ids[rng.random((count, MAX_INGREDIENTS)) < 0.3] = EMPTY
+    ids[:, 0] = rng.integers(0, len(matcher.actors), size=count)
+
+    start = time.monotonic()
+    result, err = matcher.match_batch(ids)
+    if err: return err
+    elapsed = time.monotonic() - start
+    print(f"match_batch: {count} in {elapsed:.2f}s ({count / elapsed:,.0f}/s)")
+
+    sample = min(count, 20000)
+    progress = spp.printer(sample, "Check against match")
+    start = time.monotonic()
+    for i in range(sample):
+        names = [matcher.actors[x] for x in ids[i] if x != EMPTY]
+        expected, err = matcher.match(names)
+        if err:
+            progress.done()
+            return err
+        if result[i] != expected:
+            progress.done()
+            return f"mismatch for {names}: match_batch={result[i]}, match={expected}"
+        progress.update(i)
+    progress.done()
+    elapsed = time.monotonic() - start
+    print(f"match: {sample} in {elapsed:.2f}s ({sample / elapsed:,.0f}/s)")
+    return None
+
+def main(argv: list[str]) -> str | None:
+    matcher, err = load()
+    if err: return err
+    if argv and argv[0] == "--bench":
+        return bench(matcher, int(argv[1]) if len(argv) > 1 else 1000000)
+    err = u.ensure(0 < len(argv) <= MAX_INGREDIENTS, f"need 1 to {MAX_INGREDIENTS} actors")
+    if err: return err
+    i, err = matcher.match(argv)
+    if err: return err
+    print(f"{i}: {matcher.recipes[i]['recipe']}")
+    return None
+
+if __name__ == "__main__":
+    u.fatal(main(sys.argv[1:]))
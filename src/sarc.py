@@ -0,0 +1,232 @@
+"""
+Reader for SARC archives (optionally Yaz0 compressed), like Msg_USen.product.sarc
+
+The archives are memory-mapped, and members are returned as memoryviews into
+the mapping without copying. The module-level functions take paths that can go
+into an archive, as if it was extracted to a directory with the same name.
+For example, Message/Msg_USen.product.sarc/ActorType/Item.msyt is read from
+Msg_USen.product.sarc if it's a file, or Msg_USen.product.ssarc if it's compressed
+"""
+
+import os
+import mmap
+import struct
+
+class Archive:
+    """A SARC archive"""
+    path: str
+    mtime_ns: int
+    # name -> (start, end) in data
+    members: dict[str, tuple[int, int]]
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime_ns = os.stat(path).st_mtime_ns
+        with open(path, "rb") as f:
+            if f.read(4) == b"Yaz0":
+                f.seek(0)
+                self.data = memoryview(yaz0_decompress(f.read()))
+            else:
+                # zero-length files can't be mapped, they are not valid SARC anyway
+                self.data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        self._parse()
+
+    def _parse(self):
+        data = self.data
+        if data[0:4] != b"SARC":
+            raise ValueError(f"invalid SARC magic in {self.path}")
+        bom = bytes(data[6:8])
+        if bom == b"\xfe\xff":
+            e = ">"
+        elif bom == b"\xff\xfe":
+            e = "<"
+        else:
+            raise ValueError(f"invalid SARC byte order mark in {self.path}")
+        header_size, = struct.unpack_from(f"{e}H", data, 4)
+        data_offset, = struct.unpack_from(f"{e}I", data, 0xc)
+
+        sfat = header_size
+        if data[sfat:sfat + 4] != b"SFAT":
+            raise ValueError(f"invalid SFAT magic in {self.path}")
+        sfat_size, node_count, hash_key = struct.unpack_from(f"{e}HHI", data, sfat + 4)
+        nodes = sfat + sfat_size
+        sfnt = nodes + 0x10 * node_count
+        if data[sfnt:sfnt + 4] != b"SFNT":
+            raise ValueError(f"invalid SFNT magic in {self.path}")
+        sfnt_size, = struct.unpack_from(f"{e}H", data, sfnt + 4)
+        names = sfnt + sfnt_size
+
+        self.hash_key = hash_key
+        # (hash, start, end) sorted by hash, for lookup without names
+        self.nodes: list[tuple[int, int, int]] = []
+        self.members = {}
+        for i in range(node_count):
+            name_hash, attr, start, end = struct.unpack_from(f"{e}IIII", data, nodes + 0x10 * i)
+            start += data_offset
+            end += data_offset
+            self.nodes.append((name_hash, start, end))
+            if attr & 0x01000000:
+                name_offset = names + (attr & 0xffff) * 4
+                name_end = name_offset
+                while data[name_end] != 0:
+                    name_end += 1
+                self.members[bytes(data[name_offset:name_end]).decode("utf-8")] = (start, end)
+
+    def names(self) -> list[str]:
+        return sorted(self.members)
+
+    def find(self, name: str) -> memoryview | None:
+        """Find a member by the hash of its name, with binary search"""
+        name_hash = hash_name(name, self.hash_key)
+        lo, hi = 0, len(self.nodes)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.nodes[mid][0] < name_hash:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.nodes) and self.nodes[lo][0] == name_hash:
+            _, start, end = self.nodes[lo]
+            return self.data[start:end]
+        return None
+
+    def listdir(self, subdir: str) -> list[str]:
+        """Names of the members directly in subdir ("" for the root)"""
+        prefix = subdir + "/" if subdir else ""
+        out = set()
+        for name in self.members:
+            if name.startswith(prefix):
+                out.add(name[len(prefix):].split("/")[0])
+        return sorted(out)
+
+def hash_name(name: str, key: int = 0x65) -> int:
+    h = 0
+    for c in name.encode("utf-8"):
+        # characters are signed
+        if c >= 0x80:
+            c -= 0x100
+        h = (h * key + c) & 0xFFFFFFFF
+    return h
+
+def yaz0_decompress(data: bytes) -> bytearray:
+    if data[0:4] != b"Yaz0":
+        raise ValueError("invalid Yaz0 magic")
+    size, = struct.unpack_from(">I", data, 4)
+    out = bytearray()
+    i = 0x10
+    while len(out) < size:
+        header = data[i]
+        i += 1
+        for bit in range(7, -1, -1):
+            if len(out) >= size:
+                break
+            if header & (1 << bit):
+                out.append(data[i])
+                i += 1
+                continue
+            b1, b2 = data[i], data[i + 1]
+            i += 2
+            distance = ((b1 & 0xf) << 8 | b2) + 1
+            count = b1 >> 4
+            if count == 0:
+                count = data[i] + 0x12
+                i += 1
+            else:
+                count += 2
+            start = len(out) - distance
+            if distance >= count:
+                out += out[start:start + count]
+            else:
+                # overlapping copy repeats the last `distance` bytes
+                pattern = out[start:]
+                out += (pattern * (count // distance + 1))[:count]
+    # the last copy can go past the size
+    del out[size:]
+    return out
+
+# archive path -> Archive, per process
+_archives: dict[str, Archive] = {}
+
+def _open(archive_path: str) -> Archive | None:
+    """Open the archive at the path, or the Yaz0 compressed one (.sarc -> .ssarc)"""
+    if archive_path in _archives:
+        return _archives[archive_path]
+    path = archive_path
+    if not os.path.isfile(path):
+        if not path.endswith(".sarc"):
+            return None
+        path = path[:-5] + ".ssarc"
+        if not os.path.isfile(path):
+            return None
+    archive = Archive(path)
+    _archives[archive_path] = archive
+    return archive
+
+def _resolve(path: str) -> tuple[Archive | None, str]:
+    """Find the archive the path is in, and the member path inside it"""
+    if os.path.exists(path):
+        return None, path
+    parts = []
+    parent = path
+    while True:
+        parent, part = os.path.split(parent)
+        if not part:
+            raise FileNotFoundError(path)
+        parts.append(part)
+        archive = _open(parent)
+        if archive is not None:
+            return archive, "/".join(reversed(parts))
+
+def listdir(path: str) -> list[str]:
+    """Like os.listdir (sorted), also for a directory in an archive"""
+    if os.path.isdir(path):
+        return sorted(os.listdir(path))
+    archive = _open(path)
+    if archive is not None:
+        return archive.listdir("")
+    archive, member = _resolve(path)
+    if archive is None:
+        raise NotADirectoryError(path)
+    names = archive.listdir(member)
+    if not names:
+        raise FileNotFoundError(path)
+    return names
+
+def stat(path: str) -> tuple[int, int]:
+    """
+    Return (mtime_ns, size) of a file or directory. Paths in an archive
+    have the mtime of the archive
+    """
+    if os.path.exists(path):
+        s = os.stat(path)
+        return s.st_mtime_ns, s.st_size
+    archive = _open(path)
+    if archive is None:
+        archive, member = _resolve(path)
+        if archive is None:
+            raise FileNotFoundError(path)
+        data = archive.find(member)
+        if data is not None:
+            return archive.mtime_ns, len(data)
+        if not archive.listdir(member):
+            raise FileNotFoundError(path)
+    return archive.mtime_ns, 0
+
+def exists(path: str) -> bool:
+    """Like os.path.exists, also for paths in an archive"""
+    try:
+        stat(path)
+        return True
+    except OSError:
+        return False
+
+def read(path: str) -> bytes | memoryview:
+    """Read a file, also a member of an archive (without copying)"""
+    archive, member = _resolve(path)
+    if archive is None:
+        with open(path, "rb") as f:
+            return f.read()
+    data = archive.find(member)
+    if data is None:
+        raise FileNotFoundError(path)
+    return data
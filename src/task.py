@@ -1,33 +1,49 @@
 import os
 import util as u
 
-def task(script: str, input: dict, output: dict, delegate):
-    """Create a task"""
-    return _Task(script, input, output, delegate)
+def task(script: str, input: dict, output: dict, delegate, stale = None):
+    """
+    Create a task
+
+    stale is an optional check that takes the same (input, output) as the delegate
+    and returns True if the task needs to run even if the outputs look up-to-date
+    """
+    return _Task(script, input, output, delegate, stale)
 
 def mgr():
     """Create a task manager"""
     return _TaskMgr()
 
 class _Task:
-    def __init__(self, script: str, input: dict, output: dict, delegate):
+    def __init__(self, script: str, input: dict, output: dict, delegate, stale = None):
         self.script = script
         self.input = input
         self.output = output
         self.delegate = delegate
+        self.stale = stale
 
     def name(self):
         return os.path.basename(self.script)
     
     def run(self) -> str | None:
+        input, output = self._resolve()
+        d = self.delegate
+        return d(input, output)
+
+    def is_stale(self) -> bool:
+        if self.stale is None:
+            return False
+        input, output = self._resolve()
+        return self.stale(input, output)
+
+    def _resolve(self) -> tuple[dict, dict]:
         input = {}
         for i, p in self.input.items():
             input[i] = u.home(p)
         output = {}
         for o, p in self.output.items():
             output[o] = u.home(p)
-        d = self.delegate
-        return d(input, output)
+        return input, output
         
 
 class _TaskMgr:
@@ -98,6 +114,8 @@ def _is_up_to_date(task: _Task, inputs: list[str], outputs: list[str]):
     Check if outputs are up-to-date. inputs or outputs can be a directory
     which means the first file in the directory will be checked
     """
+    if task.is_stale():
+        return False
     input_mtime = None
     for i in inputs + [task.script]:
         i = _get_real_path_for_mtime(i)
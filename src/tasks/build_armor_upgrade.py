@@ -6,6 +6,7 @@ import util as u
 import task as t
 import yaml
 import spp
+import equiv
 
 def task():
     inputs = {
@@ -42,21 +43,17 @@ def icon_remap_to_armor_upgrade_data(icon_remap: dict[str, str]) -> tuple[list[s
 
     progress = spp.printer(len(icon_remap), "Build armor upgrade data")
 
-    armor_groups = []
-    def add_group(actor_1, actor_2):
-        for group in armor_groups:
-            if actor_1 in group or actor_2 in group:
-                group.add(actor_1)
-                group.add(actor_2)
-                return
-        armor_groups.append(set([actor_1, actor_2]))
+    # armor connected by icon remap are upgrades of each other
+    upgrades = equiv.UnionFind()
     for i, (actor_1, actor_2) in enumerate(icon_remap.items()):
         progress.print(i, f"{actor_1} and {actor_2}")
         if actor_1.startswith("Armor_") and actor_2.startswith("Armor_"):
-            add_group(actor_1, actor_2)
+            upgrades.union(actor_1, actor_2)
 
     progress.done()
 
+    armor_groups = [set(group) for group in upgrades.components().values()]
+
     filtered_groups = []
     to_remove = [
         # snow boots that's not upgradable (borrowed)
@@ -0,0 +1,84 @@
+"""
+Build the reverse-lookup table for all known CRC32 hashes
+(actors, tags, cook effects and GameData flags), and check for collisions
+"""
+import os
+import util as u
+import task as t
+import hashreg
+
+def task():
+    inputs = {
+        "actor_hashes_path": "output/actor-hashes.yaml",
+        "tags_path": "output/tags.yaml",
+        "cook_system_path": "output/cook-system.yaml",
+        "game_data_dir": "output/GameData",
+    }
+
+    outputs = {
+        "hash_table_path": "output/hashes.bin",
+    }
+
+    def run(inputs, outputs):
+        return build_hash_registry(
+            inputs["actor_hashes_path"],
+            inputs["tags_path"],
+            inputs["cook_system_path"],
+            inputs["game_data_dir"],
+            outputs["hash_table_path"],
+        )
+
+    return t.task(__file__, inputs, outputs, run)
+
+def build_hash_registry(
+        actor_hashes_path: str,
+        tags_path: str,
+        cook_system_path: str,
+        game_data_dir: str,
+        hash_table_path: str) -> str | None:
+    registry = hashreg.Registry()
+
+    for namespace, path in (("actor", actor_hashes_path), ("tag", tags_path)):
+        data, err = u.fyaml(path)
+        if err: return err
+        registry.add_all(namespace, data.values(), u.relpath(path))
+
+    system, err = u.fyaml(cook_system_path)
+    if err: return err
+    for entry in system["cook_effect_index"]:
+        registry.add("cook_effect", entry["type"], u.relpath(cook_system_path))
+
+    for file in sorted(os.listdir(game_data_dir)):
+        err = add_game_data_flags(registry, os.path.join(game_data_dir, file))
+        if err: return err
+
+    cross_namespace = 0
+    for collision in registry.collisions():
+        if not collision.is_cross_namespace():
+            return str(collision)
+        # the same hash is allowed for different kinds of names
+        print(f"warning: {collision}")
+        cross_namespace += 1
+
+    err = registry.save(hash_table_path)
+    if err: return err
+    print(f"Saved {len(registry.entries)} hashes ({cross_namespace} shared across namespaces) to {u.relpath(hash_table_path)}")
+    return None
+
+def add_game_data_flags(registry: hashreg.Registry, path: str) -> str | None:
+    """
+    Add the flags from a file saved by list_gamedata. The file is scanned
+    for the name and hash lines instead of loading the whole YAML
+    """
+    err = u.ensure(path.endswith(".yaml"), f"GameData file must be a yaml file: {path}")
+    if err: return err
+    namespace = "gamedata." + os.path.basename(path)[:-5]
+    name = None
+    with u.fopenr(path) as f:
+        for line in f:
+            if line.startswith("- name: "):
+                name = line[8:].rstrip("\n")
+            elif line.startswith("  hash: ") and name is not None:
+                registry.add(namespace, name, u.relpath(path), int(line[8:], 16))
+                name = None
+    return None
@@ -5,6 +5,8 @@ Build the actor -> icon actor dictionary for mapping actors with the same icon
 import os
 import util as u
 import task as t
+import actor as a
+import equiv
 import yaml
 import spp
 
@@ -61,7 +63,11 @@ def build_icon_remap(actor_dir: str, output_path: str) -> str | None:
 
     actor_files = [ os.path.join(actor_dir, x) for x in os.listdir(actor_dir)]
 
-    name_to_actor_and_icon = {}
+    # actors with the same localized name are the same item
+    same_name = equiv.UnionFind()
+    # actor name -> localized name, icon actor name
+    actor_info: dict[str, tuple[str, str]] = {}
+    first_actor_with_name: dict[str, str] = {}
     progress = spp.printer(len(actor_files), "Load icon actor info")
     with u.pool() as pool:
         for (i, result) in enumerate(pool.imap_unordered(process_actor, actor_files)):
@@ -74,30 +80,26 @@ def build_icon_remap(actor_dir: str, output_path: str) -> str | None:
                 continue
 
             name, actor_name, icon_actor_name = result
-            if name in name_to_actor_and_icon:
-                data = name_to_actor_and_icon[name]
-                data["actors"].append(actor_name)
-                data["icons"].add(icon_actor_name)
+            actor_info[actor_name] = (name, icon_actor_name)
+            same_name.add(actor_name)
+            if name in first_actor_with_name:
+                same_name.union(first_actor_with_name[name], actor_name)
             else:
-                data = {
-                    "actors": [actor_name],
-                    "icons": set([icon_actor_name]),
-                }
-                name_to_actor_and_icon[name] = data
+                first_actor_with_name[name] = actor_name
     progress.done()
     # actor name -> icon actor name, if not the same
     resolution = {}
 
-    progress = spp.printer(len(name_to_actor_and_icon), "Resolve icon actor")
+    components = same_name.components()
+    progress = spp.printer(len(components), "Resolve icon actor")
 
-    for (i, name) in enumerate(name_to_actor_and_icon):
+    for (i, actors) in enumerate(components.values()):
+        name = actor_info[actors[0]][0]
         progress.print(i, name)
-        data = name_to_actor_and_icon[name]
-        actors = data["actors"]
         # if only one actor has this name, skip
         if len(actors) <= 1:
             continue
-        icons = data["icons"]
+        icons = set(actor_info[actor][1] for actor in actors)
         if len(icons) > 1:
             # more than one icon, needs manual resolution
             if name not in manual_resolution:
@@ -131,7 +133,7 @@ def process_actor(actor_path: str) -> tuple[tuple[str, str, str] | None, str | N
         Return (localized_name, actor_name, icon_actor_name)
         Return None if actor doesn't have translation
     """
-    actor, err = u.fyaml(actor_path)
+    actor, err = a.load(actor_path)
     if err: return None, err
 
     actor_name = actor["actor"]
@@ -140,9 +142,10 @@ def process_actor(actor_path: str) -> tuple[tuple[str, str, str] | None, str | N
     if actor_name in MANUAL_NAME:
         name = MANUAL_NAME[actor_name]
     else:
-        if not actor["localization"]:
+        strings, err = a.load_strings(actor_path, actor, "en-US")
+        if err: return None, err
+        if not strings:
             return None, None
-        strings = actor["localization"]["en-US"]
         if not strings["name"]:
             return None, None
         name = strings["name"]["text"]
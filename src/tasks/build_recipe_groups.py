@@ -5,6 +5,7 @@ Group actors based their effect when used in a recipe
 import os
 import util as u
 import task as t
+import actor as a
 from typing import Any
 import spp
 
@@ -98,50 +99,56 @@ def build_recipe_groups(
 
     errors = []
 
-    groups: list[Group] = []
-    # (actor_name, gparamlist, tags)
-    to_group: list[tuple[str, dict[str, Any], set[str]]] = []
+    # results in the order of files, so the output doesn't depend on
+    # the order the actors are loaded in
+    loaded: list[tuple[str, tuple[str, tuple[dict[str, Any], set[str]] | None], str | None]] = [None] * len(files) # type: ignore
 
     with u.pool() as pool:
-        for (i, (actor_name, (status, data), error)) in enumerate(pool.imap(process_actor_shim, files)):
-            progress.print(i, actor_name)
-            if error:
-                errors.append(error)
-                continue
-            if status == "skip":
-                continue
-            if status == "non-group":
-                _group = Group(actor_name, {}, set())
-                _group.non_group = True
-                groups.append(_group)
-                continue
-            err = u.ensure(data is not None, "data is None")
-            if err:
-                errors.append(err)
-                continue
-            gparamlist, tags = data # type: ignore bro I literally checked for None
-            to_group.append((actor_name, gparamlist, tags))
+        for (i, (file_index, result)) in enumerate(pool.imap_unordered(process_actor_shim, enumerate(files))):
+            progress.print(i, result[0])
+            loaded[file_index] = result
     progress.done()
 
+    non_groups: list[Group] = []
+    # (actor_name, gparamlist, tags)
+    to_group: list[tuple[str, dict[str, Any], set[str]]] = []
+
+    for (actor_name, (status, data), error) in loaded:
+        if error:
+            errors.append(error)
+            continue
+        if status == "skip":
+            continue
+        if status == "non-group":
+            _group = Group(actor_name, {}, set())
+            _group.non_group = True
+            non_groups.append(_group)
+            continue
+        err = u.ensure(data is not None, "data is None")
+        if err:
+            errors.append(err)
+            continue
+        gparamlist, tags = data # type: ignore bro I literally checked for None
+        to_group.append((actor_name, gparamlist, tags))
+
     err = u.check_errors(errors)
     if err: return err
 
     progress = spp.printer(len(to_group), "Group actors")
 
+    # groups in the order of their first actor
+    fingerprint_to_group: dict[tuple, Group] = {}
     for (i, (actor_name, gparamlist, tags)) in enumerate(to_group):
         progress.print(i, actor_name)
-        found = False
-        for group in groups:
-            if group.non_group:
-                continue
-            if group.gparamlist == gparamlist and group.tags == tags:
-                group.actors.append(actor_name)
-                found = True
-                break
-        if not found:
-            groups.append(Group(actor_name, gparamlist, tags))
+        key = fingerprint(gparamlist, tags)
+        if key in fingerprint_to_group:
+            fingerprint_to_group[key].actors.append(actor_name)
+        else:
+            fingerprint_to_group[key] = Group(actor_name, gparamlist, tags)
     progress.done()
 
+    groups = non_groups + list(fingerprint_to_group.values())
+
     # Write the groups
     with u.fopenw(save_path) as f:
         for group in groups:
@@ -153,8 +160,16 @@ def build_recipe_groups(
     return None
 
 
+def fingerprint(gparamlist: dict[str, Any], tags: set[str]) -> tuple:
+    """
+        Hashable key of the trimmed gparamlist and tags. Actors have the same
+        key if and only if the gparamlists and tags are equal
+    """
+    return (tuple(sorted(gparamlist.items())), frozenset(tags))
+
 def process_actor_shim(args):
-    return process_actor(*args)
+    index, args = args
+    return index, process_actor(*args)
 def process_actor(
     actor_path: str, 
     non_group_actors: set[str], 
@@ -179,7 +194,7 @@ def process_actor(
     """
     def mkerr(e):
         return "", ("", None), e
-    actor_data, err = u.fyaml(actor_path)
+    actor_data, err = a.load(actor_path)
     if err: return mkerr(err)
     actor_name, err = u.sfget(actor_data, "actor", str)
     if err: return mkerr(err)
@@ -1,11 +1,14 @@
 """
 Build maps for Actor -> Recipe and Tag -> Recipe
-that can be used to improve recipe search performance
+that can be used to improve recipe search performance,
+and the reverse Recipe -> Actor lists
 """
 
 import os
+import numpy as np
 import spp
 import util as u
+import csr
 import task as t
 
 def task():
@@ -18,6 +21,9 @@ def task():
     outputs = {
         "actor_output": "output/recipe-actor-index.yaml",
         "tag_output": "output/recipe-tag-index.yaml",
+        "actor_bits_output": "output/recipe-actor-index.npz",
+        "tag_bits_output": "output/recipe-tag-index.npz",
+        "actor_reverse_output": "output/recipe-actor-reverse.bin",
     }
 
     def run(inputs, outputs):
@@ -27,6 +33,9 @@ def task():
             inputs["recipe_meta_path"],
             outputs["actor_output"],
             outputs["tag_output"],
+            outputs["actor_bits_output"],
+            outputs["tag_bits_output"],
+            outputs["actor_reverse_output"],
         )
 
     return t.task(__file__, inputs, outputs, run)
@@ -36,7 +45,10 @@ def build_recipe_index(
     recipes_path: str,
     recipe_meta_path: str,
     actors_save_path: str,
-    tags_save_path: str
+    tags_save_path: str,
+    actors_bits_save_path: str,
+    tags_bits_save_path: str,
+    actors_reverse_save_path: str,
 ) -> str | None:
     recipes, err = u.fyaml(recipes_path)
     if err: return err
@@ -94,42 +106,50 @@ def build_recipe_index(
                     actors_to_matchable_recipe_idxs[actor_name].add(idx)
     progress.done()
 
-    actors_output, err = convert_to_recipe_set(len(recipes), actors_to_matchable_recipe_idxs)
-    if err: return err
-
-    with u.fopenw(actors_save_path) as f:
-        f.write("# See build_recipe_index.py for the bit encoding\n\n")
-        for key in actors_output:
-            a1, a2 = actors_output[key]
-            f.write(f"{key:<20}: [0x{a1:016x}, 0x{a2:016x}]\n")
-
-    tags_output, err = convert_to_recipe_set(len(recipes), tags_to_matchable_recipe_idxs)
-    if err: return err
-    with u.fopenw(tags_save_path) as f:
+    for data, save_path, bits_save_path in (
+        (actors_to_matchable_recipe_idxs, actors_save_path, actors_bits_save_path),
+        (tags_to_matchable_recipe_idxs, tags_save_path, tags_bits_save_path),
+    ):
+        keys, bits = convert_to_recipe_set(len(recipes), data)
+        save_recipe_set(save_path, keys, bits)
+        # no pickle in the file, so it can be loaded with allow_pickle=False
+        np.savez(bits_save_path, keys=np.array(keys, dtype=str), bits=bits)
+
+    return save_reverse_index(actors_reverse_save_path, len(recipes), actors_to_matchable_recipe_idxs)
+
+# Bit encoding:
+# Each key (actor or tag) maps to a set of indices into the non-single recipes
+# (recipes.yaml after the first recipe-meta.yaml single_recipe_count recipes).
+# Index i is bit (i % 64) of word (i // 64). The YAML has the words in order,
+# and the .npz has the keys and the words as a (keys x words) uint64 matrix (bits)
+#
+# The YAML always has at least 2 words, for up to 128 recipes
+
+def convert_to_recipe_set(recipe_count: int, data: dict[str, set[int]]) -> tuple[list[str], np.ndarray]:
+    """Convert key -> recipe indices to keys and a (keys x words) uint64 bit matrix"""
+    keys = list(data)
+    words = max(2, (recipe_count + 63) // 64)
+    bits = np.zeros((len(keys), words), dtype=np.uint64)
+
+    rows = np.repeat(np.arange(len(keys)), [len(data[key]) for key in keys])
+    indices = np.fromiter((i for key in keys for i in data[key]), dtype=np.uint64, count=len(rows))
+    # scatter all bits at once, OR-ing into the same word when needed
+    np.bitwise_or.at(bits, (rows, indices // 64), np.left_shift(np.uint64(1), indices % 64))
+    return keys, bits
+
+def save_reverse_index(save_path: str, recipe_count: int, data: dict[str, set[int]]) -> str | None:
+    """
+    Save recipe index -> actors that can be used in it (the transpose of the actor index),
+    see csr.py for the format. Actor ids are indices into the sorted actor names
+    """
+    names = sorted(data)
+    actor_ids = np.repeat(np.arange(len(names)), [len(data[name]) for name in names])
+    recipe_idxs = np.fromiter((i for name in names for i in data[name]), dtype=np.int64, count=len(actor_ids))
+    return csr.save(save_path, recipe_count, recipe_idxs, actor_ids, names)
+
+def save_recipe_set(save_path: str, keys: list[str], bits: np.ndarray):
+    with u.fopenw(save_path) as f:
         f.write("# See build_recipe_index.py for the bit encoding\n\n")
-        for key in tags_output:
-            a1, a2 = tags_output[key]
-            f.write(f"{key:<20}: [0x{a1:016x}, 0x{a2:016x}]\n")
-
-def convert_to_recipe_set(max: int, data: dict[str, set[int]]) -> tuple[dict[str, tuple[int, int]], str | None]:
-    if max > 64*2:
-        return None, "Too many recipes to index" # type: ignore
-
-    output = {}
-    for key in data:
-        s = data[key]
-        
-        a1 = 0
-        for i in range(0, 64):
-            if i in s:
-                a1 = (a1 | (1 << i))
-        a2 = 0
-        for i in range(64, max):
-            if i in s:
-                a2 = (a2 | (1 << (i-64)))
-
-        output[key] = (a1, a2)
-
-    return output, None
-
-
+        for key, row in zip(keys, bits):
+            words = ", ".join(f"0x{int(w):016x}" for w in row)
+            f.write(f"{key:<20}: [{words}]\n")
@@ -4,6 +4,8 @@ parameters for CookEffects
 """
 
 import util as u
+import byml
+import hashreg
 import task as t
 
 def task():
@@ -35,10 +37,13 @@ EFFECTS = [
     "Fireproof",
 ]
 
+EFFECT_HASHES = hashreg.Registry()
+EFFECT_HASHES.add_all("cook_effect", EFFECTS, "decode_cook_system.EFFECTS")
+
 def decode_effect(hash: int) -> tuple[str, str | None]:
-    for effect in EFFECTS:
-        if u.crc32(effect) == hash:
-            return effect, None
+    entries = EFFECT_HASHES.find(hash)
+    if entries:
+        return entries[0].name, None
     return "", f"unknown effect with hash {u.hex08(hash)}"
 
 def decode_f32(value: float) -> tuple[str, str | None]:
@@ -70,7 +75,7 @@ def decode_f32(value: float) -> tuple[str, str | None]:
 
 
 def decode_cook_system(cook_data_path: str, system_save_path: str) -> str | None:
-    data, err = u.fyaml(cook_data_path)
+    data, err = byml.fload_prefer_binary(cook_data_path)
     if err: return err
     
     system, err = u.sfget(data, "System", dict)
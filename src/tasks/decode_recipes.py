@@ -2,15 +2,18 @@
 Decode the recipe file (Cooking/CookData.byml)
 """
 import yaml
+from collections.abc import Mapping
 import util as u
+import byml
+import phf
 import task as t
 import spp
 
 def task():
     inputs = {
         "cook_data_path": "botw/Cooking/CookData.yml",
-        "tags_path": "output/tags.yaml",
-        "actor_hash_path": "output/actor-hashes.yaml",
+        "tags_path": "output/tags.phf",
+        "actor_hash_path": "output/actor-hashes.phf",
         "cook_system_path": "output/cook-system.yaml",
     }
 
@@ -40,7 +43,7 @@ def decode_recipes(
     recipe_path: str,
     recipe_meta_path: str,
 ) -> str | None:
-    data, err = u.fyaml(cook_data_path)
+    data, err = byml.fload_prefer_binary(cook_data_path)
     if err: return err
 
     actor_hashmap, err = load_hashes(actor_hash_path)
@@ -138,8 +141,8 @@ def decode_recipes(
 
 def decode_recipe(
     progress: spp._Printer,
-    actor_hashmap: dict[int, str],
-    tags_hashmap: dict,
+    actor_hashmap: Mapping[int, str],
+    tags_hashmap: Mapping[int, str],
     data: list,
     is_single: bool,
     out: list,
@@ -185,7 +188,7 @@ def decode_recipe(
     return None
 
             
-def decode_object[T](obj: T, hashmap: dict[int, str]) -> tuple[T, str | None]:
+def decode_object[T](obj: T, hashmap: Mapping[int, str]) -> tuple[T, str | None]:
     if isinstance(obj, list):
         out = []
         for item in obj:
@@ -199,7 +202,10 @@ def decode_object[T](obj: T, hashmap: dict[int, str]) -> tuple[T, str | None]:
         return None, f"unknown hash: {u.hex08(obj)}" # type: ignore
     return hashmap[obj], None
 
-def load_hashes(hash_path: str) -> tuple[dict[int, str], str | None]:
+def load_hashes(hash_path: str) -> tuple[Mapping[int, str], str | None]:
+    """Load hash -> name from a table (.phf) or a YAML file saved by hash_actors or list_tags"""
+    if hash_path.endswith(".phf"):
+        return phf.fload(hash_path)
     hashmap = {}
     data, err = u.fyaml(hash_path)
     if err: return {}, err
@@ -5,6 +5,8 @@ import os
 import util as u
 import task as t
 import spp
+import hashreg
+import phf
 
 def task():
     inputs = {
@@ -13,14 +15,15 @@ def task():
 
     outputs = {
         "hash_save_path": "output/actor-hashes.yaml",
+        "hash_table_path": "output/actor-hashes.phf",
     }
 
     def run(inputs, outputs):
-        return hash_actors(inputs["actor_dir"], outputs["hash_save_path"])
+        return hash_actors(inputs["actor_dir"], outputs["hash_save_path"], outputs["hash_table_path"])
 
     return t.task(__file__, inputs, outputs, run)
 
-def hash_actors(actor_dir: str, save_path: str) -> str | None:
+def hash_actors(actor_dir: str, save_path: str, table_path: str) -> str | None:
     names = set()
 
     for (i, actor_file) in enumerate(os.listdir(actor_dir)):
@@ -29,7 +32,10 @@ def hash_actors(actor_dir: str, save_path: str) -> str | None:
         actor_name = actor_file[:-5]
         names.add(actor_name)
 
-    hashs = set()
+    registry = hashreg.Registry()
+    registry.add_all("actor", names, u.relpath(actor_dir))
+    err = registry.check()
+    if err: return err
 
     progress = spp.printer(len(names), "Hash actor names")
     progress.done()
@@ -38,12 +44,11 @@ def hash_actors(actor_dir: str, save_path: str) -> str | None:
     with u.fopenw(save_path) as f:
         for i, name in enumerate(sorted(names)):
             progress.print(i, name)
-            hash_num = u.crc32(name)
-            hash = u.hex08(hash_num)
-            if hash_num in hashs:
-                return f"hash collision: {name} {u.hex08(hash_num)}"
-            hashs.add(hash_num)
+            hash = u.hex08(u.crc32(name))
             f.write(f"\"{hash}\": {name}\n")
 
-    print(f"Saved {len(names)} names to {u.relpath(save_path)}")
+    err = phf.save(table_path, { u.crc32(name): name for name in names })
+    if err: return err
+
+    print(f"Saved {len(names)} names to {u.relpath(save_path)} and {u.relpath(table_path)}")
     return None
@@ -1,18 +1,34 @@
 """
 Link an actor (ActorLink) with its GParams and localization
+
+The parsed sources are cached in output/.cache so the next run
+only re-parses the sources that changed, and only re-emits the actors
+that depend on them
 """
 import os
+import sys
 import yaml
 import json
+import pickle
+import hashlib
 import shutil
+import bisect
 from dataclasses import dataclass
 from typing import Any
 import util as u
+import actor as a
+import aamp
 import task as t
 import msyt
+import msbt
+import msgstore
+import sarc
 import spp
 
-def task():
+def task(options: "LinkOptions | None" = None):
+    if options is None:
+        options = LinkOptions()
+
     inputs = {
         "actor_link_dir": "botw/Actor/ActorLink",
         "dummy_path": "botw/Actor/GeneralParamList/Dummy.gparamlist.yml",
@@ -23,45 +39,95 @@ def task():
     outputs = {
         "actor_output_dir": "output/Actor",
         "gpk_save_path": "output/gpks.yaml",
+        "cache_path": "output/.cache/link_actors.pickle",
     }
+    # only written with some options, so not tracked as outputs
+    gparamlist_output_dir = u.output("GParamList")
+    l10n_output_dir = u.output("Localization")
 
     def run(inputs, outputs):
         gparamkeys, err = load_gparam_keys(inputs["dummy_path"], outputs["gpk_save_path"])
         if err: return err
-        actors, err = load_actor_links(inputs["actor_link_dir"])
-        if err: return err
-        gparamlists, err = load_gparamlist_files(gparamkeys, inputs["gparam_dir"])
-        if err: return err
-        localization, err = load_actor_localization()
-        if err: return err
-        err = save_output(actors, gparamlists, localization, outputs["actor_output_dir"])
+        sources, err = scan_sources(inputs["actor_link_dir"], inputs["gparam_dir"], inputs["messages"])
         if err: return err
+        if options.low_memory:
+            return link_actors_low_memory(
+                gparamkeys,
+                sources,
+                options,
+                outputs["actor_output_dir"],
+                gparamlist_output_dir,
+                l10n_output_dir,
+                outputs["cache_path"],
+            )
+        cache = load_link_cache(outputs["cache_path"], gparamkeys, options, outputs["actor_output_dir"])
+        return link_actors(
+            gparamkeys,
+            sources,
+            cache,
+            options,
+            outputs["actor_output_dir"],
+            gparamlist_output_dir,
+            l10n_output_dir,
+            outputs["cache_path"],
+        )
 
-        return None
-
-    return t.task(__file__, inputs, outputs, run)
-
-
-
+    def stale(inputs, outputs):
+        if not is_link_cache_compatible(outputs["cache_path"], options):
+            return True
+        return is_source_newer(outputs["cache_path"], source_dirs(inputs["actor_link_dir"], inputs["gparam_dir"], inputs["messages"]))
 
+    return t.task(__file__, inputs, outputs, run, stale)
 
 class ActorLink:
+    __slots__ = ("actor", "name_jpn", "tags", "model", "gparamlist", "profile")
     actor: str
     name_jpn: str
     tags: list[str]
-    model: str = ""
-    gparamlist: str = ""
-    profile: str = ""
+    model: str
+    gparamlist: str
+    profile: str
+
+    def __init__(self):
+        self.actor = ""
+        self.name_jpn = ""
+        self.tags = []
+        self.model = ""
+        self.gparamlist = ""
+        self.profile = ""
+
+    def intern(self):
+        """
+        Share the strings repeated across actors. Results from worker processes
+        are unpickled as new strings, so this needs to be done in the main process
+        """
+        self.tags = [sys.intern(tag) for tag in self.tags]
+        self.gparamlist = sys.intern(self.gparamlist)
+        self.profile = sys.intern(self.profile)
+
+    def __reduce__(self):
+        # pickled as a tuple, which is smaller and faster than the slot state
+        return (_make_actor_link, (self.actor, self.name_jpn, self.tags, self.model, self.gparamlist, self.profile))
+
+def _make_actor_link(actor, name_jpn, tags, model, gparamlist, profile) -> ActorLink:
+    link = ActorLink()
+    link.actor = actor
+    link.name_jpn = name_jpn
+    link.tags = tags
+    link.model = model
+    link.gparamlist = gparamlist
+    link.profile = profile
+    return link
 
-def load_actor_links(actor_link_dir: str) -> tuple[dict[str, ActorLink], str | None]:
-    files = os.listdir(actor_link_dir)
-    progress = spp.printer(len(files), "Link Actors")
+def load_actor_links(paths: list[str]) -> tuple[dict[str, ActorLink], str | None]:
+    """Load ActorLinks and return path -> ActorLink"""
+    progress = spp.printer(len(paths), "Link Actors")
 
     actor_links = {}
     errors = []
 
     with u.pool() as pool:
-        for i, (actor, err) in enumerate(pool.imap_unordered(load_actor_link, [os.path.join(actor_link_dir, f) for f in files])):
+        for i, (path, (actor, err)) in enumerate(zip(paths, pool.imap(load_actor_link, paths))):
             if err:
                 errors.append(err)
                 continue
@@ -69,7 +135,8 @@ def load_actor_links(actor_link_dir: str) -> tuple[dict[str, ActorLink], str | N
                 progress.update(i)
                 errors.append("load_actor_link returned None")
                 continue
-            actor_links[actor.actor] = actor
+            actor.intern()
+            actor_links[path] = actor
             progress.print(i, actor.actor)
     progress.done()
 
@@ -78,12 +145,29 @@ def load_actor_links(actor_link_dir: str) -> tuple[dict[str, ActorLink], str | N
 
     return actor_links, None
 
+# Names used by load_actor_link, to resolve the hashes in AAMP files
+ACTOR_LINK_NAMES = aamp.name_table([
+    "param_root", "LinkTarget", "Tags",
+    "ActorNameJpn", "ModelUser", "GParamUser", "ProfileUser",
+    *[f"Tag{i}" for i in range(0, 99)],
+])
+
+def actor_link_name(path: str) -> tuple[str, str | None]:
+    """Get the actor name from an ActorLink file (.bxml or its YAML conversion)"""
+    file = os.path.basename(path)
+    for ext in (".bxml", ".yml"):
+        if file.endswith(ext):
+            return file[:-len(ext)], None
+    return "", f"ActorLink file must end in .yml or .bxml: {file}"
+
 def load_actor_link(path: str) -> tuple[ActorLink | None, str | None]:
-    err = u.ensure(path.endswith(".yml"), "ActorLink file must end in .yml")
+    actor_name, err = actor_link_name(path)
     if err: return None, err
-    actor_name = os.path.basename(path)[:-4]
 
-    data, err = u.fyaml(path)
+    if path.endswith(".bxml"):
+        data, err = aamp.fload(path, ACTOR_LINK_NAMES)
+    else:
+        data, err = u.fyaml(path)
     if err: return None, err
 
     actor = ActorLink()
@@ -137,11 +221,14 @@ def load_actor_link(path: str) -> tuple[ActorLink | None, str | None]:
 
     return actor, None
 
-@dataclass
+@dataclass(slots=True)
 class Gpk:
     """A key for GParamList"""
     name: str
     default: str | int | float | bool | None
+    # names in the GParamList, to resolve the hashes in AAMP files
+    object_name: str = ""
+    param_name: str = ""
 
 def load_gparam_keys(dummy_path: str, gpk_save_path: str) -> tuple[list[Gpk], str | None]:
     """Load default GParam values from Dummy and save them to a YAML file"""
@@ -149,6 +236,7 @@ def load_gparam_keys(dummy_path: str, gpk_save_path: str) -> tuple[list[Gpk], st
     with u.fopenr(dummy_path) as f:
         # not using YAML parser for the whole thing to preserve key order
         current_key_prefix: str = ""
+        current_object: str = ""
         current_table: list[str] = []
         for line in f:
             if not line.startswith("    "):
@@ -164,16 +252,18 @@ def load_gparam_keys(dummy_path: str, gpk_save_path: str) -> tuple[list[Gpk], st
                     current_key_prefix = current_key[0].lower() + current_key[1:]
                     data = data[current_key]
                     for key in sorted(data.keys()):
-                        keys.append(Gpk(current_key_prefix + key, data[key]))
+                        keys.append(Gpk(current_key_prefix + key, data[key], current_key, key))
 
                 current_table = []
                 current_key_prefix = ""
+                current_object = ""
 
                 line = line.strip()
                 if line.endswith("!obj") or line.endswith(":"):
                     # line is just table name
                     key = line.split(":")[0].strip()
                     current_key_prefix = key[0].lower() + key[1:]
+                    current_object = key
                 else:
                     # table inline (need to parse whole table together)
                     current_table = [line]
@@ -186,7 +276,7 @@ def load_gparam_keys(dummy_path: str, gpk_save_path: str) -> tuple[list[Gpk], st
             err = u.ensure(data and isinstance(data, dict) and len(data) == 1, "Data must not be empty")
             if err: return [], err
             key = list(data.keys())[0]
-            keys.append(Gpk(current_key_prefix+key, data[key]))
+            keys.append(Gpk(current_key_prefix+key, data[key], current_object, key))
 
     with u.fopenw(gpk_save_path) as f:
         for key in keys:
@@ -195,21 +285,20 @@ def load_gparam_keys(dummy_path: str, gpk_save_path: str) -> tuple[list[Gpk], st
     print(f"Saved {len(keys)} Gpks to {u.relpath(gpk_save_path)}")
     return keys, None
 
-def load_gparamlist_files(keys: list[Gpk], gparam_dir: str) -> tuple[dict[str, list[tuple[str, object]]], str | None]:
+def load_gparamlist_files(keys: list[Gpk], paths: list[str]) -> tuple[dict[str, tuple[str, list[tuple[str, Any]]]], str | None]:
     """
-    Load GParamLists and return GParamUser -> GParams
+    Load GParamLists and return path -> (GParamUser, GParams)
 
     Only values different from the default are stored
     """
-    files = os.listdir(gparam_dir)
     gparamlist = {}
-    progress = spp.printer(len(files), "Load GParamLists")
+    progress = spp.printer(len(paths), "Load GParamLists")
 
     errors = []
 
     with u.pool() as pool:
-        for i, ((gparamlist_name, gparam_entries), err) in enumerate(
-            pool.imap_unordered(load_gparamlist_file_shim, [(keys, os.path.join(gparam_dir, f)) for f in files])):
+        for i, (path, ((gparamlist_name, gparam_entries), err)) in enumerate(
+            zip(paths, pool.imap(load_gparamlist_file_shim, [(keys, p) for p in paths]))):
             if err:
                 progress.update(i)
                 errors.append(err)
@@ -218,7 +307,7 @@ def load_gparamlist_files(keys: list[Gpk], gparam_dir: str) -> tuple[dict[str, l
                 progress.update(i)
                 errors.append("load_gparamlist_file returned empty name")
                 continue
-            gparamlist[gparamlist_name] = gparam_entries
+            gparamlist[path] = (sys.intern(gparamlist_name), [(sys.intern(k), v) for k, v in gparam_entries])
             progress.print(i, gparamlist_name)
     progress.done()
 
@@ -231,12 +320,30 @@ def load_gparamlist_file_shim(args) -> tuple[
     tuple[ str, list[tuple[str, Any]] ]
     , str | None]:
     return load_gparamlist_file(*args)
+def gparamlist_user(path: str) -> tuple[str, str | None]:
+    """Get the GParamUser from a GParamList file (.bgparamlist or its YAML conversion)"""
+    file = os.path.basename(path)
+    for ext in (".bgparamlist", ".gparamlist.yml"):
+        if file.endswith(ext):
+            return file[:-len(ext)], None
+    return "", f"GParamList file must end in .gparamlist.yml or .bgparamlist: {file}"
+
+def gparam_names(keys: list[Gpk]) -> dict[int, str]:
+    """Names in GParamLists, to resolve the hashes in AAMP files"""
+    names = ["param_root"]
+    for key in keys:
+        names.append(key.object_name)
+        names.append(key.param_name)
+    return aamp.name_table(names)
+
 def load_gparamlist_file(keys: list[Gpk], gparam_path: str) -> tuple[tuple[str, list[tuple[str, Any]]], str | None]:
-    err = u.ensure(gparam_path.endswith(".gparamlist.yml"), "GParamList file must end in .yml")
+    gparamlist_name, err = gparamlist_user(gparam_path)
     if err: return ("", []), err
-    gparamlist_name = os.path.basename(gparam_path)[:-15]
 
-    data, err = u.fyaml(gparam_path)
+    if gparam_path.endswith(".bgparamlist"):
+        data, err = aamp.fload(gparam_path, gparam_names(keys))
+    else:
+        data, err = u.fyaml(gparam_path)
     if err: return ("", []), err
     param_root, err = u.sfget(data, "param_root", dict)
     if err: return ("", []), err
@@ -275,98 +382,682 @@ def flatten_gpl(obj):
     return out
 
 # actor localization stuff
-@dataclass
+@dataclass(slots=True)
 class LocalizationStrings:
-    name: str = ""
-    name_attr: str = ""
-    desc: str = ""
-    album_desc: str = ""
+    # None in the strings of one file if the file doesn't have the entry
+    name: str | None = ""
+    name_attr: str | None = ""
+    desc: str | None = ""
+    album_desc: str | None = ""
 
-@dataclass
+    def __reduce__(self):
+        return (LocalizationStrings, (self.name, self.name_attr, self.desc, self.album_desc))
+
+@dataclass(slots=True)
 class LocalizationEntry:
     profile: str
     strings: dict[str, LocalizationStrings]
 
-def load_actor_localization() -> tuple[dict[str, LocalizationEntry], str | None]:
-    entries = {}
-    for locale, locale_nin in msyt.locale_map.items():
-        err = load_l10n_for_locale(locale, locale_nin, entries)
-        if err: return {}, err
-    return entries, None
+    def __reduce__(self):
+        return (LocalizationEntry, (self.profile, self.strings))
 
-def load_l10n_for_locale(locale: str, locale_nin: str, entries: dict[str, LocalizationEntry]) -> str | None:
-    localization_path = u.botw("Message", f"Msg_{locale_nin}.product.sarc", "ActorType")
-    progress = spp.printer(len(entries), f"Load {locale} localization")
-    count = 0
+# Shared by locales that don't have strings for an actor, must not be modified
+EMPTY_L10N_STRINGS = LocalizationStrings()
 
-    for file in os.listdir(localization_path):
-        err = u.ensure(file.endswith(".msyt"), "Localization file must end in .msyt")
-        if err: return err
-        profile = file[:-5]
-        data, err = u.fyaml(os.path.join(localization_path, file))
-        if err: return err
-        next_count, err = load_l10n_for_locale_profile(count, progress, locale, profile, data, entries)
-        if err: return err
-        count += next_count
+def load_l10n_files(paths: list[tuple[str, str]]) -> tuple[dict[str, tuple[str, str, dict[str, LocalizationStrings]]], str | None]:
+    """
+    Load actor localization files from (locale, path)
+
+    Return path -> (locale, profile, actor -> strings)
+    """
+    files = {}
+    progress = spp.printer(len(paths), "Load localization")
+
+    for i, (locale, path) in enumerate(paths):
+        progress.print(i, f"{locale}: {os.path.basename(path)}")
+        profile, strings, err = load_l10n_file(locale, path)
+        if err: return {}, err
+        files[path] = (locale, profile, strings)
     progress.done()
 
+    return files, None
+
+def l10n_profile(path: str) -> tuple[str, str | None]:
+    """Get the profile from an ActorType message file (.msbt or its msyt conversion)"""
+    file = os.path.basename(path)
+    for ext in (".msbt", ".msyt"):
+        if file.endswith(ext):
+            return file[:-len(ext)], None
+    return "", f"Localization file must end in .msyt or .msbt: {file}"
+
+def load_l10n_file(locale: str, path: str) -> tuple[str, dict[str, LocalizationStrings], str | None]:
+    profile, err = l10n_profile(path)
+    if err: return "", {}, err
+    profile = sys.intern(profile)
+    # only names have attributes (gender and plural)
+    parsed, err = msgstore.fload_localizations(path, is_l10n_name, is_l10n_entry)
+    if err:
+        return "", {}, f"failed to load {locale}/ActorType/{profile}: {err}"
+    strings, err = load_l10n_for_locale_profile(profile, parsed)
+    if err: return "", {}, err
+    return profile, strings, None
+
+# entries in ActorType message files that are saved
+L10N_ENTRY_SUFFIXES = ("_Name", "_Desc", "_PictureBook")
+
+def is_l10n_entry(entry_name: str) -> bool:
+    return entry_name.endswith(L10N_ENTRY_SUFFIXES)
+
+def is_l10n_name(entry_name: str) -> bool:
+    return entry_name.endswith("_Name")
+
 def load_l10n_for_locale_profile(
-        i: int,
-        progress: spp._Printer,
-        locale: str, 
         profile: str, 
-        data, 
-        entries: dict[str, LocalizationEntry]) -> tuple[int, str | None]:
-    """Load actor localization for a specific locale and profile"""
-    entries_data, err = u.sfget(data, "entries", dict)
-    if err: 
-        return 0, f"failed to load {locale}/ActorType/{profile}: {err}"
-    actor_names = set()
-    for entry_name, entry_data in entries_data.items():
-        actor_name = None
+        parsed: msgstore.Localizations) -> tuple[dict[str, LocalizationStrings], str | None]:
+    """Load actor localization for a specific locale and profile, from the parsed entries"""
+    out: dict[str, LocalizationStrings] = {}
+    for entry_name, (text, attr, err) in parsed.items():
         if entry_name.endswith("_Name"):
             actor_name = entry_name[:-5]
-            text, attr, err = msyt.parse_localization(entry_data, True )
-            if err: return 0, f"{profile} {actor_name}: {err}"
-            strings = ensure_l10n_entry(entries, profile, actor_name, locale)
+            if err: return {}, f"{profile} {actor_name}: {err}"
+            strings = ensure_l10n_strings(out, actor_name)
             strings.name = text
-            strings.name_attr = attr
+            strings.name_attr = sys.intern(attr)
         elif entry_name.endswith("_Desc"):
             actor_name = entry_name[:-5]
-            text, attr, err = msyt.parse_localization(entry_data, False )
-            if err: return 0, f"{profile} {actor_name}: {err}"
-            strings = ensure_l10n_entry(entries, profile, actor_name, locale)
+            if err: return {}, f"{profile} {actor_name}: {err}"
+            strings = ensure_l10n_strings(out, actor_name)
             strings.desc = text
         elif entry_name.endswith("_PictureBook"):
             actor_name = entry_name[:-13]
-            text, attr, err = msyt.parse_localization(entry_data, False )
-            if err: return 0, f"{profile} {actor_name}: {err}"
-            strings = ensure_l10n_entry(entries, profile, actor_name, locale)
+            if err: return {}, f"{profile} {actor_name}: {err}"
+            strings = ensure_l10n_strings(out, actor_name)
             strings.album_desc = text
+    return out, None
 
-        if actor_name:
-            actor_names.add(actor_name)
-            progress.print(i + len(actor_names), actor_name)
-    return len(actor_names), None
+def ensure_l10n_strings(strings: dict[str, LocalizationStrings], actor: str) -> LocalizationStrings:
+    if actor not in strings:
+        strings[actor] = LocalizationStrings(None, None, None, None)
+    return strings[actor]
+
+def merge_actor_localization(files: list[tuple[str, str, dict[str, LocalizationStrings]]]) -> dict[str, LocalizationEntry]:
+    """
+    Merge (locale, profile, actor -> strings) from each file into actor -> LocalizationEntry
 
-def ensure_l10n_entry(entries: dict[str, LocalizationEntry], profile: str, actor: str, locale: str) -> LocalizationStrings:
+    If files for the same locale have the same actor, each entry in a later file
+    replaces the one from the earlier files
+    """
+    entries = {}
+    for locale, profile, strings in files:
+        for actor, s in strings.items():
+            entry = ensure_l10n_entry(entries, profile, actor)
+            merged = entry.strings[locale]
+            if merged is EMPTY_L10N_STRINGS:
+                merged = LocalizationStrings()
+                entry.strings[locale] = merged
+            if s.name is not None:
+                merged.name = s.name
+                merged.name_attr = s.name_attr
+            if s.desc is not None:
+                merged.desc = s.desc
+            if s.album_desc is not None:
+                merged.album_desc = s.album_desc
+    return entries
+
+def ensure_l10n_entry(entries: dict[str, LocalizationEntry], profile: str, actor: str) -> LocalizationEntry:
     if actor not in entries:
         strings = {}
         for l in msyt.locale_map:
-            strings[l] = LocalizationStrings()
+            strings[l] = EMPTY_L10N_STRINGS
         entries[actor] = LocalizationEntry(profile, strings)
-    entry = entries[actor]
-    return entry.strings[locale]
+    return entries[actor]
+
+@dataclass
+class Sources:
+    """Source files of link_actors, in the order they are loaded"""
+    actor_links: list[str]
+    gparamlists: list[str]
+    # (locale, path), in locale_map order
+    l10n: list[tuple[str, str]]
+    # path -> (mtime_ns, size)
+    signatures: dict[str, tuple[int, int]]
+
+def l10n_dir(messages_dir: str, locale_nin: str) -> str:
+    return os.path.join(messages_dir, f"Msg_{locale_nin}.product.sarc", "ActorType")
+
+def source_dirs(actor_link_dir: str, gparam_dir: str, messages_dir: str) -> list[str]:
+    dirs = [actor_link_dir, gparam_dir]
+    for locale_nin in msyt.locale_map.values():
+        dirs.append(l10n_dir(messages_dir, locale_nin))
+    return dirs
+
+def scan_sources(actor_link_dir: str, gparam_dir: str, messages_dir: str) -> tuple[Sources, str | None]:
+    def scan(d: str) -> list[str]:
+        # the messages can be in SARC archives
+        return [os.path.join(d, f) for f in sarc.listdir(d)]
+
+    try:
+        actor_links = prefer_binary(scan(actor_link_dir), ".bxml", actor_link_name)
+        gparamlists = prefer_binary(scan(gparam_dir), ".bgparamlist", gparamlist_user)
+        l10n = []
+        for locale, locale_nin in msyt.locale_map.items():
+            for path in prefer_binary(scan(l10n_dir(messages_dir, locale_nin)), ".msbt", l10n_profile):
+                l10n.append((locale, path))
+        # only the files that are loaded, so a skipped YAML file is dirty
+        # (and not in the cache) when its binary file is removed
+        signatures = {}
+        for path in actor_links + gparamlists + [p for _, p in l10n]:
+            signatures[path] = sarc.stat(path)
+    except OSError as e:
+        return None, str(e) # type: ignore
+
+    return Sources(actor_links, gparamlists, l10n, signatures), None
+
+def prefer_binary(paths: list[str], binary_ext: str, get_name) -> list[str]:
+    """Skip the YAML conversion of a file if the binary file is also there"""
+    binary_names = set(get_name(p)[0] for p in paths if p.endswith(binary_ext))
+    return [p for p in paths if p.endswith(binary_ext) or get_name(p)[0] not in binary_names]
+
+def is_source_newer(cache_path: str, dirs: list[str]) -> bool:
+    """Check if any file in the source directories was added, removed or changed after the cache was saved"""
+    if not os.path.exists(cache_path):
+        return True
+    cache_mtime = os.stat(cache_path).st_mtime_ns
+    try:
+        for d in dirs:
+            if sarc.stat(d)[0] > cache_mtime:
+                return True
+            for f in sarc.listdir(d):
+                if sarc.stat(os.path.join(d, f))[0] > cache_mtime:
+                    return True
+    except OSError:
+        return True
+    return False
+
+@dataclass
+class LinkOptions:
+    """Output modes of link_actors, changing them rebuilds all actors"""
+    # Save each GParamList once to output/GParamList/<user>.yaml,
+    # and reference it by name from the actor
+    shared_gparams: bool = False
+    # Save localization to output/Localization/<locale>.yaml keyed by actor,
+    # and reference it by actor name from the actor
+    split_l10n: bool = False
+    # Stream the join through partitioned spill files instead of keeping
+    # all sources in memory. Always rebuilds everything
+    low_memory: bool = False
+
+# Bump if the cached data changes shape
+LINK_CACHE_VERSION = 6
+
+# The modules the cached data goes through. The cache is rebuilt
+# if the source of any of them changes
+LINK_CACHE_MODULES = [sys.modules[__name__], u, a, aamp, msyt, msbt, msgstore, sarc]
+
+class LinkCache:
+    """Parsed sources from the last run, and the sources each output actor depends on"""
+    gpks: list[Gpk]
+    # path -> (mtime_ns, size)
+    signatures: dict[str, tuple[int, int]]
+    # path -> parsed data
+    actor_links: dict[str, ActorLink]
+    gparamlists: dict[str, tuple[str, list[tuple[str, Any]]]]
+    l10n: dict[str, tuple[str, str, dict[str, LocalizationStrings]]]
+    # actor -> ActorLink, GParamList and localization paths
+    deps: dict[str, list[str]]
+
+    def __init__(self, gpks: list[Gpk]):
+        self.gpks = gpks
+        self.signatures = {}
+        self.actor_links = {}
+        self.gparamlists = {}
+        self.l10n = {}
+        self.deps = {}
+
+def link_cache_header(options: LinkOptions) -> tuple:
+    """
+    The header is pickled before the cache, so it can be checked
+    without loading the whole cache
+    """
+    return (LINK_CACHE_VERSION, link_cache_code_hash(), options)
+
+def link_cache_code_hash() -> str:
+    """Hash of the source of LINK_CACHE_MODULES"""
+    h = hashlib.blake2b(digest_size=16)
+    for module in LINK_CACHE_MODULES:
+        with open(module.__file__, "rb") as f:
+            data = f.read()
+        h.update(f"{module.__name__}:{len(data)}:".encode("utf-8"))
+        h.update(data)
+    return h.hexdigest()
 
-def save_output(actors, gparamlists, localization, actor_output_dir) -> str | None:
-    if os.path.exists(actor_output_dir):
-        shutil.rmtree(actor_output_dir)
-    os.makedirs(actor_output_dir)
+def is_link_cache_compatible(cache_path: str, options: LinkOptions) -> bool:
+    try:
+        with open(cache_path, "rb") as f:
+            return pickle.load(f) == link_cache_header(options)
+    except Exception:
+        return False
 
-    progress = spp.printer(len(actors), "Saving Actor files")
+def load_link_cache(cache_path: str, gpks: list[Gpk], options: LinkOptions, actor_output_dir: str) -> LinkCache | None:
+    """Load the cache from the last run, or None if everything needs to be rebuilt"""
+    if not os.path.exists(cache_path) or not os.path.isdir(actor_output_dir):
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            if pickle.load(f) != link_cache_header(options):
+                return None
+            cache = pickle.load(f)
+    except Exception as e:
+        print(f"Ignoring invalid cache {u.relpath(cache_path)}: {e}")
+        return None
+    if not isinstance(cache, LinkCache) or cache.gpks != gpks:
+        return None
+    return cache
+
+def save_link_cache(cache_path: str, cache: LinkCache, options: LinkOptions) -> str | None:
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temp_path = cache_path + ".tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            pickle.dump(link_cache_header(options), f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(cache, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except Exception as e:
+        return f"failed to save {u.relpath(cache_path)}: {e}"
+    return None
+
+def link_actors(
+    keys: list[Gpk],
+    sources: Sources,
+    cache: LinkCache | None,
+    options: LinkOptions,
+    actor_output_dir: str,
+    gparamlist_output_dir: str,
+    l10n_output_dir: str,
+    cache_path: str,
+) -> str | None:
+    """
+    Load the sources that changed since the cache was saved,
+    and save the actors that depend on them.
+
+    Without a cache, everything is loaded and saved
+    """
+    dirty = set()
+    for path, signature in sources.signatures.items():
+        if cache is None or cache.signatures.get(path) != signature:
+            dirty.add(path)
+    if cache is not None:
+        for path in cache.signatures:
+            if path not in sources.signatures:
+                dirty.add(path)
 
-    for (i, (actor_name, actor)) in enumerate(actors.items()):
+    actor_links, err = load_actor_links([p for p in sources.actor_links if p in dirty])
+    if err: return err
+    gparamlists, err = load_gparamlist_files(keys, [p for p in sources.gparamlists if p in dirty])
+    if err: return err
+    l10n_files, err = load_l10n_files([(l, p) for l, p in sources.l10n if p in dirty])
+    if err: return err
+
+    new_cache = LinkCache(keys)
+    new_cache.signatures = sources.signatures
+    for path in sources.actor_links:
+        new_cache.actor_links[path] = actor_links[path] if path in dirty else cache.actor_links[path] # type: ignore
+    for path in sources.gparamlists:
+        new_cache.gparamlists[path] = gparamlists[path] if path in dirty else cache.gparamlists[path] # type: ignore
+    for _, path in sources.l10n:
+        new_cache.l10n[path] = l10n_files[path] if path in dirty else cache.l10n[path] # type: ignore
+
+    actors = {}
+    for path in sources.actor_links:
+        actor = new_cache.actor_links[path]
+        actors[actor.actor] = actor
+    gparamlist_by_user = {}
+    gparamlist_paths = {}
+    for path in sources.gparamlists:
+        name, entries = new_cache.gparamlists[path]
+        gparamlist_by_user[name] = entries
+        gparamlist_paths[name] = path
+    localization = merge_actor_localization([new_cache.l10n[p] for _, p in sources.l10n])
+
+    l10n_paths = {}
+    for _, path in sources.l10n:
+        for actor_name in new_cache.l10n[path][2]:
+            l10n_paths.setdefault(actor_name, []).append(path)
+    for path in sources.actor_links:
+        actor = new_cache.actor_links[path]
+        deps = [path]
+        if actor.gparamlist in gparamlist_paths and not options.shared_gparams:
+            deps.append(gparamlist_paths[actor.gparamlist])
+        deps.extend(l10n_paths.get(actor.actor, []))
+        new_cache.deps[actor.actor] = deps
+
+    if cache is None:
+        # the old cache would be wrong if this run doesn't finish
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        u.clean_dir(actor_output_dir)
+        if options.shared_gparams:
+            u.clean_dir(gparamlist_output_dir)
+        elif os.path.exists(gparamlist_output_dir):
+            shutil.rmtree(gparamlist_output_dir)
+        if options.split_l10n:
+            u.clean_dir(l10n_output_dir)
+        elif os.path.exists(l10n_output_dir):
+            shutil.rmtree(l10n_output_dir)
+        to_save = list(actors)
+    else:
+        to_save = []
+        for actor_name, deps in new_cache.deps.items():
+            old_deps = cache.deps.get(actor_name)
+            if old_deps is None or any(p in dirty for p in deps) or any(p in dirty for p in old_deps):
+                to_save.append(actor_name)
+        for actor_name in cache.deps:
+            if actor_name not in new_cache.deps:
+                actor_path = os.path.join(actor_output_dir, f"{actor_name}.yaml")
+                if os.path.exists(actor_path):
+                    os.remove(actor_path)
+        print(f"{len(dirty)} sources changed, saving {len(to_save)} of {len(actors)} actors")
+
+    if options.shared_gparams:
+        err = save_shared_gparamlists(actors, gparamlist_by_user, gparamlist_paths, cache, dirty, gparamlist_output_dir)
+        if err: return err
+
+    if options.split_l10n:
+        err = save_l10n_tables(actors, localization, sources, cache, dirty, l10n_output_dir)
+        if err: return err
+
+    err = save_output(actors, gparamlist_by_user, localization, options, actor_output_dir, to_save)
+    if err: return err
+
+    if cache is not None and dirty:
+        # tasks that read the output directory only check the mtime of the first file
+        files = sorted(os.listdir(actor_output_dir))
+        if files:
+            os.utime(os.path.join(actor_output_dir, files[0]))
+
+    return save_link_cache(cache_path, new_cache, options)
+
+# Number of actors joined and saved at a time in low memory mode
+LOW_MEMORY_PARTITION_SIZE = 256
+
+class SpillFiles:
+    """Records pickled to one append-only file per partition"""
+    def __init__(self, spill_dir: str, name: str, count: int):
+        self.paths = [os.path.join(spill_dir, f"{name}.{i}") for i in range(count)]
+        self.files = [open(path, "wb") for path in self.paths]
+
+    def write(self, partition: int, record):
+        pickle.dump(record, self.files[partition], pickle.HIGHEST_PROTOCOL)
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+    def read(self, partition: int):
+        """Read back the records of a partition, in the order they were written"""
+        with open(self.paths[partition], "rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    break
+        os.remove(self.paths[partition])
+
+def link_actors_low_memory(
+    keys: list[Gpk],
+    sources: Sources,
+    options: LinkOptions,
+    actor_output_dir: str,
+    gparamlist_output_dir: str,
+    l10n_output_dir: str,
+    cache_path: str,
+) -> str | None:
+    """
+    Link all actors without keeping all sources in memory
+
+    The actors are split into ranges of sorted names. ActorLinks are joined with
+    GParamLists through spill files partitioned by GParamUser, then the result and
+    the localization are spilled by actor range, and each range is saved on its own.
+    Only one partition (plus one source file being parsed) is in memory at a time
+    """
+    # actor names are the ActorLink file names
+    actor_names = sorted(actor_link_name(p)[0] for p in sources.actor_links)
+    bounds = actor_names[::LOW_MEMORY_PARTITION_SIZE] or [""]
+    count = len(bounds)
+    def actor_partition(actor_name: str) -> int:
+        return max(0, bisect.bisect_right(bounds, actor_name) - 1)
+    def user_partition(user: str) -> int:
+        return u.crc32(user) % count
+
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+    u.clean_dir(actor_output_dir)
+    for output_dir, enabled in ((gparamlist_output_dir, options.shared_gparams), (l10n_output_dir, options.split_l10n)):
+        if enabled:
+            u.clean_dir(output_dir)
+        elif os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+    spill_dir = os.path.join(os.path.dirname(cache_path), "link_actors.spill")
+    u.clean_dir(spill_dir)
+
+    err = spill_and_save(keys, sources, options, actor_output_dir, gparamlist_output_dir, l10n_output_dir, spill_dir, count, actor_partition, user_partition)
+    shutil.rmtree(spill_dir)
+    if err: return err
+
+    # no sources are cached, the header is only used to check if the outputs are up-to-date
+    return save_link_cache(cache_path, LinkCache(keys), options)
+
+def spill_and_save(
+    keys: list[Gpk],
+    sources: Sources,
+    options: LinkOptions,
+    actor_output_dir: str,
+    gparamlist_output_dir: str,
+    l10n_output_dir: str,
+    spill_dir: str,
+    count: int,
+    actor_partition,
+    user_partition,
+) -> str | None:
+    links_by_user = SpillFiles(spill_dir, "links", count)
+    gparamlists_by_user = SpillFiles(spill_dir, "gparamlists", count)
+    # (ActorLink, GParams | None)
+    joined = SpillFiles(spill_dir, "joined", count)
+    # (locale, profile, actor, strings)
+    l10n = SpillFiles(spill_dir, "l10n", count)
+
+    errors = []
+    users = set()
+    progress = spp.printer(len(sources.actor_links), "Link Actors")
+    with u.pool() as pool:
+        for i, (actor, err) in enumerate(pool.imap(load_actor_link, sources.actor_links)):
+            if err or not actor:
+                progress.update(i)
+                errors.append(err or "load_actor_link returned None")
+                continue
+            progress.print(i, actor.actor)
+            actor.intern()
+            if actor.gparamlist:
+                users.add(actor.gparamlist)
+                links_by_user.write(user_partition(actor.gparamlist), actor)
+            else:
+                joined.write(actor_partition(actor.actor), (actor, None))
+    progress.done()
+    links_by_user.close()
+    err = u.check_errors(errors)
+    if err: return err
+
+    progress = spp.printer(len(sources.gparamlists), "Load GParamLists")
+    with u.pool() as pool:
+        for i, ((user, entries), err) in enumerate(
+            pool.imap(load_gparamlist_file_shim, [(keys, p) for p in sources.gparamlists])):
+            if err:
+                progress.update(i)
+                errors.append(err)
+                continue
+            progress.print(i, user)
+            if user in users:
+                gparamlists_by_user.write(user_partition(user), (user, entries))
+    progress.done()
+    gparamlists_by_user.close()
+    err = u.check_errors(errors)
+    if err: return err
+
+    progress = spp.printer(count, "Join GParamLists")
+    for i in range(count):
+        progress.update(i)
+        gparamlists = dict(gparamlists_by_user.read(i))
+        for actor in links_by_user.read(i):
+            err = u.ensure(actor.gparamlist in gparamlists, f"GParamList {actor.gparamlist} not found for {actor.actor}")
+            if err: return err
+            joined.write(actor_partition(actor.actor), (actor, gparamlists[actor.gparamlist]))
+        if options.shared_gparams:
+            for user, entries in gparamlists.items():
+                with u.fopenw(os.path.join(gparamlist_output_dir, f"{user}.yaml")) as f:
+                    write_gparamlist(f, "", user, entries)
+    progress.done()
+    joined.close()
+
+    progress = spp.printer(len(sources.l10n), "Load localization")
+    for i, (locale, path) in enumerate(sources.l10n):
+        progress.print(i, f"{locale}: {os.path.basename(path)}")
+        profile, strings, err = load_l10n_file(locale, path)
+        if err: return err
+        for actor_name, s in strings.items():
+            l10n.write(actor_partition(actor_name), (locale, profile, actor_name, s))
+    progress.done()
+    l10n.close()
+
+    l10n_tables = {}
+    if options.split_l10n:
+        for locale in msyt.locale_map:
+            l10n_tables[locale] = u.fopenw(os.path.join(l10n_output_dir, f"{locale}.yaml"))
+    try:
+        for i in range(count):
+            actors = {}
+            gparamlists = {}
+            for actor, entries in joined.read(i):
+                actors[actor.actor] = actor
+                if entries is not None:
+                    gparamlists[actor.gparamlist] = entries
+            localization = merge_actor_localization(
+                [(locale, profile, {actor_name: s}) for locale, profile, actor_name, s in l10n.read(i)])
+            actor_names = sorted(actors)
+            err = save_output(actors, gparamlists, localization, options, actor_output_dir, actor_names)
+            if err: return err
+            for locale, f in l10n_tables.items():
+                write_l10n_table(f, locale, [a for a in actor_names if a in localization], localization)
+    finally:
+        for f in l10n_tables.values():
+            f.close()
+
+    return None
+
+def save_shared_gparamlists(
+    actors: dict[str, ActorLink],
+    gparamlists: dict[str, list[tuple[str, Any]]],
+    gparamlist_paths: dict[str, str],
+    cache: LinkCache | None,
+    dirty: set[str],
+    gparamlist_output_dir: str,
+) -> str | None:
+    """Save the GParamLists referenced by actors, each to its own file"""
+    users = set(actor.gparamlist for actor in actors.values() if actor.gparamlist)
+    old_users = set()
+    if cache is not None:
+        old_users = set(actor.gparamlist for actor in cache.actor_links.values() if actor.gparamlist)
+    for user in old_users - users:
+        path = os.path.join(gparamlist_output_dir, f"{user}.yaml")
+        if os.path.exists(path):
+            os.remove(path)
+
+    to_save = []
+    for user in sorted(users):
+        err = u.ensure(user in gparamlists, f"GParamList {user} not found")
+        if err: return err
+        if user not in old_users or gparamlist_paths[user] in dirty:
+            to_save.append(user)
+
+    progress = spp.printer(len(to_save), "Saving GParamList files")
+    for (i, user) in enumerate(to_save):
+        progress.print(i, user)
+        with u.fopenw(os.path.join(gparamlist_output_dir, f"{user}.yaml")) as f:
+            write_gparamlist(f, "", user, gparamlists[user])
+    progress.done()
+
+    return None
+
+def write_gparamlist(f, indent: str, user: str, entries: list[tuple[str, Any]]):
+    f.write(f"{indent}user: {user}\n")
+    f.write(f"{indent}# ---\n")
+    for key, value in entries:
+        if isinstance(value, list):
+            data = json.dumps(value)
+            f.write(f"{indent}{key}: {data}\n")
+        else:
+            data = yaml.dump({key: value})
+            f.write(f"{indent}{data}")
+            if not data.endswith("\n"):
+                f.write("\n")
+
+def save_l10n_tables(
+    actors: dict[str, ActorLink],
+    localization: dict[str, LocalizationEntry],
+    sources: Sources,
+    cache: LinkCache | None,
+    dirty: set[str],
+    l10n_output_dir: str,
+) -> str | None:
+    """Save the localization of all actors to one file per locale"""
+    actor_names = sorted(a for a in actors if a in localization)
+    for actor_name in actor_names:
+        err = u.ensure(localization[actor_name].profile == actors[actor_name].profile, f"Profile mismatch for {actor_name}")
+        if err: return err
+
+    # the tables need to be saved again if any actor or any file of the locale changed
+    if cache is None:
+        locales = list(msyt.locale_map)
+    else:
+        link_paths = sources.actor_links + list(cache.actor_links)
+        l10n_paths = sources.l10n + [(l, p) for p, (l, _, _) in cache.l10n.items()]
+        actors_changed = any(p in dirty for p in link_paths)
+        locales = []
+        for locale in msyt.locale_map:
+            if actors_changed or any(p in dirty for l, p in l10n_paths if l == locale):
+                locales.append(locale)
+
+    progress = spp.printer(len(locales), "Saving Localization files")
+    for (i, locale) in enumerate(locales):
+        progress.print(i, locale)
+        with u.fopenw(os.path.join(l10n_output_dir, f"{locale}.yaml")) as f:
+            write_l10n_table(f, locale, actor_names, localization)
+    progress.done()
+
+    return None
+
+def write_l10n_table(f, locale: str, actor_names: list[str], localization: dict[str, LocalizationEntry]):
+    for actor_name in actor_names:
+        # quoted, so the key is always a string
+        f.write(f"{json.dumps(actor_name)}:\n")
+        write_l10n_strings(f, "  ", localization[actor_name].strings[locale])
+
+def write_l10n_strings(f, indent: str, strings: LocalizationStrings):
+    name = json.dumps(strings.name)
+    name_attr = json.dumps(strings.name_attr)
+    f.write(f"{indent}name:\n")
+    f.write(f"{indent}  text: {name}\n")
+    f.write(f"{indent}  attr: {name_attr}\n")
+    desc = json.dumps(strings.desc)
+    f.write(f"{indent}desc: {desc}\n")
+    album_desc = json.dumps(strings.album_desc)
+    f.write(f"{indent}album_desc: {album_desc}\n")
+
+def save_output(actors, gparamlists, localization, options: LinkOptions, actor_output_dir, actor_names: list[str]) -> str | None:
+    progress = spp.printer(len(actor_names), "Saving Actor files")
+
+    for (i, actor_name) in enumerate(actor_names):
         progress.print(i, actor_name)
+        actor = actors[actor_name]
         with u.fopenw(os.path.join(actor_output_dir, f"{actor_name}.yaml")) as f:
             f.write(f"actor: {actor_name}\n")
             f.write(f"name_jpn: {actor.name_jpn}\n")
@@ -381,18 +1072,15 @@ def save_output(actors, gparamlists, localization, actor_output_dir) -> str | No
             else:
                 f.write("model: null\n")
             if actor.gparamlist:
-                f.write(f"gparamlist:\n")
-                f.write(f"  user: {actor.gparamlist}\n")
-                f.write(f"  # ---\n")
-                for key, value in gparamlists[actor.gparamlist]:
-                    if isinstance(value, list):
-                        data = json.dumps(value)
-                        f.write(f"  {key}: {data}\n")
-                    else:
-                        data = yaml.dump({key: value})
-                        f.write(f"  {data}")
-                        if not data.endswith("\n"):
-                            f.write("\n")
+                err = u.ensure(actor.gparamlist in gparamlists, f"GParamList {actor.gparamlist} not found for {actor_name}")
+                if err: return err
+                if options.shared_gparams:
+                    # output/GParamList/<user>.yaml
+                    user = json.dumps(actor.gparamlist)
+                    f.write(f"gparamlist: {user}\n")
+                else:
+                    f.write(f"gparamlist:\n")
+                    write_gparamlist(f, "  ", actor.gparamlist, gparamlists[actor.gparamlist])
             else:
                 f.write("gparamlist: {}\n")
             if actor.profile:
@@ -403,19 +1091,14 @@ def save_output(actors, gparamlists, localization, actor_output_dir) -> str | No
                 l = localization[actor_name]
                 err = u.ensure(l.profile == actor.profile, f"Profile mismatch for {actor_name}")
                 if err: return err
-                f.write("localization:\n")
-                for locale in msyt.locale_map:
-                    f.write(f"  {locale}:\n")
-                    strings = l.strings[locale]
-                    name = json.dumps(strings.name)
-                    name_attr = json.dumps(strings.name_attr)
-                    f.write(f"    name:\n")
-                    f.write(f"      text: {name}\n")
-                    f.write(f"      attr: {name_attr}\n")
-                    desc = json.dumps(strings.desc)
-                    f.write(f"    desc: {desc}\n")
-                    album_desc = json.dumps(strings.album_desc)
-                    f.write(f"    album_desc: {album_desc}\n")
+                if options.split_l10n:
+                    # output/Localization/<locale>.yaml
+                    f.write(f"localization: {json.dumps(actor_name)}\n")
+                else:
+                    f.write("localization:\n")
+                    for locale in msyt.locale_map:
+                        f.write(f"  {locale}:\n")
+                        write_l10n_strings(f, "    ", l.strings[locale])
             else:
                 f.write("localization: null\n")
 
@@ -7,6 +7,7 @@ import util as u
 import task as t
 import spp
 import msyt
+import msgstore
 
 def task():
     inputs = {
@@ -20,9 +21,11 @@ def task():
     }
 
     def run(_, outputs):
-        err = save_special_status(outputs["special_status_dir"])
+        special_status_localization, cook_effect_localization, err = load_static_msgs()
         if err: return err
-        err = save_cook_effects(outputs["cook_effect_dir"], inputs["cook_system_path"])
+        err = save_special_status(outputs["special_status_dir"], special_status_localization)
+        if err: return err
+        err = save_cook_effects(outputs["cook_effect_dir"], inputs["cook_system_path"], cook_effect_localization)
         if err: return err
 
         return None
@@ -126,32 +129,78 @@ def get_weapon_modifier_for_special_status(special_status):
 def _static_msg_file(locale_nin, file):
     return u.botw("Message", f"Msg_{locale_nin}.product.sarc", "StaticMsg", file)
 
-def save_special_status(special_status_dir: str) -> str | None:
-    progress = spp.printer(0, "Load SpecialStatus.msyt")
-    count = 0
+SPECIAL_STATUS_MSG = "SpecialStatus.msyt"
+COOK_EFFECT_MSG = "CookEffect.msyt"
+
+def load_static_msgs() -> tuple[dict, dict, str | None]:
+    """
+    Load SpecialStatus and CookEffect localization for all locales.
+    The files are loaded in parallel, then merged into
+
+    special status -> locale -> text
+    cook effect -> locale -> name/desc/...
+    """
+    jobs = []
+    for file in (SPECIAL_STATUS_MSG, COOK_EFFECT_MSG):
+        for locale, locale_nin in msyt.locale_map.items():
+            jobs.append((file, locale, locale_nin))
     special_status_localization = {}
-    for locale, locale_nin in msyt.locale_map.items():
-        data, err = u.fyaml(_static_msg_file(locale_nin, "SpecialStatus.msyt"))
-        if err: return err
-        entries_data, err = u.sfget(data, "entries", dict)
-        if err: return err
-        for name, data in entries_data.items():
-            err = u.ensure(name.endswith("_Name"), f"SpecialStatus entry must end in _Name: {name}")
-            if err: return err
-            special_status_name = name[:-5]
-            count += 1
-            progress.print(count, f"{locale}: {special_status_name}")
-            if special_status_name not in special_status_localization:
-                special_status_localization[special_status_name] = {}
-            text, _, err = msyt.parse_localization(data, False)
-            if err: return err
-            special_status_localization[special_status_name][locale] = text
+    cook_effect_localization = {}
+    errors = []
+    progress = spp.printer(len(jobs), "Load StaticMsg")
+    with u.pool() as pool:
+        for i, (file, locale, result, err) in enumerate(pool.imap_unordered(load_static_msg, jobs)):
+            if err:
+                errors.append(err)
+                progress.update(i)
+                continue
+            progress.print(i, f"{locale}: {file}")
+            if file == SPECIAL_STATUS_MSG:
+                for special_status_name, text in result.items():
+                    if special_status_name not in special_status_localization:
+                        special_status_localization[special_status_name] = {}
+                    special_status_localization[special_status_name][locale] = text
+            else:
+                for effect_name, data in result.items():
+                    if effect_name not in cook_effect_localization:
+                        cook_effect_localization[effect_name] = {}
+                        for l in msyt.locale_map:
+                            cook_effect_localization[effect_name][l] = {}
+                    cook_effect_localization[effect_name][locale] = data
+    progress.done()
+
+    err = u.check_errors(errors)
+    if err: return {}, {}, err
+    return special_status_localization, cook_effect_localization, None
+
+def load_static_msg(job: tuple[str, str, str]) -> tuple[str, str, dict, str | None]:
+    """Load one StaticMsg file for one locale (in a worker process)"""
+    file, locale, locale_nin = job
+    parsed, err = msgstore.fload_localizations(_static_msg_file(locale_nin, file))
+    if err: return file, locale, {}, err
+    if file == SPECIAL_STATUS_MSG:
+        result, err = parse_special_status(parsed)
+    else:
+        result, err = parse_cook_effects(parsed)
+    if err: return file, locale, {}, f"{locale}: {err}"
+    return file, locale, result, None
+
+def parse_special_status(parsed: msgstore.Localizations) -> tuple[dict[str, str], str | None]:
+    """Return special status -> text"""
+    out = {}
+    for name, (text, _, text_err) in parsed.items():
+        err = u.ensure(name.endswith("_Name"), f"SpecialStatus entry must end in _Name: {name}")
+        if err: return {}, err
+        if text_err: return {}, text_err
+        out[name[:-5]] = text
+    return out, None
+
+def save_special_status(special_status_dir: str, special_status_localization: dict) -> str | None:
     # Patch the localization for SurfMaster in the Chinese languages
     # The game file just uses the JP translation since the effect is unused
     special_status_localization["SurfMaster"]["zh-CN"] = "\u76fe\u6ed1\u884c\u63d0\u5347"
     special_status_localization["SurfMaster"]["zh-TW"] = "\u76fe\u6ed1\u884c\u63d0\u5347"
 
-    progress.done()
     u.clean_dir(special_status_dir)
     for special_status in SPECIAL_STATUS_TABLE:
         with u.fopenw(os.path.join(special_status_dir, f"{special_status}.yaml")) as f:
@@ -195,77 +244,61 @@ localization:
     print(f"Saved {len(SPECIAL_STATUS_TABLE) + 1} SpecialStatus")
     return None
 
-def save_cook_effects(cook_effect_dir: str, cook_system_path: str) -> str | None:
-    progress = spp.printer(0, "Load CookEffect.msyt")
-    count = 0
-    cook_effect_localization = {}
-    for locale, locale_nin in msyt.locale_map.items():
-        data, err = u.fyaml(_static_msg_file(locale_nin, "CookEffect.msyt"))
-        if err: return err
-        entries_data, err = u.sfget(data, "entries", dict)
-        if err: return err
-        for name, data in entries_data.items():
-            count += 1
-            progress.print(count, f"{locale}: {name}")
-            parts = name.split("_", 1)
-            effect_name = parts[0]
-            rest = parts[1] if len(parts) > 1 else ""
-            if effect_name not in cook_effect_localization:
-                cook_effect_localization[effect_name] = {}
-                for l in msyt.locale_map:
-                    cook_effect_localization[effect_name][l] = {}
-            if rest == "Name":
-                text, _, err = msyt.parse_localization(data, False)
-                if err:
-                    return f"error parsing localization for {name}: {err}"
-                cook_effect_localization[effect_name][locale]["name"] = text
-            elif rest == "Name_Feminine":
-                text, _, err = msyt.parse_localization(data, False)
-                if err:
-                    return f"error parsing localization for {name}: {err}"
-                cook_effect_localization[effect_name][locale]["name_feminine"] = text
-            elif rest == "Name_Masculine":
-                text, _, err = msyt.parse_localization(data, False)
-                if err:
-                    return f"error parsing localization for {name}: {err}"
-                cook_effect_localization[effect_name][locale]["name_masculine"] = text
-            elif rest == "Name_Neuter":
-                text, _, err = msyt.parse_localization(data, False)
-                if err:
-                    return f"error parsing localization for {name}: {err}"
-                cook_effect_localization[effect_name][locale]["name_neuter"] = text
-            elif rest == "Name_Plural":
-                text, _, err = msyt.parse_localization(data, False)
-                if err:
-                    return f"error parsing localization for {name}: {err}"
-                cook_effect_localization[effect_name][locale]["name_plural"] = text
-            elif rest.startswith("Desc"):
-                parts = rest.split("_", 1)
-                desc_level = (int(parts[1]) - 1) if len(parts) > 1 else 0
-                if "desc" not in cook_effect_localization[effect_name][locale]:
-                    cook_effect_localization[effect_name][locale]["desc"] = []
-                desc_array = cook_effect_localization[effect_name][locale]["desc"]
-                if len(desc_array) <= desc_level:
-                    desc_array.extend([""] * (desc_level - len(desc_array) + 1))
-                text, _, err = msyt.parse_localization(data, False)
-                if err:
-                    return f"error parsing localization for {name}: {err}"
-                desc_array[desc_level] = text
-            elif rest.startswith("MedicineDesc"):
-                parts = rest.split("_", 1)
-                desc_level = (int(parts[1]) - 1) if len(parts) > 1 else 0
-                if "elixir_desc" not in cook_effect_localization[effect_name][locale]:
-                    cook_effect_localization[effect_name][locale]["elixir_desc"] = []
-                desc_array = cook_effect_localization[effect_name][locale]["elixir_desc"]
-                if len(desc_array) <= desc_level:
-                    desc_array.extend([""] * (desc_level - len(desc_array) + 1))
-                text, _, err = msyt.parse_localization(data, False)
-                desc_array[desc_level] = text
-            else:
-                return f"Unknown cook effect entry in {name}"
-
-    progress.done()
+def parse_cook_effects(parsed: msgstore.Localizations) -> tuple[dict[str, dict], str | None]:
+    """Return effect name -> name/desc/..."""
+    out = {}
+    for name, (text, _, err) in parsed.items():
+        parts = name.split("_", 1)
+        effect_name = parts[0]
+        rest = parts[1] if len(parts) > 1 else ""
+        if effect_name not in out:
+            out[effect_name] = {}
+        data = out[effect_name]
+        if rest == "Name":
+            if err:
+                return {}, f"error parsing localization for {name}: {err}"
+            data["name"] = text
+        elif rest == "Name_Feminine":
+            if err:
+                return {}, f"error parsing localization for {name}: {err}"
+            data["name_feminine"] = text
+        elif rest == "Name_Masculine":
+            if err:
+                return {}, f"error parsing localization for {name}: {err}"
+            data["name_masculine"] = text
+        elif rest == "Name_Neuter":
+            if err:
+                return {}, f"error parsing localization for {name}: {err}"
+            data["name_neuter"] = text
+        elif rest == "Name_Plural":
+            if err:
+                return {}, f"error parsing localization for {name}: {err}"
+            data["name_plural"] = text
+        elif rest.startswith("Desc"):
+            parts = rest.split("_", 1)
+            desc_level = (int(parts[1]) - 1) if len(parts) > 1 else 0
+            if "desc" not in data:
+                data["desc"] = []
+            desc_array = data["desc"]
+            if len(desc_array) <= desc_level:
+                desc_array.extend([""] * (desc_level - len(desc_array) + 1))
+            if err:
+                return {}, f"error parsing localization for {name}: {err}"
+            desc_array[desc_level] = text
+        elif rest.startswith("MedicineDesc"):
+            parts = rest.split("_", 1)
+            desc_level = (int(parts[1]) - 1) if len(parts) > 1 else 0
+            if "elixir_desc" not in data:
+                data["elixir_desc"] = []
+            desc_array = data["elixir_desc"]
+            if len(desc_array) <= desc_level:
+                desc_array.extend([""] * (desc_level - len(desc_array) + 1))
+            desc_array[desc_level] = text
+        else:
+            return {}, f"Unknown cook effect entry in {name}"
+    return out, None
 
+def save_cook_effects(cook_effect_dir: str, cook_system_path: str, cook_effect_localization: dict) -> str | None:
     system, err = u.fyaml(cook_system_path)
     if err: return err
     cei = system["cook_effect_index"]
@@ -8,6 +8,8 @@ import json
 import os
 import shutil
 import util as u
+import byml
+import hashreg
 import task as t
 import spp
 
@@ -84,6 +86,12 @@ def process_task(args) -> tuple[str, str | None]:
         if err: return output_name, err
 
     get_extras(output_name, output_data)
+    # flags of the same type are found by hash in the game
+    registry = hashreg.Registry()
+    for x in output_data:
+        registry.add(f"gamedata.{output_name}", x.name, u.relpath(output_file), x.hash)
+    err = registry.check()
+    if err: return output_name, err
     output_data.sort(key=lambda x: x.hash)
     save_flag_file(output_data, output_file, typ)
 
@@ -203,7 +211,7 @@ def process_file(
     is_array: bool,
     output_data: list[FlagData]
 ) -> str | None:
-    data, err = u.fyaml(input_file)
+    data, err = byml.fload_prefer_binary(input_file)
     if err: return err
     flag_array, err = u.sfget(data, top_prop_name, list)
     if err: return err
@@ -5,6 +5,8 @@ import os
 import util as u
 import task as t
 import spp
+import hashreg
+import phf
 
 def task():
     inputs = {
@@ -13,14 +15,15 @@ def task():
 
     outputs = {
         "tags_save_path": "output/tags.yaml",
+        "tags_table_path": "output/tags.phf",
     }
 
     def run(inputs, outputs):
-        return list_tags(inputs["actor_dir"], outputs["tags_save_path"])
+        return list_tags(inputs["actor_dir"], outputs["tags_save_path"], outputs["tags_table_path"])
 
     return t.task(__file__, inputs, outputs, run)
 
-def list_tags(actor_dir: str, tags_save_path: str) -> str | None:
+def list_tags(actor_dir: str, tags_save_path: str, tags_table_path: str) -> str | None:
     files = os.listdir(actor_dir)
     progress = spp.printer(len(files), "List tags")
     tags = set()
@@ -45,18 +48,20 @@ def list_tags(actor_dir: str, tags_save_path: str) -> str | None:
     err = u.check_errors(errors)
     if err: return err
 
-    hashs = set()
+    registry = hashreg.Registry()
+    registry.add_all("tag", tags, u.relpath(actor_dir))
+    err = registry.check()
+    if err: return err
 
     with u.fopenw(tags_save_path) as f:
         for tag in sorted(tags):
-            hash_num = u.crc32(tag)
-            hash = u.hex08(hash_num)
-            if hash_num in hashs:
-                return f"hash collision: {tag} {u.hex08(hash_num)}"
-            hashs.add(hash_num)
+            hash = u.hex08(u.crc32(tag))
             f.write(f"\"{hash}\": {tag}\n")
 
-    print(f"Saved {len(tags)} tags to {u.relpath(tags_save_path)}")
+    err = phf.save(tags_table_path, { u.crc32(tag): tag for tag in tags })
+    if err: return err
+
+    print(f"Saved {len(tags)} tags to {u.relpath(tags_save_path)} and {u.relpath(tags_table_path)}")
     return None
 
 
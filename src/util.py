@@ -124,9 +124,9 @@ def sfgetnullable[T](obj: Any, key: str, typ: type[T]) -> tuple[T | None, str |
         return None, f"invalid type: {key}" # type: ignore
     return x, None
 
-def pool():
+def pool(initializer = None, initargs = ()):
     import multiprocessing
-    return multiprocessing.Pool()
+    return multiprocessing.Pool(initializer=initializer, initargs=initargs)
 
 def check_errors(errors: list[str]) -> str | None:
     if not errors:
@@ -0,0 +1,87 @@
+"""
+A small botw directory (YAML conversions only) for link_actors
+"""
+
+import os
+import msyt
+
+DUMMY = """!io
+version: 0
+type: xml
+param_root: !list
+  objects:
+    General: !obj
+      Speed: 1.0
+      Life: 100
+    Item: !obj
+      BuyingPrice: 10
+      SellingPrice: 10
+    CureItem: !obj
+      HitPointRecover: 0
+      EffectType: !str64 None
+  lists: {}
+"""
+
+ACTOR_LINK = """!io
+version: 0
+type: xml
+param_root: !list
+  objects:
+    LinkTarget: !obj
+      ActorNameJpn: !str64 {actor}_jp
+      ProfileUser: !str64 Item
+      ModelUser: !str64 Dummy
+      GParamUser: !str64 {actor}
+    Tags: !obj {{Tag0: !str64 {tag}}}
+  lists: {{}}
+"""
+
+GPARAMLIST = """!io
+version: 0
+type: xml
+param_root: !list
+  objects:
+    General: !obj {{Speed: {speed}, Life: 100}}
+    Item: !obj {{BuyingPrice: {price}, SellingPrice: 10}}
+    CureItem: !obj {{HitPointRecover: {hp}, EffectType: !str64 None}}
+  lists: {{}}
+"""
+
+ACTORS = {
+    "Item_Fruit_A": { "tag": "CookFruit", "speed": 0.3, "price": 12, "hp": 4 },
+    "Item_Meat_01": { "tag": "CookMeat", "speed": 1.0, "price": 32, "hp": 8 },
+    "Item_Mushroom_A": { "tag": "CookMushroom", "speed": 123456.79, "price": 20, "hp": 2 },
+}
+
+def l10n_text(locale: str, actors: dict) -> str:
+    lines = ["entries:"]
+    for actor in actors:
+        lines.append(f"  {actor}_Name:")
+        lines.append(f"    contents:")
+        lines.append(f"      - text: '{actor} [{locale}]'")
+        lines.append(f"  {actor}_Desc:")
+        lines.append(f"    contents:")
+        lines.append(f"      - text: 'About {actor}'")
+    return "\n".join(lines) + "\n"
+
+def make_botw(root: str) -> tuple[str, str, str, str]:
+    """Write the tree, return (ActorLink dir, GeneralParamList dir, Message dir, Dummy path)"""
+    actor_link_dir = os.path.join(root, "Actor", "ActorLink")
+    gparam_dir = os.path.join(root, "Actor", "GeneralParamList")
+    messages_dir = os.path.join(root, "Message")
+    os.makedirs(actor_link_dir)
+    os.makedirs(gparam_dir)
+    dummy_path = write(os.path.join(gparam_dir, "Dummy.gparamlist.yml"), DUMMY)
+    for actor, values in ACTORS.items():
+        write(os.path.join(actor_link_dir, f"{actor}.yml"), ACTOR_LINK.format(actor=actor, tag=values["tag"]))
+        write(os.path.join(gparam_dir, f"{actor}.gparamlist.yml"), GPARAMLIST.format(**values))
+    for locale, locale_nin in msyt.locale_map.items():
+        l10n_dir = os.path.join(messages_dir, f"Msg_{locale_nin}.product.sarc", "ActorType")
+        os.makedirs(l10n_dir)
+        write(os.path.join(l10n_dir, "Item.msyt"), l10n_text(locale, ACTORS))
+    return actor_link_dir, gparam_dir, messages_dir, dummy_path
+
+def write(path: str, text: str) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
@@ -0,0 +1,115 @@
+"""
+A small output directory, like the one built by main.py, for the
+scripts that read the outputs (recipe.py, cook.py, ...)
+"""
+
+import os
+import numpy as np
+import yaml
+
+GPARAMS = {
+    "Item_Fruit_A": { "itemSellingPrice": 3, "itemBuyingPrice": 12, "cureItemHitPointRecover": 4 },
+    "Item_Meat_01": { "itemSellingPrice": 8, "itemBuyingPrice": 32, "cureItemHitPointRecover": 8 },
+    "Item_Mushroom_A": {
+        "itemSellingPrice": 5, "itemBuyingPrice": 20, "cureItemHitPointRecover": 2,
+        "cureItemEffectType": "AttackUp", "cureItemEffectLevel": 1, "cureItemEffectiveTime": 50,
+    },
+}
+TAGS = {
+    "Item_Fruit_A": ["CookFruit"],
+    "Item_Meat_01": ["CookMeat"],
+    "Item_Mushroom_A": ["CookMushroom"],
+}
+RECIPES = [
+    { "actors": ["Item_Fruit_A"], "heart_bonus": 0, "recipe": "Item_Roast_05", "tags": [] },
+    { "actors": [], "heart_bonus": 4, "recipe": "Item_Cook_K_01", "tags": [["CookMeat", "CookFruit"]] },
+    { "actors": [], "heart_bonus": 0, "recipe": "Item_Cook_A_01", "tags": [["CookMushroom"]] },
+    { "actors": [], "heart_bonus": 0, "recipe": "Item_Cook_O_01", "tags": [] },
+]
+# non-single recipe index -> actors that can be used in it
+RECIPE_ACTORS = {
+    0: ["Item_Fruit_A", "Item_Meat_01"],
+    1: ["Item_Mushroom_A"],
+}
+# with grouped=True: actors that are grouped, and a single recipe
+# that the fruits match by tag
+GROUPED_GPARAMS = {
+    **{ actor: { "itemSellingPrice": 4, "itemBuyingPrice": 16, "cureItemHitPointRecover": 6 }
+        for actor in ("Item_Fruit_B", "Item_Fruit_C", "Item_Fruit_D") },
+    **{ actor: {
+            "itemSellingPrice": 6, "itemBuyingPrice": 24, "cureItemHitPointRecover": 3,
+            "cureItemEffectType": "AttackUp", "cureItemEffectLevel": 2, "cureItemEffectiveTime": 60,
+        } for actor in ("Item_Mushroom_B", "Item_Mushroom_C") },
+}
+GROUPED_TAGS = {
+    "Item_Fruit_B": ["CookFruit"],
+    "Item_Fruit_C": ["CookFruit"],
+    "Item_Fruit_D": ["CookFruit"],
+    "Item_Mushroom_B": ["CookMushroom"],
+    "Item_Mushroom_C": ["CookMushroom"],
+}
+GROUPED_SINGLE_RECIPE = { "actors": [], "heart_bonus": 2, "recipe": "Item_Roast_03", "tags": [["CookFruit"]] }
+GROUPS = [
+    ["Item_Fruit_A"],
+    ["Item_Meat_01"],
+    ["Item_Mushroom_A"],
+    ["Item_Fruit_B", "Item_Fruit_C", "Item_Fruit_D"],
+    ["Item_Mushroom_B", "Item_Mushroom_C"],
+]
+COOK_SYSTEM = {
+    "cook_effect_index": [
+        { "type": "LifeRecover", "base_time": 0, "max": 120, "min": 0, "super_success_amount": 4, "multiplier": 0x3f800000 },
+        { "type": "AttackUp", "base_time": 20, "max": 3, "min": 1, "super_success_amount": 1, "multiplier": 0x3f800000 },
+    ],
+    "failure_actor": "Item_Cook_O_01",
+    "failure_actor_life_recover": 4,
+    "failure_actor_life_recover_multiplier": 1.0,
+    "life_recover_multiplier": 2.0,
+    "num_material_multiplier": [0x3fc00000, 0x3fe66666, 0x40066666, 0x4019999a, 0x40333333],
+    "num_material_super_success_rate": [5, 10, 15, 20, 25],
+    "super_success_additional_effect_time": 30,
+}
+
+def make_output(output_dir: str, shared_gparams: bool = False, grouped: bool = False):
+    """
+    Write the output files. With shared_gparams, GParamLists are in their own files.
+    With grouped, add the GROUPED_ actors and recipe, and recipe-groups.yaml
+    """
+    gparams = { **GPARAMS, **GROUPED_GPARAMS } if grouped else GPARAMS
+    tags = { **TAGS, **GROUPED_TAGS } if grouped else TAGS
+    recipes = [RECIPES[0], GROUPED_SINGLE_RECIPE, *RECIPES[1:]] if grouped else RECIPES
+    recipe_actors = { recipe: list(actors) for recipe, actors in RECIPE_ACTORS.items() }
+    if grouped:
+        recipe_actors[0] += ["Item_Fruit_B", "Item_Fruit_C", "Item_Fruit_D"]
+        recipe_actors[1] += ["Item_Mushroom_B", "Item_Mushroom_C"]
+
+    os.makedirs(os.path.join(output_dir, "Actor"))
+    if shared_gparams:
+        os.makedirs(os.path.join(output_dir, "GParamList"))
+    for actor, actor_gparams in gparams.items():
+        data = { "actor": actor, "tags": tags[actor], "profile": "Item" }
+        if shared_gparams:
+            data["gparamlist"] = actor
+            dump(os.path.join(output_dir, "GParamList", f"{actor}.yaml"), { "user": actor, **actor_gparams })
+        else:
+            data["gparamlist"] = { "user": actor, **actor_gparams }
+        dump(os.path.join(output_dir, "Actor", f"{actor}.yaml"), data)
+
+    dump(os.path.join(output_dir, "recipes.yaml"), recipes)
+    dump(os.path.join(output_dir, "recipe-meta.yaml"), {
+        "failure_actor_index": len(recipes) - 1,
+        "single_recipe_count": 2 if grouped else 1,
+    })
+    dump(os.path.join(output_dir, "cook-system.yaml"), COOK_SYSTEM)
+    if grouped:
+        dump(os.path.join(output_dir, "recipe-groups.yaml"), GROUPS)
+    keys = sorted(set(a for actors in recipe_actors.values() for a in actors))
+    bits = np.zeros((len(keys), 2), dtype=np.uint64)
+    for recipe, actors in recipe_actors.items():
+        for actor in actors:
+            bits[keys.index(actor), 0] |= np.uint64(1 << recipe)
+    np.savez(os.path.join(output_dir, "recipe-actor-index.npz"), keys=np.array(keys, dtype=str), bits=bits)
+
+def dump(path: str, data):
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.dump(data, f, sort_keys=False)
@@ -0,0 +1,147 @@
+import struct
+import aamp
+import util as u
+from tasks import link_actors as la
+
+def build_aamp(objects: dict[str, dict[str, tuple[int, object]]]) -> bytes:
+    """Build an AAMP file with param_root and objects of (type, value) params"""
+    params = [(name, param) for obj in objects.values() for name, param in obj.items()]
+    type_name = b"xml\0"
+    root_offset = 0x30 + len(type_name)
+    objects_offset = root_offset + 0xc
+    params_offset = objects_offset + 8 * len(objects)
+    data_offset = params_offset + 8 * len(params)
+
+    data = bytearray()
+    param_data = []
+    for _, (param_type, value) in params:
+        param_data.append(data_offset + len(data))
+        if param_type == aamp.TYPE_BOOL:
+            data += struct.pack("<I", int(value)) # type: ignore
+        elif param_type == aamp.TYPE_INT:
+            data += struct.pack("<i", value)
+        elif param_type == aamp.TYPE_F32:
+            data += struct.pack("<f", value)
+        elif param_type == aamp.TYPE_VEC3:
+            data += struct.pack("<3f", *value) # type: ignore
+        elif param_type == aamp.TYPE_STRING64:
+            data += value.encode("utf-8").ljust(64, b"\0") # type: ignore
+        else:
+            raise ValueError(param_type)
+
+    out = bytearray(b"AAMP")
+    out += struct.pack("<IIIII", 2, aamp.FLAG_LITTLE_ENDIAN | aamp.FLAG_UTF8, data_offset + len(data), 0, len(type_name))
+    out += struct.pack("<IIIIII", 1, len(objects), len(params), len(data), 0, 0)
+    out += type_name
+    out += struct.pack("<IHHHH", u.crc32("param_root"), 0, 0, (objects_offset - root_offset) // 4, len(objects))
+    i = 0
+    for index, (name, obj) in enumerate(objects.items()):
+        offset = objects_offset + 8 * index
+        out += struct.pack("<IHH", u.crc32(name), (params_offset + 8 * i - offset) // 4, len(obj))
+        i += len(obj)
+    for index, (name, (param_type, _)) in enumerate(params):
+        offset = params_offset + 8 * index
+        out += struct.pack("<II", u.crc32(name), (param_data[index] - offset) // 4 | param_type << 24)
+    out += data
+    return bytes(out)
+
+def write(path, data):
+    with open(path, "wb" if isinstance(data, bytes) else "w", encoding=None if isinstance(data, bytes) else "utf-8") as f:
+        f.write(data)
+    return str(path)
+
+ACTOR_LINK = {
+    "LinkTarget": {
+        "ActorNameJpn": (aamp.TYPE_STRING64, "Item_Fruit_A_jp"),
+        "ProfileUser": (aamp.TYPE_STRING64, "Item"),
+        "ModelUser": (aamp.TYPE_STRING64, "Dummy"),
+        "GParamUser": (aamp.TYPE_STRING64, "Item_Fruit_A"),
+    },
+    "Tags": {
+        "Tag0": (aamp.TYPE_STRING64, "CookFruit"),
+        "Tag1": (aamp.TYPE_STRING64, "Fruit"),
+    },
+}
+ACTOR_LINK_YAML = """!io
+version: 0
+type: xml
+param_root: !list
+  objects:
+    LinkTarget: !obj
+      ActorNameJpn: !str64 Item_Fruit_A_jp
+      ProfileUser: !str64 Item
+      ModelUser: !str64 Dummy
+      GParamUser: !str64 Item_Fruit_A
+    Tags: !obj {Tag0: !str64 CookFruit, Tag1: !str64 Fruit}
+  lists: {}
+"""
+
+GPARAMLIST = {
+    "General": {
+        "Speed": (aamp.TYPE_F32, 0.3),
+        "Life": (aamp.TYPE_INT, 100),
+        "IsLifeInfinite": (aamp.TYPE_BOOL, True),
+    },
+    "Item": {
+        "SellingPrice": (aamp.TYPE_INT, 3),
+        "Scale": (aamp.TYPE_F32, 123456.79),
+        "Offset": (aamp.TYPE_VEC3, (0.1, -2.5, 1.1754944e-38)),
+    },
+}
+GPARAMLIST_YAML = """!io
+version: 0
+type: xml
+param_root: !list
+  objects:
+    General: !obj {Speed: 0.3, Life: 100, IsLifeInfinite: true}
+    Item: !obj
+      SellingPrice: 3
+      Scale: 123456.79
+      Offset: !vec3 [0.1, -2.5, 1.1754944e-38]
+  lists: {}
+"""
+GPARAM_KEYS = [
+    la.Gpk("generalSpeed", 1.0, "General", "Speed"),
+    la.Gpk("generalLife", 100, "General", "Life"),
+    la.Gpk("generalIsLifeInfinite", False, "General", "IsLifeInfinite"),
+    la.Gpk("itemSellingPrice", 0, "Item", "SellingPrice"),
+    la.Gpk("itemScale", 1.0, "Item", "Scale"),
+    la.Gpk("itemOffset", None, "Item", "Offset"),
+]
+
+def test_f32_exact():
+    data = build_aamp({ "Obj": { "Value": (aamp.TYPE_F32, 123456.79), "Vec": (aamp.TYPE_VEC3, (0.3, 1e-8, 3.4e38)) } })
+    names = aamp.name_table(["param_root", "Obj", "Value", "Vec"])
+    obj, err = aamp.load(data, names)
+    assert err is None
+    params = obj["param_root"]["objects"]["Obj"]
+    assert params["Value"] == 123456.79
+    assert params["Vec"] == [0.3, 1e-8, 3.4e38]
+
+def test_unknown_names_kept_as_hash():
+    data = build_aamp({ "Obj": { "Value": (aamp.TYPE_INT, -1) } })
+    obj, err = aamp.load(data, aamp.name_table(["param_root"]))
+    assert err is None
+    assert obj["param_root"]["objects"] == { u.hex08(u.crc32("Obj")): { u.hex08(u.crc32("Value")): -1 } }
+
+def test_actor_link_binary_same_as_yaml(tmp_path):
+    binary, err = la.load_actor_link(write(tmp_path / "Item_Fruit_A.bxml", build_aamp(ACTOR_LINK)))
+    assert err is None
+    text, err = la.load_actor_link(write(tmp_path / "Item_Fruit_A.yml", ACTOR_LINK_YAML))
+    assert err is None
+    assert binary.__reduce__() == text.__reduce__() # type: ignore
+    assert binary.__reduce__()[1] == ("Item_Fruit_A", "Item_Fruit_A_jp", ["CookFruit", "Fruit"], "", "Item_Fruit_A", "Item") # type: ignore
+
+def test_gparamlist_binary_same_as_yaml(tmp_path):
+    binary, err = la.load_gparamlist_file(GPARAM_KEYS, write(tmp_path / "Item_Fruit_A.bgparamlist", build_aamp(GPARAMLIST)))
+    assert err is None
+    text, err = la.load_gparamlist_file(GPARAM_KEYS, write(tmp_path / "Item_Fruit_A.gparamlist.yml", GPARAMLIST_YAML))
+    assert err is None
+    assert binary == text
+    assert binary == ("Item_Fruit_A", [
+        ("generalSpeed", 0.3),
+        ("generalIsLifeInfinite", True),
+        ("itemSellingPrice", 3),
+        ("itemScale", 123456.79),
+        ("itemOffset", [0.1, -2.5, 1.1754944e-38]),
+    ])
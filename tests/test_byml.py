@@ -0,0 +1,205 @@
+import struct
+import pytest
+import byml
+
+class Writer:
+    """Build BYML files for the tests. Tuples are (node type, value) for the types Python doesn't have"""
+    def __init__(self, endian: str, version: int):
+        self.endian = endian
+        self.version = version
+        self.out = bytearray()
+
+    def build(self, root) -> bytes:
+        keys, strings = set(), set()
+        self.collect(root, keys, strings)
+        self.keys = sorted(keys)
+        self.strings = sorted(strings)
+        self.out = bytearray(b"BY" if self.endian == ">" else b"YB")
+        self.out += struct.pack(f"{self.endian}HIII", self.version, 0, 0, 0)
+        if self.keys:
+            self.patch(4, self.write_string_table(self.keys))
+        if self.strings:
+            self.patch(8, self.write_string_table(self.strings))
+        if root is not None:
+            self.patch(12, self.write_container(root))
+        return bytes(self.out)
+
+    def collect(self, value, keys: set, strings: set):
+        if isinstance(value, dict):
+            for k, v in value.items():
+                keys.add(k)
+                self.collect(v, keys, strings)
+        elif isinstance(value, list):
+            for v in value:
+                self.collect(v, keys, strings)
+        elif isinstance(value, str):
+            strings.add(value)
+
+    def header(self, node_type: int, count: int) -> bytes:
+        return bytes([node_type]) + count.to_bytes(3, "big" if self.endian == ">" else "little")
+
+    def patch(self, offset: int, value: int):
+        struct.pack_into(f"{self.endian}I", self.out, offset, value)
+
+    def align(self):
+        self.out += b"\0" * (-len(self.out) % 4)
+
+    def write_string_table(self, strings: list[str]) -> int:
+        offset = len(self.out)
+        encoded = [s.encode("utf-8") + b"\0" for s in strings]
+        self.out += self.header(byml.NODE_STRING_TABLE, len(strings))
+        position = 4 + 4 * (len(strings) + 1)
+        for e in encoded:
+            self.out += struct.pack(f"{self.endian}I", position)
+            position += len(e)
+        self.out += struct.pack(f"{self.endian}I", position)
+        for e in encoded:
+            self.out += e
+        self.align()
+        return offset
+
+    def node(self, value) -> tuple[int, int | None, object]:
+        """Node type, the value if it fits inline, and the value to write later"""
+        if isinstance(value, tuple):
+            node_type, v = value
+            if node_type == byml.NODE_UINT:
+                return node_type, v, None
+            return node_type, None, value
+        if isinstance(value, dict):
+            return byml.NODE_HASH, None, value
+        if isinstance(value, list):
+            return byml.NODE_ARRAY, None, value
+        if isinstance(value, str):
+            return byml.NODE_STRING, self.strings.index(value), None
+        if isinstance(value, bool):
+            return byml.NODE_BOOL, int(value), None
+        if isinstance(value, int):
+            return byml.NODE_INT, value & 0xFFFFFFFF, None
+        if isinstance(value, float):
+            return byml.NODE_FLOAT, struct.unpack("<I", struct.pack("<f", value))[0], None
+        if value is None:
+            return byml.NODE_NULL, 0, None
+        raise ValueError(value)
+
+    def write_container(self, value) -> int:
+        offset = len(self.out)
+        if isinstance(value, dict):
+            items = sorted(value.items())
+            self.out += self.header(byml.NODE_HASH, len(items))
+            later = []
+            for i, (k, v) in enumerate(items):
+                node_type, inline, deferred = self.node(v)
+                key = self.keys.index(k)
+                key_and_type = key << 8 | node_type if self.endian == ">" else key | node_type << 24
+                self.out += struct.pack(f"{self.endian}II", key_and_type, inline or 0)
+                if deferred is not None:
+                    later.append((offset + 4 + 8 * i + 4, deferred))
+        else:
+            nodes = [self.node(v) for v in value]
+            self.out += self.header(byml.NODE_ARRAY, len(value))
+            self.out += bytes(t for t, _, _ in nodes)
+            self.align()
+            values_offset = len(self.out)
+            later = []
+            for i, (_, inline, deferred) in enumerate(nodes):
+                self.out += struct.pack(f"{self.endian}I", inline or 0)
+                if deferred is not None:
+                    later.append((values_offset + 4 * i, deferred))
+        for value_offset, deferred in later:
+            self.patch(value_offset, self.write_deferred(deferred))
+        return offset
+
+    def write_deferred(self, value) -> int:
+        if not isinstance(value, tuple):
+            return self.write_container(value)
+        node_type, v = value
+        offset = len(self.out)
+        fmt = { byml.NODE_INT64: "q", byml.NODE_UINT64: "Q", byml.NODE_DOUBLE: "d" }[node_type]
+        self.out += struct.pack(f"{self.endian}{fmt}", v)
+        return offset
+
+DATA = {
+    "Name": "CookData",
+    "Count": -3,
+    "Rate": 1.5,
+    "Enabled": True,
+    "Disabled": False,
+    "Missing": None,
+    "Flags": (byml.NODE_UINT, 0xFFFFFFFF),
+    "Recipes": [
+        { "Recipe": "Item_Cook_A_01", "Actors": ["Item_Fruit_A", "Item_Meat_01"], "Hb": 4 },
+        { "Recipe": "Item_Cook_O_01", "Actors": [], "Hb": 0 },
+        [1, "Item_Fruit_A", -0.25, None, [False]],
+    ],
+    "Empty": {},
+}
+DECODED = {
+    "Name": "CookData",
+    "Count": -3,
+    "Rate": 1.5,
+    "Enabled": True,
+    "Disabled": False,
+    "Missing": None,
+    "Flags": 0xFFFFFFFF,
+    "Recipes": [
+        { "Recipe": "Item_Cook_A_01", "Actors": ["Item_Fruit_A", "Item_Meat_01"], "Hb": 4 },
+        { "Recipe": "Item_Cook_O_01", "Actors": [], "Hb": 0 },
+        [1, "Item_Fruit_A", -0.25, None, [False]],
+    ],
+    "Empty": {},
+}
+
+@pytest.mark.parametrize("endian", [">", "<"])
+@pytest.mark.parametrize("version", [2, 3])
+def test_load(endian, version):
+    data, err = byml.load(Writer(endian, version).build(DATA))
+    assert err is None
+    assert data == DECODED
+
+@pytest.mark.parametrize("endian", [">", "<"])
+def test_load_v3_64_bit(endian):
+    data, err = byml.load(Writer(endian, 3).build({
+        "Int64": (byml.NODE_INT64, -(1 << 40)),
+        "UInt64": (byml.NODE_UINT64, (1 << 64) - 1),
+        "Double": (byml.NODE_DOUBLE, 0.1),
+        "Array": [(byml.NODE_INT64, 1 << 33), (byml.NODE_DOUBLE, -2.5), "x"],
+    }))
+    assert err is None
+    assert data == {
+        "Int64": -(1 << 40),
+        "UInt64": (1 << 64) - 1,
+        "Double": 0.1,
+        "Array": [1 << 33, -2.5, "x"],
+    }
+
+def test_load_root_array_without_keys():
+    data, err = byml.load(Writer("<", 2).build(["a", ["b"], 7]))
+    assert err is None
+    assert data == ["a", ["b"], 7]
+
+def test_load_empty():
+    data, err = byml.load(Writer("<", 2).build(None))
+    assert err is None
+    assert data is None
+
+def test_string_table():
+    data = Writer(">", 2).build({ "Key": ["zzz", "", "日本語"] })
+    reader = byml._Reader(data)
+    assert reader.keys == ["Key"]
+    assert reader.strings == ["", "zzz", "日本語"]
+
+def test_invalid():
+    _, err = byml.load(b"XX\0\2" + bytes(12))
+    assert err is not None and "invalid magic" in err
+    _, err = byml.load(b"YB\1\0" + bytes(12))
+    assert err is not None and "unsupported version" in err
+
+def test_fload_prefer_binary(tmp_path):
+    with open(tmp_path / "CookData.yml", "w") as f:
+        f.write("Name: yaml\n")
+    data, err = byml.fload_prefer_binary(str(tmp_path / "CookData.yml"))
+    assert err is None and data == { "Name": "yaml" }
+    with open(tmp_path / "CookData.byml", "wb") as f:
+        f.write(Writer("<", 2).build({ "Name": "binary" }))
+    data, err = byml.fload_prefer_binary(str(tmp_path / "CookData.yml"))
+    assert err is None and data == { "Name": "binary" }
@@ -0,0 +1,93 @@
+import os
+import numpy as np
+import cook
+import recipe as r
+from output_fixture import make_output
+
+def test_load_shared_gparams(tmp_path):
+    inline_dir = str(tmp_path / "inline")
+    shared_dir = str(tmp_path / "shared")
+    make_output(inline_dir)
+    make_output(shared_dir, shared_gparams=True)
+    inline, err = cook.load(inline_dir)
+    assert err is None
+    shared, err = cook.load(shared_dir)
+    assert err is None
+
+    for actors in (["Item_Fruit_A"], ["Item_Meat_01", "Item_Fruit_A"], ["Item_Mushroom_A", "Item_Mushroom_A"]):
+        assert shared.cook(actors) == inline.cook(actors)
+    result, err = shared.cook(["Item_Mushroom_A", "Item_Mushroom_A"])
+    assert err is None
+    assert result.effect == 1
+    assert result.time == 20 + 50 + 50
+
+def load(tmp_path) -> cook.Simulator:
+    make_output(str(tmp_path))
+    sim, err = cook.load(str(tmp_path))
+    assert err is None
+    return sim
+
+def random_ids(rng: np.random.Generator, actor_count: int, count: int) -> np.ndarray:
+    """Random rows of actor ids with 0 to 5 empty slots anywhere, like recipe.bench"""
+    ids = rng.integers(0, actor_count, size=(count, r.MAX_INGREDIENTS))
+    ids[rng.random((count, r.MAX_INGREDIENTS)) < 0.3] = r.EMPTY
+    return ids
+
+def assert_cook_batch_same_as_cook(sim: cook.Simulator, ids: np.ndarray, critical: np.ndarray):
+    """Check cook_batch on the rows against cook on each row"""
+    result, err = sim.cook_batch(ids, critical)
+    assert err is None
+    for i in range(len(ids)):
+        actors = [sim.matcher.actors[x] for x in ids[i] if x != r.EMPTY]
+        expected, err = sim.cook(actors, bool(critical[i]))
+        assert err is None
+        assert cook.Result(*(int(result[c][i]) for c in cook.RESULT_DTYPES)) == expected, (actors, bool(critical[i]))
+
+def test_cook_batch_same_as_cook(tmp_path):
+    sim = load(tmp_path)
+    ingredients = [
+        [],
+        ["Item_Fruit_A"],
+        ["Item_Fruit_A", "Item_Fruit_A"],
+        ["Item_Meat_01", "Item_Fruit_A"],
+        ["Item_Meat_01", "Item_Mushroom_A"],
+        ["Item_Mushroom_A"] * 5,
+    ]
+    ids = np.full((len(ingredients), r.MAX_INGREDIENTS), r.EMPTY, dtype=np.int64)
+    for i, actors in enumerate(ingredients):
+        for j, actor in enumerate(actors):
+            ids[i, j], err = sim.matcher.actor_id(actor)
+            assert err is None
+    for critical in (False, True):
+        assert_cook_batch_same_as_cook(sim, ids, np.full(len(ids), critical))
+
+def test_cook_batch_same_as_cook_random(tmp_path):
+    sim = load(tmp_path)
+    rng = np.random.default_rng(0)
+    count = 2000
+    ids = random_ids(rng, len(sim.matcher.actors), count)
+    assert_cook_batch_same_as_cook(sim, ids, rng.random(count) < 0.5)
+
+def test_unknown_actor(tmp_path):
+    sim = load(tmp_path)
+    for actors in (["Item_Unknown"], ["Item_Fruit_A", "Item_Unknown"]):
+        _, err = sim.matcher.match(actors)
+        assert err == "unknown actor: Item_Unknown"
+        _, err = sim.cook(actors)
+        assert err == "unknown actor: Item_Unknown"
+    _, err = sim.matcher.actor_id("Item_Unknown")
+    assert err == "unknown actor: Item_Unknown"
+
+    n = len(sim.matcher.actors)
+    for bad in (n, r.EMPTY - 1):
+        ids = np.array([[0, bad]], dtype=np.int64)
+        _, err = sim.matcher.match_batch(ids)
+        assert err == f"unknown actor id: {bad}"
+        _, err = sim.cook_batch(ids)
+        assert err == f"unknown actor id: {bad}"
+
+def test_actor_without_actor_file(tmp_path):
+    make_output(str(tmp_path))
+    os.remove(tmp_path / "Actor" / "Item_Meat_01.yaml")
+    _, err = cook.load(str(tmp_path))
+    assert err == "unknown actor: Item_Meat_01"
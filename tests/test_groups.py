@@ -0,0 +1,104 @@
+import math
+import itertools
+import numpy as np
+import cook
+import combos
+import cookdb
+import enumerate_cooks
+import groups as g
+import recipe as r
+from output_fixture import make_output, GROUPS
+from test_cook import assert_cook_batch_same_as_cook
+
+def test_rank_unrank():
+    for n, k in ((1, 1), (3, 2), (4, 3), (6, combos.K)):
+        space = combos.Space(n, k)
+        expected = list(itertools.combinations_with_replacement(range(-1, n), k))
+        assert space.size() == len(expected) == math.comb(n + k, k)
+        unranked = space.unrank(np.arange(space.size()))
+        assert sorted(map(tuple, unranked.tolist())) == expected
+        assert space.rank(unranked).tolist() == list(range(space.size()))
+        # slots in any order
+        assert space.rank(unranked[:, ::-1]).tolist() == list(range(space.size()))
+
+def all_combinations(actors: list[str], k: int) -> list[tuple[str, ...]]:
+    return [c for m in range(k + 1) for c in itertools.combinations_with_replacement(sorted(actors), m)]
+
+def test_count_and_expand():
+    for k in (1, 2, 3, combos.K):
+        grouping = g.Grouping(GROUPS, k)
+        rows = np.arange(grouping.row_count())
+        counts = grouping.count(rows)
+        assert counts.sum() == math.comb(grouping.actor_count() + k, k)
+        seen = set()
+        for row, count in zip(rows.tolist(), counts.tolist()):
+            expanded = list(grouping.expand(row))
+            assert len(expanded) == count
+            for actors in expanded:
+                # in the order of the groups
+                actors = tuple(sorted(actors))
+                assert actors not in seen
+                seen.add(actors)
+                assert grouping.row(list(actors)) == (row, None)
+        assert seen == set(all_combinations(list(grouping.actor_group), k))
+
+def test_mixed_rows():
+    grouping = g.Grouping(GROUPS)
+    same, err = grouping.row(["Item_Fruit_C", "Item_Fruit_C"])
+    assert err is None
+    assert grouping.row(["Item_Fruit_B", "Item_Fruit_B"]) == (same, None)
+    assert list(grouping.expand(same)) == [("Item_Fruit_B",) * 2, ("Item_Fruit_C",) * 2, ("Item_Fruit_D",) * 2]
+    mixed, err = grouping.row(["Item_Fruit_D", "Item_Fruit_B"])
+    assert err is None
+    assert mixed != same
+    assert grouping.row(["Item_Fruit_B", "Item_Fruit_C"]) == (mixed, None)
+    assert grouping.count(np.array([same, mixed])).tolist() == [3, 3]
+    actors = grouping.actors()
+    assert [actors[i] for i in grouping.unrank(np.array([mixed]))[0] if i >= 0] == ["Item_Fruit_C", "Item_Fruit_B"]
+    # with another group, any actors of the group cook the same
+    row, err = grouping.row(["Item_Fruit_B", "Item_Fruit_C", "Item_Meat_01"])
+    assert err is None
+    assert grouping.row(["Item_Fruit_B", "Item_Fruit_B", "Item_Meat_01"]) == (row, None)
+    assert grouping.count(np.array([row])).tolist() == [6]
+
+    assert grouping.row(["Item_Fruit_A"] * (combos.K + 1)) == (0, f"more than {combos.K} ingredients")
+    assert grouping.row(["Item_Unknown"]) == (0, "not a cookable actor: Item_Unknown")
+
+def test_cookdb_same_as_cook_batch(tmp_path):
+    output_dir = str(tmp_path / "output")
+    make_output(output_dir, grouped=True)
+    sim, err = cook.load(output_dir)
+    assert err is None
+    grouping, err = g.load(output_dir)
+    assert err is None
+    shard_dir = str(tmp_path / "cooks")
+    assert enumerate_cooks.enumerate_cooks(sim, grouping, shard_dir, 100) is None
+    db_path = str(tmp_path / "cooks.db")
+    assert cookdb.build(shard_dir, db_path, 64, "zlib") is None
+    db, err = cookdb.open_db(db_path)
+    assert err is None
+
+    # every combination of the actors, cooked without groups
+    actors = sorted(grouping.actor_group)
+    space = combos.Space(len(actors))
+    ids = np.full((space.size(), r.MAX_INGREDIENTS), r.EMPTY, dtype=np.int64)
+    combinations = space.unrank(np.arange(space.size()))
+    for j, actor in enumerate(actors):
+        actor_id, err = sim.matcher.actor_id(actor)
+        assert err is None
+        ids[:, :combos.K][combinations == j] = actor_id
+    critical = np.zeros(len(ids), dtype=bool)
+    assert_cook_batch_same_as_cook(sim, ids[::7], critical[::7])
+    result, err = sim.cook_batch(ids, critical)
+    assert err is None
+    for i in range(len(ids)):
+        ingredients = [actors[j] for j in combinations[i] if j >= 0]
+        expected = cook.Result(*(int(result[c][i]) for c in cook.RESULT_DTYPES))
+        assert db.lookup(ingredients) == (expected, None), ingredients
+
+    # the fruit recipe only matches the same fruit
+    same, err = db.lookup(["Item_Fruit_B", "Item_Fruit_B"])
+    assert err is None
+    mixed, err = db.lookup(["Item_Fruit_B", "Item_Fruit_C"])
+    assert err is None
+    assert same.recipe != mixed.recipe
@@ -0,0 +1,144 @@
+import io
+import os
+import yaml
+import aamp
+import msyt
+import msgstore
+import sarc
+import botw_fixture
+from tasks import link_actors as la
+
+def make_sources(root, files: dict[str, list[str]]) -> tuple[str, str, str]:
+    actor_link_dir = os.path.join(root, "ActorLink")
+    gparam_dir = os.path.join(root, "GeneralParamList")
+    messages_dir = os.path.join(root, "Message")
+    dirs = [actor_link_dir, gparam_dir] + [la.l10n_dir(messages_dir, n) for n in msyt.locale_map.values()]
+    for d in dirs:
+        os.makedirs(d, exist_ok=True)
+    for d, names in files.items():
+        for name in names:
+            with open(os.path.join(root, d, name), "w") as f:
+                f.write("")
+    return actor_link_dir, gparam_dir, messages_dir
+
+def test_scan_sources_skipped_yaml_not_recorded(tmp_path):
+    l10n = os.path.join("Message", "Msg_USen.product.sarc", "ActorType")
+    dirs = make_sources(str(tmp_path), {
+        "ActorLink": ["Item_Fruit_A.bxml", "Item_Fruit_A.yml", "Item_Meat_01.yml"],
+        "GeneralParamList": ["Item_Fruit_A.bgparamlist", "Item_Fruit_A.gparamlist.yml"],
+        l10n: ["Item.msbt", "Item.msyt"],
+    })
+    sources, err = la.scan_sources(*dirs)
+    assert err is None
+    names = sorted(os.path.basename(p) for p in sources.signatures)
+    assert names == ["Item.msbt", "Item_Fruit_A.bgparamlist", "Item_Fruit_A.bxml", "Item_Meat_01.yml"]
+    assert sorted(sources.signatures) == sorted(sources.actor_links + sources.gparamlists + [p for _, p in sources.l10n])
+
+    # the YAML file is used when the binary file is removed, and it's new to the signatures
+    os.remove(os.path.join(dirs[0], "Item_Fruit_A.bxml"))
+    os.remove(os.path.join(la.l10n_dir(dirs[2], "USen"), "Item.msbt"))
+    new_sources, err = la.scan_sources(*dirs)
+    assert err is None
+    added = set(new_sources.signatures) - set(sources.signatures)
+    assert sorted(os.path.basename(p) for p in added) == ["Item.msyt", "Item_Fruit_A.yml"]
+
+def strings(name=None, name_attr=None, desc=None, album_desc=None):
+    return la.LocalizationStrings(name, name_attr, desc, album_desc)
+
+def test_merge_actor_localization_by_field():
+    entries = la.merge_actor_localization([
+        ("en-US", "Item", { "Item_Fruit_A": strings(name="Apple", name_attr="", desc="An apple") }),
+        ("en-US", "Other", { "Item_Fruit_A": strings(album_desc="Album"), "Item_Meat_01": strings(desc="Meat") }),
+        ("en-US", "Other", { "Item_Fruit_A": strings(name="Apples", name_attr="plural") }),
+        ("de-DE", "Other", { "Item_Fruit_A": strings(name="Apfel", name_attr="masculine") }),
+    ])
+    fruit = entries["Item_Fruit_A"]
+    assert fruit.profile == "Item"
+    assert fruit.strings["en-US"] == la.LocalizationStrings("Apples", "plural", "An apple", "Album")
+    assert fruit.strings["de-DE"] == la.LocalizationStrings("Apfel", "masculine", "", "")
+    assert fruit.strings["ja-JP"] == la.LocalizationStrings()
+    assert entries["Item_Meat_01"].strings["en-US"] == la.LocalizationStrings("", "", "Meat", "")
+
+def test_l10n_table_keys_are_strings():
+    names = ["Item_Fruit_A", "null", "true", "No", "1e3", "0x10", "a: b", "#x", "'q'"]
+    localization = {}
+    for i, name in enumerate(names):
+        entry = la.ensure_l10n_entry(localization, "Item", name)
+        entry.strings["en-US"] = la.LocalizationStrings(f"{name} \"{i}\"", "", "line\nbreak", "")
+    f = io.StringIO()
+    la.write_l10n_table(f, "en-US", names, localization)
+    table = yaml.load(f.getvalue(), yaml.FullLoader)
+    assert list(table) == names
+    for i, name in enumerate(names):
+        assert table[name] == {
+            "name": { "text": f"{name} \"{i}\"", "attr": "" },
+            "desc": "line\nbreak",
+            "album_desc": "",
+        }
+
+def run_link(dirs: tuple[str, str, str, str], output_dir: str) -> str | None:
+    """Like the link_actors task, with the output in output_dir"""
+    actor_link_dir, gparam_dir, messages_dir, dummy_path = dirs
+    os.makedirs(output_dir, exist_ok=True)
+    options = la.LinkOptions()
+    keys, err = la.load_gparam_keys(dummy_path, os.path.join(output_dir, "gpks.yaml"))
+    if err: return err
+    sources, err = la.scan_sources(actor_link_dir, gparam_dir, messages_dir)
+    if err: return err
+    actor_output_dir = os.path.join(output_dir, "Actor")
+    cache_path = os.path.join(output_dir, ".cache", "link_actors.pickle")
+    cache = la.load_link_cache(cache_path, keys, options, actor_output_dir)
+    return la.link_actors(
+        keys, sources, cache, options, actor_output_dir,
+        os.path.join(output_dir, "GParamList"), os.path.join(output_dir, "Localization"), cache_path)
+
+def read_tree(d: str) -> dict[str, bytes]:
+    out = {}
+    for root, _, files in os.walk(d):
+        for f in files:
+            path = os.path.join(root, f)
+            if ".cache" not in path:
+                with open(path, "rb") as fp:
+                    out[os.path.relpath(path, d)] = fp.read()
+    return out
+
+def test_incremental_same_as_full(tmp_path, monkeypatch):
+    monkeypatch.setattr(msgstore, "CACHE_DIR", str(tmp_path / "messages"))
+    dirs = botw_fixture.make_botw(str(tmp_path / "botw"))
+    incremental = str(tmp_path / "incremental")
+    assert run_link(dirs, incremental) is None
+    assert os.path.exists(os.path.join(incremental, ".cache", "link_actors.pickle"))
+
+    # one file of each kind
+    actor_link_dir, gparam_dir, messages_dir, _ = dirs
+    botw_fixture.write(os.path.join(actor_link_dir, "Item_Meat_01.yml"), botw_fixture.ACTOR_LINK.format(actor="Item_Meat_01", tag="CookFish"))
+    botw_fixture.write(os.path.join(gparam_dir, "Item_Fruit_A.gparamlist.yml"), botw_fixture.GPARAMLIST.format(speed=0.5, price=13, hp=5))
+    ja_dir = la.l10n_dir(messages_dir, "JPja")
+    botw_fixture.write(os.path.join(ja_dir, "Item.msyt"), botw_fixture.l10n_text("changed", botw_fixture.ACTORS))
+    # make sure the signatures differ even if the file system time is coarse
+    for path in (os.path.join(actor_link_dir, "Item_Meat_01.yml"), os.path.join(gparam_dir, "Item_Fruit_A.gparamlist.yml"), os.path.join(ja_dir, "Item.msyt")):
+        os.utime(path, ns=(1, 1))
+    assert run_link(dirs, incremental) is None
+
+    full = str(tmp_path / "full")
+    assert run_link(dirs, full) is None
+    incremental_tree = read_tree(incremental)
+    assert incremental_tree == read_tree(full)
+    meat = incremental_tree[os.path.join("Actor", "Item_Meat_01.yaml")].decode("utf-8")
+    assert "CookFish" in meat
+    fruit = incremental_tree[os.path.join("Actor", "Item_Fruit_A.yaml")].decode("utf-8")
+    assert "Item_Fruit_A [changed]" in fruit and "itemBuyingPrice: 13" in fruit
+
+def test_link_cache_header_has_module_sources(monkeypatch):
+    header = la.link_cache_header(la.LinkOptions())
+    assert header == la.link_cache_header(la.LinkOptions())
+    # a change in a module the cached data goes through rebuilds the cache
+    assert aamp in la.LINK_CACHE_MODULES and sarc in la.LINK_CACHE_MODULES and msgstore in la.LINK_CACHE_MODULES
+    real_open = open
+    def patched_open(path, *args, **kwargs):
+        f = real_open(path, *args, **kwargs)
+        if path == aamp.__file__:
+            return io.BytesIO(f.read() + b"# changed\n")
+        return f
+    monkeypatch.setattr("builtins.open", patched_open)
+    assert la.link_cache_header(la.LinkOptions()) != header
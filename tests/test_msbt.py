@@ -0,0 +1,168 @@
+import struct
+import pytest
+import msbt
+import msyt
+
+def label_hash(label: str, bucket_count: int) -> int:
+    h = 0
+    for c in label.encode("utf-8"):
+        h = (h * 0x492 + c) & 0xFFFFFFFF
+    return h % bucket_count
+
+class Writer:
+    """Build MSBT files with LBL1, ATR1 and TXT2 sections"""
+    def __init__(self, endian: str):
+        self.endian = endian
+        self.encoding = "utf-16-be" if endian == ">" else "utf-16-le"
+
+    def pack(self, fmt: str, *values) -> bytes:
+        return struct.pack(f"{self.endian}{fmt}", *values)
+
+    def text(self, s: str) -> bytes:
+        return s.encode(self.encoding)
+
+    def string(self, s: str) -> bytes:
+        """String with its length in bytes before it"""
+        data = self.text(s)
+        return self.pack("H", len(data)) + data
+
+    def control(self, group: int, typ: int, params: bytes = b"") -> bytes:
+        return self.pack("HHHH", msbt.CONTROL_BEGIN, group, typ, len(params)) + params
+
+    def section(self, magic: bytes, data: bytes) -> bytes:
+        out = magic + self.pack("I", len(data)) + bytes(8) + data
+        return out + b"\xab" * (-len(out) % 0x10)
+
+    def build(self, entries: list[tuple[str, bytes]], bucket_count: int = 7) -> bytes:
+        """Build from (label, text) entries, without attributes"""
+        buckets = [[] for _ in range(bucket_count)]
+        for i, (label, _) in enumerate(entries):
+            buckets[label_hash(label, bucket_count)].append((label, i))
+        head = self.pack("I", bucket_count)
+        body = b""
+        for bucket in buckets:
+            head += self.pack("II", len(bucket), 4 + 8 * bucket_count + len(body))
+            for label, i in bucket:
+                body += bytes([len(label)]) + label.encode("utf-8") + self.pack("I", i)
+        offsets = []
+        texts = b""
+        for _, text in entries:
+            offsets.append(4 + 4 * len(entries) + len(texts))
+            texts += text + self.pack("H", 0)
+        body = (
+            self.section(b"LBL1", head + body)
+            + self.section(b"ATR1", self.pack("II", len(entries), 0))
+            + self.section(b"TXT2", self.pack("I", len(entries)) + self.pack(f"{len(entries)}I", *offsets) + texts)
+        )
+        bom = self.pack("H", 0xFEFF)
+        header = msbt.MAGIC + bom + bytes(2) + bytes([msbt.ENCODING_UTF16, 3]) + self.pack("H", 3)
+        header += bytes(2) + self.pack("I", 0x20 + len(body)) + bytes(10)
+        return header + body
+
+def entries(w: Writer) -> list[tuple[str, bytes]]:
+    return [
+        ("Plain", w.text("Apple")),
+        ("Colour", w.control(0, 3, w.pack("H", 0)) + w.text("Red") + w.control(0, 3, w.pack("H", 0xFFFF)) + w.text(" apple")),
+        ("Ruby", w.control(0, 0, w.pack("HH", 4, 4) + w.text("りん")) + w.text("林檎です")),
+        ("Effect", w.text("Restores ") + w.control(2, 7) + w.text(". ") + w.control(2, 8)),
+        ("Gender", w.control(201, 0, bytes([2, 0, 0, 0])) + w.text("Pomme")),
+        ("Plural", w.control(201, 0, bytes([0, 0, 0, 1])) + w.text("Äpfel")),
+        ("Pause", w.text("a") + w.control(5, 1) + w.text("b") + w.control(1, 0, w.pack("I", 30)) + w.text("c")),
+        ("Variable", w.control(2, 9, w.string("Name") + w.pack("H", 0)) + w.text(" x")),
+        ("Sound", w.control(3, 1, w.pack("HH", 1, 2)) + w.control(4, 2, w.string("Anim")) + w.text("x")),
+        ("Font", w.control(0, 1, w.pack("H", 0xFFFF)) + w.control(0, 2, w.pack("H", 100)) + w.text("x")),
+        ("Choice", w.control(1, 4, w.pack("HH", 1, 2) + bytes([0, 1])) + w.text("x")),
+        ("Localisation", w.control(201, 5, w.string("er") + w.string("sie")) + w.text("x")),
+        ("Raw", w.control(1, 1, w.pack("I", 5)) + w.text("x")),
+        ("RawColour", w.control(0, 3, w.pack("H", 9)) + w.text("x")),
+        ("Null", w.text("a\0b")),
+    ]
+
+def raw(**kwargs):
+    return { "control": { "kind": "raw", **kwargs } }
+
+def control(kind, **kwargs):
+    return { "control": { "kind": kind, **kwargs } }
+
+def text(s):
+    return { "text": s }
+
+# what msyt converts the entries to
+MSYT = {
+    "Plain": [text("Apple")],
+    "Colour": [control("set_colour", colour="red"), text("Red"), control("reset_colour"), text(" apple")],
+    "Ruby": [raw(zero={ "zero": { "field_1": 8, "field_2": 4, "field_3": 4 } }), text("りん林檎です")],
+    "Effect": [
+        text("Restores "), raw(two={ "one_field": [7, { "field_1": 0 }] }),
+        text(". "), raw(two={ "one_field": [8, { "field_1": 0 }] }),
+    ],
+    "Gender": [raw(two_hundred_one={ "dynamic": [0, { "len": 4, "field_2": [2, 0, 0, 0] }] }), text("Pomme")],
+    "Plural": [raw(two_hundred_one={ "dynamic": [0, { "len": 4, "field_2": [0, 0, 0, 1] }] }), text("Äpfel")],
+    "Pause": [text("a"), control("pause", length="long"), text("b"), control("pause", frames=30), text("c")],
+    "Variable": [control("variable", variable_kind=9, name="Name"), text(" x")],
+    "Sound": [control("sound", unknown=[1, 0, 2, 0]), control("animation", name="Anim"), text("x")],
+    "Font": [control("font", font_kind="normal"), control("text_size", percent=100), text("x")],
+    "Choice": [control("choice", choice_labels=[1, 2], selected_index=0, cancel_index=1, unknown=6), text("x")],
+    "Localisation": [control("localisation", localisation_kind="gender", options=["er", "sie"]), text("x")],
+    "Raw": [raw(one={ "one": { "field_1": 4, "field_2": 5 } }), text("x")],
+    "RawColour": [raw(zero={ "three": { "field_1": 2, "field_2": 9 } }), text("x")],
+    "Null": [text("a\0b")],
+}
+
+def summary(contents: list) -> list:
+    """
+    The texts, the raw controls parse_localization reads (converted exactly),
+    and the kinds of the other controls
+    """
+    out = []
+    for x in contents:
+        c = x.get("control")
+        if c is None or c["kind"] == "raw" and ("zero" in c.get("zero", {}) or "two" in c or "two_hundred_one" in c):
+            out.append(x)
+        else:
+            out.append(c["kind"])
+    return out
+
+def parse(entries: dict, allow_attr: bool) -> dict:
+    """Parse the entries, with only whether there is an error (the raw controls in the errors differ)"""
+    parsed = msyt.parse_localizations(entries, lambda _: allow_attr)
+    return { label: (text, attr, err is not None) for label, (text, attr, err) in parsed.items() }
+
+@pytest.mark.parametrize("endian", [">", "<"])
+def test_same_as_msyt(endian):
+    w = Writer(endian)
+    loaded, err = msbt.load(w.build(entries(w)))
+    assert err is None
+    assert list(loaded["entries"]) == sorted(MSYT)
+    expected = { label: { "contents": contents } for label, contents in MSYT.items() }
+    for label, entry in loaded["entries"].items():
+        assert summary(entry["contents"]) == summary(MSYT[label]), label
+    for allow_attr in (False, True):
+        assert parse(loaded["entries"], allow_attr) == parse(expected, allow_attr)
+    parsed = parse(loaded["entries"], True)
+    assert parsed["Ruby"] == ("林檎です", "", False)
+    assert parsed["Effect"] == ("Restores {{effect}}. {{effect_desc}}", "", False)
+    assert parsed["Gender"] == ("Pomme", "feminine", False)
+    assert parsed["Plural"] == ("Äpfel", "plural", False)
+    assert parsed["Colour"] == ("Red apple", "", False)
+    assert parsed["Raw"][2] and parsed["RawColour"][2]
+
+@pytest.mark.parametrize("endian", [">", "<"])
+@pytest.mark.parametrize("params, error", [
+    ((0, 5, b""), "unknown control 0 type: 5"),
+    ((6, 0, b""), "unknown control sequence: 6"),
+    ((4, 4, b""), "unknown control 4 subtype: 4"),
+    # the choice reads 6 bytes, past the end of the text
+    ((1, 4, b""), "go past the end of the text"),
+])
+def test_unknown_control_fails_like_msyt(endian, params, error):
+    w = Writer(endian)
+    _, err = msbt.load(w.build([("Label", w.control(*params))]))
+    assert err is not None and error in err
+
+def test_end_control_is_text():
+    # msyt has no closing controls, 0x0F is a character
+    w = Writer("<")
+    loaded, err = msbt.load(w.build([("Label", w.pack("HHH", 0x0F, 0, 3) + w.text("x"))]))
+    assert err is None
+    assert loaded["entries"]["Label"]["contents"] == [text("\x0f\0\x03x")]
@@ -0,0 +1,77 @@
+import os
+import msyt
+import msgstore
+
+MSYT = """entries:
+  Item_Fruit_A_Name:
+    contents:
+      - text: {}
+  Item_Fruit_A_Unused:
+    contents:
+      - control: {{}}
+"""
+
+def write(path, name):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(MSYT.format(name))
+
+def is_name(label: str) -> bool:
+    return label.endswith("_Name")
+
+def test_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(msgstore, "CACHE_DIR", str(tmp_path / "cache"))
+    calls = []
+    parse = msyt.parse_localizations
+    monkeypatch.setattr(msyt, "parse_localizations", lambda *args: calls.append(args) or parse(*args))
+    path = str(tmp_path / "Item.msyt")
+    write(path, "Apple")
+
+    for _ in range(2):
+        parsed, err = msgstore.fload_localizations(path, include=is_name)
+        assert err is None
+        assert parsed == { "Item_Fruit_A_Name": ("Apple", "", None) }
+    assert len(calls) == 1
+
+    # the entry of the file is replaced when it changes
+    write(path, "Pomme")
+    parsed, err = msgstore.fload_localizations(path, include=is_name)
+    assert err is None
+    assert parsed == { "Item_Fruit_A_Name": ("Pomme", "", None) }
+    assert len(calls) == 2
+    assert len(os.listdir(msgstore.CACHE_DIR)) == 1
+
+    # the callbacks are part of the key
+    parsed, err = msgstore.fload_localizations(path)
+    assert err is None
+    assert list(parsed) == ["Item_Fruit_A_Name", "Item_Fruit_A_Unused"]
+    assert len(calls) == 3
+
+def test_callbacks_with_same_name(tmp_path, monkeypatch):
+    monkeypatch.setattr(msgstore, "CACHE_DIR", str(tmp_path / "cache"))
+    path = str(tmp_path / "Item.msyt")
+    write(path, "Apple")
+    def make(suffix):
+        def include(label):
+            return label.endswith(suffix)
+        return include
+    for include in (lambda label: label.endswith("_Name"), make("_Name")):
+        parsed, err = msgstore.fload_localizations(path, include=include)
+        assert err is None
+        assert list(parsed) == ["Item_Fruit_A_Name"]
+    for include in (lambda label: label.endswith("_Unused"), make("_Unused")):
+        parsed, err = msgstore.fload_localizations(path, include=include)
+        assert err is None
+        assert list(parsed) == ["Item_Fruit_A_Unused"]
+
+def test_save_error(tmp_path, monkeypatch, capsys):
+    cache_dir = tmp_path / "cache"
+    cache_dir.write_text("")
+    monkeypatch.setattr(msgstore, "CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(msgstore, "_save_error_reported", False)
+    path = str(tmp_path / "Item.msyt")
+    write(path, "Apple")
+    for _ in range(2):
+        parsed, err = msgstore.fload_localizations(path, include=is_name)
+        assert err is None
+        assert parsed == { "Item_Fruit_A_Name": ("Apple", "", None) }
+    assert capsys.readouterr().out.count("failed to save") == 1
@@ -0,0 +1,166 @@
+import itertools
+import pytest
+import util as u
+import msyt
+
+# parse_localization before it was optimized, to check the results are the same
+# (except for the errors tested below)
+def reference_parse_localization(data: dict, allow_attr: bool) -> tuple[str, str, str | None]:
+    """
+    Parse localization entry
+
+    Return text, attr, error
+    """
+    err = u.ensure(isinstance(data, dict) and "contents" in data and len(data) == 1, "Localization data must have 'contents'")
+    if err: return "", "", err
+
+    contents = data["contents"]
+    text = ""
+    attr = ""
+    last_control = None
+
+    for x in contents:
+        if "text" in x:
+            if last_control:
+                text += x["text"][last_control:]
+                last_control = None
+            else:
+                text += x["text"]
+            continue
+        err = u.ensure("control" in x and len(x) == 1, f"entry must have either text or control")
+        if err: return "", "", err
+        c = x["control"]
+        err = u.ensure("kind" in c and isinstance(c["kind"], str), f"control must have kind")
+        kind = c["kind"]
+        if kind == "raw":
+            if "zero" in c:
+                # katakana marking above kanji
+                try:
+                    last_control = c["zero"]["zero"]["field_3"] 
+                except KeyError:
+                    return "", "", f"failed to parse control"
+        
+                # divided by 2 because it's in bytes
+                err = u.ensure(last_control % 2 == 0, "odd number of bytes to remove")
+                if err: return "", "", err
+                last_control = last_control // 2
+                continue
+
+            if "two" in c:
+                # effect and effect description placeholder
+                one_field_value = c["two"]["one_field"][0]
+                if one_field_value == 7:
+                    text += "{{effect}}"
+                elif one_field_value == 8:
+                    text += "{{effect_desc}}"
+                elif one_field_value == 13:
+                    text += "{{modifier_value}}"
+                else:
+                    return "", "", f"invalid two.one_field0: {one_field_value}"
+                continue
+
+            if "two_hundred_one" in c:
+                # See exefs/main/sub_7100AA4B4C
+                if allow_attr:
+                    err = u.ensure("dynamic" in c["two_hundred_one"], "two_hundred_one must have dynamic")
+                    if err: return "", "", err
+                    dynamic = c["two_hundred_one"]["dynamic"]
+                    err = u.ensure("field_2" in dynamic[1])
+                    if err: return "", "", err
+                    v = dynamic[1]["field_2"]
+                    err = u.ensure(len(v) == 4, "dynamic field_2 must have 4 elements")
+                    if err: return "", "", err
+                    plural = v[3]
+                    err = u.ensure(plural == 0 or plural == 1, "plural must be 0 or 1")
+                    if err: return "", "", err
+                    plural = plural == 1
+                    if v[0] == 0:
+                        t = ""
+                    elif v[0] == 1:
+                        t = "masculine"
+                    elif v[0] == 2:
+                        t = "feminine"
+                    elif v[0] == 3:
+                        t = "neuter"
+                    else:
+                        return "", "", f"invalid dynamic field_2: {v}"
+                    if plural:
+                        attr = "plural"
+                    else:
+                        attr = t
+                continue
+
+            return "", "", f"invalid raw control: {c}"
+
+    return text, attr, None
+
+
+def text(s):
+    return { "text": s }
+
+def control(**kwargs):
+    return { "control": { "kind": "raw", **kwargs } }
+
+def ruby(size):
+    return control(zero={ "zero": { "field_1": 0, "field_2": 0, "field_3": size } })
+
+def placeholder(value):
+    return control(two={ "one_field": [value] })
+
+def attr(gender, plural, size=4):
+    return control(two_hundred_one={ "dynamic": [{ "field_1": 0 }, { "field_2": [gender, 0, 0, plural][:size] }] })
+
+CONTENTS = [
+    [],
+    [text("Apple")],
+    [text("Hearty "), text("Durian")],
+    [ruby(4), text("林檎です")],
+    [ruby(6), text("林檎"), text("です")],
+    [ruby(3), text("林檎")],
+    [control(zero={ "zero": {} }), text("x")],
+    [text("Restores "), placeholder(7), text(". "), placeholder(8)],
+    [placeholder(13)],
+    [placeholder(9)],
+    *[[attr(gender, plural), text("Apfel")] for gender in range(5) for plural in range(3)],
+    [attr(1, 0, size=3)],
+    [control(two_hundred_one={})],
+    [{ "control": { "kind": "other", "group": 1, "type": 2 } }, text("skipped")],
+    [control(three={ "field_1": 0 })],
+    [{ "text": "a", "control": {} }],
+    [{ "other": 1 }],
+]
+
+ENTRIES = [{ "contents": c } for c in CONTENTS] + [
+    None,
+    {},
+    { "contents": [], "attributes": "x" },
+]
+
+@pytest.mark.parametrize("entry, allow_attr", list(itertools.product(ENTRIES, [False, True])))
+def test_same_as_reference(entry, allow_attr):
+    assert msyt.parse_localization(entry, allow_attr) == reference_parse_localization(entry, allow_attr)
+
+def test_missing_field_2_error_has_message():
+    entry = { "contents": [control(two_hundred_one={ "dynamic": [{}, {}] })] }
+    _, _, err = msyt.parse_localization(entry, True)
+    assert err == "assertion failed: two_hundred_one.dynamic[1] must have field_2"
+
+def test_missing_kind_is_error():
+    entry = { "contents": [{ "control": { "zero": {} } }] }
+    with pytest.raises(KeyError):
+        reference_parse_localization(entry, False)
+    assert msyt.parse_localization(entry, False) == ("", "", "assertion failed: control must have kind")
+
+def test_parse_localizations():
+    entries = {
+        "Item_Fruit_A_Name": { "contents": [attr(2, 0), text("Pomme")] },
+        "Item_Fruit_A_Desc": { "contents": [attr(2, 0), text("Une pomme")] },
+        "Item_Fruit_A_Unused": { "contents": [{ "control": {} }] },
+    }
+    parsed = msyt.parse_localizations(entries, lambda label: label.endswith("_Name"))
+    assert parsed["Item_Fruit_A_Name"] == ("Pomme", "feminine", None)
+    assert parsed["Item_Fruit_A_Desc"] == ("Une pomme", "", None)
+    assert parsed["Item_Fruit_A_Unused"][2] is not None
+
+    parsed = msyt.parse_localizations(entries, include=lambda label: not label.endswith("_Unused"))
+    assert list(parsed) == ["Item_Fruit_A_Name", "Item_Fruit_A_Desc"]
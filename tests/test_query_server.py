@@ -0,0 +1,95 @@
+import os
+import socket
+import threading
+import pytest
+import cook
+import hashreg
+import util as u
+import query_client as qc
+import query_server as qs
+from output_fixture import make_output
+
+@pytest.fixture
+def service(tmp_path) -> qs.Service:
+    make_output(str(tmp_path))
+    sim, err = cook.load(str(tmp_path))
+    assert err is None
+    registry = hashreg.Registry()
+    registry.add("Actor", "Item_Fruit_A", "test")
+    hashes_path = str(tmp_path / "hashes.bin")
+    assert registry.save(hashes_path) is None
+    hashes, err = hashreg.open_table(hashes_path)
+    assert err is None
+    return qs.Service(sim, hashes) # type: ignore
+
+@pytest.fixture
+def server(service):
+    # Unix socket paths are limited to about 100 bytes, tmp_path can be longer
+    socket_path = f"/tmp/query-test-{os.getpid()}.sock"
+    server = qs.UnixServer(socket_path, qs.Handler)
+    server.service = service
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, socket_path
+    server.shutdown()
+    server.server_close()
+    os.remove(socket_path)
+
+def test_handle(service):
+    response = service.handle({ "op": "match", "ingredients": [["Item_Fruit_A"], ["Item_Mushroom_A"], []] })
+    assert response == { "results": [[0, "Item_Roast_05"], [2, "Item_Cook_A_01"], [3, "Item_Cook_O_01"]] }
+    response = service.handle({ "op": "cook", "ingredients": [["Item_Fruit_A"]] })
+    expected, err = service.sim.cook(["Item_Fruit_A"])
+    assert err is None
+    assert response == { "results": [{ c: getattr(expected, c) for c in cook.RESULT_DTYPES }] }
+    response = service.handle({ "op": "lookup", "hashes": [u.crc32("Item_Fruit_A"), 1] })
+    assert response == { "results": [[("Actor", "Item_Fruit_A")], []] }
+
+@pytest.mark.parametrize("request_, error", [
+    ({ "op": "match", "ingredients": [["Item_Fruit_A", 1]] }, "ingredients[0][1] must be an actor name"),
+    ({ "op": "cook", "ingredients": [[["Item_Fruit_A"]]] }, "ingredients[0][0] must be an actor name"),
+    ({ "op": "cook", "ingredients": [["Item_Unknown"]] }, "unknown actor: Item_Unknown"),
+    ({ "op": "cook", "ingredients": [["Item_Fruit_A"] * 6] }, "ingredients[0] must be a list of up to 5 actors"),
+    ({ "op": "cook", "ingredients": "Item_Fruit_A" }, "ingredients must be a list"),
+    ({ "op": "lookup", "hashes": [1, "2"] }, "hashes[1] must be an integer"),
+    ({ "op": "lookup", "hashes": [True] }, "hashes[0] must be an integer"),
+    ({ "op": "nope" }, "unknown op: nope"),
+])
+def test_handle_invalid(service, request_, error):
+    assert service.handle(request_) == { "error": error }
+
+def test_server(server, monkeypatch):
+    server, socket_path = server
+    assert qs.is_listening(socket_path)
+    client = qc.Client(socket_path)
+    results, err = client.match([["Item_Fruit_A"]])
+    assert err is None
+    assert results == [[0, "Item_Roast_05"]]
+
+    # errors in handle are sent back, and the connection still works
+    def fail(request):
+        raise RuntimeError("broken")
+    monkeypatch.setattr(server.service, "handle", fail)
+    _, err = client.match([["Item_Fruit_A"]])
+    assert err == "failed to handle request: broken"
+    monkeypatch.undo()
+    results, err = client.match([["Item_Fruit_A"]])
+    assert err is None
+    client.close()
+
+def test_stale_socket_is_not_listening(tmp_path):
+    socket_path = f"/tmp/query-test-stale-{os.getpid()}.sock"
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(socket_path)
+    sock.close()
+    try:
+        assert not qs.is_listening(socket_path)
+    finally:
+        os.remove(socket_path)
+
+def test_recv_message_too_large():
+    a, b = socket.socketpair()
+    with a, b:
+        a.sendall(qc.LENGTH.pack(qc.MAX_MESSAGE_SIZE + 1))
+        with pytest.raises(ValueError):
+            qc.recv_message(b)
@@ -0,0 +1,138 @@
+import os
+import struct
+import pytest
+import sarc
+
+def build_sarc(files: dict[str, bytes], endian: str, hash_key: int = 0x65) -> bytes:
+    """Build a SARC archive with named files"""
+    nodes = sorted(files.items(), key=lambda item: sarc.hash_name(item[0], hash_key))
+    names = bytearray()
+    data = bytearray()
+    node_table = bytearray()
+    for name, content in nodes:
+        name_offset = len(names)
+        names += name.encode("utf-8") + b"\0"
+        names += b"\0" * (-len(names) % 4)
+        data += b"\0" * (-len(data) % 8)
+        start = len(data)
+        data += content
+        attr = 0x01000000 | name_offset // 4
+        node_table += struct.pack(f"{endian}IIII", sarc.hash_name(name, hash_key), attr, start, len(data))
+    sfat = b"SFAT" + struct.pack(f"{endian}HHI", 0xc, len(nodes), hash_key) + node_table
+    sfnt = b"SFNT" + struct.pack(f"{endian}HH", 8, 0) + names
+    data_offset = 0x14 + len(sfat) + len(sfnt)
+    data_offset += -data_offset % 8
+    header = b"SARC" + struct.pack(f"{endian}HHIIHH", 0x14, 0xFEFF, data_offset + len(data), data_offset, 0x100, 0)
+    out = header + sfat + sfnt
+    return out + b"\0" * (data_offset - len(out)) + data
+
+def yaz0(ops: list, size: int) -> bytes:
+    """
+    Encode Yaz0 from ops, which are a byte (literal) or
+    (distance, count) for a back-reference
+    """
+    out = bytearray(b"Yaz0" + struct.pack(">I", size) + bytes(8))
+    for i in range(0, len(ops), 8):
+        group = ops[i:i + 8]
+        header = 0
+        body = bytearray()
+        for bit, op in enumerate(group):
+            if isinstance(op, int):
+                header |= 0x80 >> bit
+                body.append(op)
+                continue
+            distance, count = op
+            d = distance - 1
+            if count <= 0x11:
+                body += bytes([(count - 2) << 4 | d >> 8, d & 0xff])
+            else:
+                body += bytes([d >> 8, d & 0xff, count - 0x12])
+        out.append(header)
+        out += body
+    return bytes(out)
+
+def expand(ops: list) -> bytes:
+    """Decode the ops one byte at a time, the reference for yaz0_decompress"""
+    out = bytearray()
+    for op in ops:
+        if isinstance(op, int):
+            out.append(op)
+            continue
+        distance, count = op
+        for _ in range(count):
+            out.append(out[-distance])
+    return bytes(out)
+
+YAZ0_OPS = [
+    *b"abcd",
+    (4, 4),         # no overlap
+    (2, 7),         # overlapping copy
+    *b"x",
+    (1, 0x11),      # run of one byte, longest 2-byte reference
+    (3, 0x12),      # shortest 3-byte reference
+    (10, 0x111),    # longest 3-byte reference, overlapping
+    *b"end",
+]
+
+def test_yaz0_decompress():
+    expected = expand(YAZ0_OPS)
+    assert expected.startswith(b"abcdabcdcdcdcdc")
+    assert bytes(sarc.yaz0_decompress(yaz0(YAZ0_OPS, len(expected)))) == expected
+
+def test_yaz0_stops_at_size():
+    expected = expand(YAZ0_OPS)
+    assert bytes(sarc.yaz0_decompress(yaz0(YAZ0_OPS, 10))) == expected[:10]
+
+def test_yaz0_invalid():
+    with pytest.raises(ValueError):
+        sarc.yaz0_decompress(b"Yaz1" + bytes(12))
+
+FILES = {
+    "ActorType/Item.msyt": b"item",
+    "ActorType/Armor.msyt": b"armor" * 3,
+    "StaticMsg/CookEffect.msyt": b"",
+    "Root.txt": "日本語".encode("utf-8"),
+}
+
+@pytest.mark.parametrize("endian", [">", "<"])
+def test_archive(tmp_path, endian):
+    path = tmp_path / "Msg_USen.product.sarc"
+    path.write_bytes(build_sarc(FILES, endian))
+    archive = sarc.Archive(str(path))
+    assert archive.names() == sorted(FILES)
+    for name, content in FILES.items():
+        assert bytes(archive.find(name)) == content # type: ignore
+    assert archive.find("ActorType/Missing.msyt") is None
+    # hashes before, between and after the ones in the archive
+    for name in ("", "A", "ActorType/Item.msy", "zzzzzzzzzz"):
+        assert archive.find(name) is None
+    assert archive.listdir("") == ["ActorType", "Root.txt", "StaticMsg"]
+    assert archive.listdir("ActorType") == ["Armor.msyt", "Item.msyt"]
+
+def test_archive_hash_key(tmp_path):
+    path = tmp_path / "Other.sarc"
+    path.write_bytes(build_sarc(FILES, "<", hash_key=0x1f))
+    archive = sarc.Archive(str(path))
+    assert bytes(archive.find("ActorType/Item.msyt")) == b"item" # type: ignore
+    assert archive.find("ActorType/Missing.msyt") is None
+
+def test_archive_invalid(tmp_path):
+    path = tmp_path / "Bad.sarc"
+    path.write_bytes(b"SARC" + bytes(0x20))
+    with pytest.raises(ValueError):
+        sarc.Archive(str(path))
+
+@pytest.mark.parametrize("endian", [">", "<"])
+def test_paths_in_compressed_archive(tmp_path, endian):
+    data = build_sarc(FILES, endian)
+    # stored as literals, the reader doesn't care how it was compressed
+    (tmp_path / "Msg_USen.product.ssarc").write_bytes(yaz0(list(data), len(data)))
+    archive_path = os.path.join(str(tmp_path), "Msg_USen.product.sarc")
+    assert sarc.listdir(archive_path) == ["ActorType", "Root.txt", "StaticMsg"]
+    assert sarc.listdir(os.path.join(archive_path, "ActorType")) == ["Armor.msyt", "Item.msyt"]
+    assert bytes(sarc.read(os.path.join(archive_path, "ActorType", "Item.msyt"))) == b"item"
+    assert sarc.stat(os.path.join(archive_path, "ActorType", "Armor.msyt"))[1] == 15
+    assert sarc.exists(os.path.join(archive_path, "StaticMsg", "CookEffect.msyt"))
+    assert not sarc.exists(os.path.join(archive_path, "ActorType", "Missing.msyt"))
+    with pytest.raises(FileNotFoundError):
+        sarc.read(os.path.join(archive_path, "ActorType", "Missing.msyt"))